@@ -1,15 +1,27 @@
 import os
-import logging
+import asyncio
 import traceback
+from contextlib import asynccontextmanager
 from dotenv import load_dotenv
-from fastapi import FastAPI, HTTPException, status
+import csv
+import io
+import json
+from datetime import datetime, timezone
+from typing import List
+from fastapi import FastAPI, File, HTTPException, UploadFile, status
 from fastapi.responses import RedirectResponse
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel, EmailStr, Field
+from pydantic import BaseModel, EmailStr, Field, ValidationError
 from motor.motor_asyncio import AsyncIOMotorClient
 import numpy as np
-import joblib
-import bcrypt
+from diabetes.logger import logging
+from diabetes.serving.batcher import MicroBatcher
+from diabetes.serving.cache import InMemoryCacheBackend, MongoCacheBackend, PredictionCache, pack_features
+from diabetes.serving.drift_monitor import DriftMonitor
+from diabetes.serving.executor import ExecutorPool
+from diabetes.serving.passwords import check_password, hash_password
+from diabetes.serving.registry import ModelRegistry, ModelVersion
+from diabetes.serving.write_behind import WriteBehindBuffer
 
 # Load environment variables
 load_dotenv()
@@ -17,20 +29,86 @@ load_dotenv()
 # MongoDB settings from environment variables
 DATABASE_NAME = os.getenv("DATABASE_NAME", "Project")
 REGISTER_DATA_COLLECTION_NAME = os.getenv("REGISTER_DATA_COLLECTION_NAME", "register_data")
-DIABETES_COLLECTION_NAME = os.getenv("DIABETES_COLLECTION_NAME", "diabetes")
+# Served predictions are logged apart from the training collection, whose documents follow config/schema.yaml
+PREDICTION_LOG_COLLECTION_NAME = os.getenv("PREDICTION_LOG_COLLECTION_NAME", "prediction_log")
 MONGO_DB_URL = os.getenv("MONGO_DB_URL")
 
-import os
-
-BASE_DIR = "saved_models"
-
-latest_version = max(os.listdir(BASE_DIR))  # gets 1731484161
-
-MODEL_PATH = os.path.join(BASE_DIR, latest_version, "model.pkl")
-PREPROCESSING_PATH = os.path.join(BASE_DIR, latest_version, "preprocessing.pkl")
+# Upper bound on the number of forms accepted by a single batch request
+MAX_BATCH_SIZE = int(os.getenv("MAX_BATCH_SIZE", "5000"))
+
+# Micro-batching of concurrent /predict requests
+MICRO_BATCH_ENABLED = os.getenv("MICRO_BATCH_ENABLED", "true").lower() == "true"
+MICRO_BATCH_MAX_SIZE = int(os.getenv("MICRO_BATCH_MAX_SIZE", "64"))
+MICRO_BATCH_MAX_WAIT_MS = float(os.getenv("MICRO_BATCH_MAX_WAIT_MS", "5"))
+
+# Executor pools for blocking work and the bcrypt cost factor
+THREAD_POOL_WORKERS = int(os.getenv("THREAD_POOL_WORKERS", "4"))
+PROCESS_POOL_WORKERS = int(os.getenv("PROCESS_POOL_WORKERS", "0"))
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+BCRYPT_EXECUTOR = os.getenv("BCRYPT_EXECUTOR", "thread")
+
+# Model registry settings
+SAVED_MODEL_DIR = os.getenv("SAVED_MODEL_DIR", "saved_models")
+MODEL_POLL_INTERVAL_SECONDS = float(os.getenv("MODEL_POLL_INTERVAL_SECONDS", "10"))
+MODEL_HOT_RELOAD = os.getenv("MODEL_HOT_RELOAD", "true").lower() == "true"
+MODEL_PREFER_NATIVE = os.getenv("MODEL_PREFER_NATIVE", "true").lower() == "true"
+MODEL_VERIFY_CHECKSUMS = os.getenv("MODEL_VERIFY_CHECKSUMS", "true").lower() == "true"
+# Batches up to this many rows use the NumPy fast scorer; 0 disables it
+FAST_SCORER_MAX_ROWS = int(os.getenv("FAST_SCORER_MAX_ROWS", "256"))
+# Answer /predict from the version's precomputed prediction table when it ships one
+PREDICTION_TABLE_ENABLED = os.getenv("PREDICTION_TABLE_ENABLED", "true").lower() == "true"
+
+# Prediction cache keyed by model version and packed form features
+PREDICTION_CACHE_ENABLED = os.getenv("PREDICTION_CACHE_ENABLED", "true").lower() == "true"
+PREDICTION_CACHE_MAX_SIZE = int(os.getenv("PREDICTION_CACHE_MAX_SIZE", "100000"))
+PREDICTION_CACHE_TTL_SECONDS = float(os.getenv("PREDICTION_CACHE_TTL_SECONDS", "3600"))
+# Shared backend for all workers: "none", "mongo" or "memory" (process-local stand-in)
+PREDICTION_CACHE_BACKEND = os.getenv("PREDICTION_CACHE_BACKEND", "none")
+PREDICTION_CACHE_COLLECTION_NAME = os.getenv("PREDICTION_CACHE_COLLECTION_NAME", "prediction_cache")
+
+# Write-behind logging of predictions to MongoDB
+WRITE_BEHIND_ENABLED = os.getenv("WRITE_BEHIND_ENABLED", "true").lower() == "true"
+WRITE_BEHIND_MAX_QUEUE_SIZE = int(os.getenv("WRITE_BEHIND_MAX_QUEUE_SIZE", "10000"))
+WRITE_BEHIND_FLUSH_BATCH_SIZE = int(os.getenv("WRITE_BEHIND_FLUSH_BATCH_SIZE", "500"))
+WRITE_BEHIND_FLUSH_INTERVAL_MS = float(os.getenv("WRITE_BEHIND_FLUSH_INTERVAL_MS", "200"))
+# "block", "drop_newest" or "drop_oldest"
+WRITE_BEHIND_OVERFLOW_POLICY = os.getenv("WRITE_BEHIND_OVERFLOW_POLICY", "block")
+WRITE_BEHIND_BLOCK_TIMEOUT_SECONDS = float(os.getenv("WRITE_BEHIND_BLOCK_TIMEOUT_SECONDS", "1"))
+
+# Online drift monitoring of /predict traffic against the serving model's training baseline
+DRIFT_MONITOR_ENABLED = os.getenv("DRIFT_MONITOR_ENABLED", "true").lower() == "true"
+DRIFT_MONITOR_WINDOW_SECONDS = float(os.getenv("DRIFT_MONITOR_WINDOW_SECONDS", "3600"))
+DRIFT_MONITOR_SLOTS = int(os.getenv("DRIFT_MONITOR_SLOTS", "12"))
+DRIFT_MONITOR_P_VALUE_THRESHOLD = float(os.getenv("DRIFT_MONITOR_P_VALUE_THRESHOLD", "0.05"))
+DRIFT_MONITOR_FLUSH_INTERVAL_MS = float(os.getenv("DRIFT_MONITOR_FLUSH_INTERVAL_MS", "1000"))
+DRIFT_MONITOR_MAX_PENDING_ROWS = int(os.getenv("DRIFT_MONITOR_MAX_PENDING_ROWS", "100000"))
+
+# Start and stop background services with the app
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    executor.start()
+    if cache.backend is not None:
+        try:
+            await cache.backend.setup()
+        except Exception as e:
+            logger.warning(f"Shared prediction cache setup failed: {e}")
+    if MODEL_HOT_RELOAD:
+        registry.start()
+    if MICRO_BATCH_ENABLED:
+        batcher.start()
+    if WRITE_BEHIND_ENABLED:
+        write_behind.start()
+    if DRIFT_MONITOR_ENABLED:
+        drift_monitor.start()
+    yield
+    await batcher.stop()
+    await write_behind.stop()
+    await drift_monitor.stop()
+    await registry.stop()
+    executor.shutdown()
 
 # Initialize FastAPI app
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
 
 # CORS settings
 app.add_middleware(
@@ -41,16 +119,7 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Set up logging
-import logging
-
-logging.basicConfig(
-    level=logging.INFO,  # Set the logging level
-    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",  # Log format
-    filename="app.log",  # Log file path
-    filemode="a"  # Append mode; use 'w' to overwrite
-)
-
+# Server logs go to the run's file under logs/, set up by diabetes.logger
 logger = logging.getLogger(__name__)
 
 @app.get("/", tags=["authentication"])
@@ -62,17 +131,50 @@ try:
     client = AsyncIOMotorClient(MONGO_DB_URL)
     db = client[DATABASE_NAME]
     register_data_collection = db[REGISTER_DATA_COLLECTION_NAME]
-    diabetes_collection = db[DIABETES_COLLECTION_NAME]
+    prediction_log_collection = db[PREDICTION_LOG_COLLECTION_NAME]
+    prediction_cache_collection = db[PREDICTION_CACHE_COLLECTION_NAME]
     logger.info("Connected to MongoDB successfully.")
 except Exception as e:
     logger.error(f"Failed to connect to MongoDB: {e}")
     raise HTTPException(status_code=500, detail="Database connection error.")
 
-# Load model and preprocessing pipeline
+# Order of the form fields expected by the model; inference pipelines carry their own
+# fields (config/schema.yaml serving_fields), which must match this order
+FEATURE_FIELDS = (
+    "age", "sex", "polyuria", "polydipsia", "suddenWeightLoss", "weakness",
+    "polyphagia", "genitalThrush", "visualBlurring", "itching", "irritability",
+    "delayedHealing", "partialParesis", "muscleStiffness", "alopecia", "obesity",
+)
+
+# Training data column of each form field, in FEATURE_FIELDS order
+FEATURE_COLUMNS = (
+    "Age", "Gender", "Polyuria", "Polydipsia", "sudden weight loss", "weakness",
+    "Polyphagia", "Genital thrush", "visual blurring", "Itching", "Irritability",
+    "delayed healing", "partial paresis", "muscle stiffness", "Alopecia", "Obesity",
+)
+
+# Training label of each code of the categorical form fields (sex 0 = Female, 1 = Male, flags 0 = No, 1 = Yes);
+# models saved before the inference pipeline map these onto the codes of their fitted encoder
+FORM_CATEGORIES = {
+    "Gender": ("Female", "Male"),
+    **{column: ("No", "Yes") for column in FEATURE_COLUMNS[2:]},
+}
+
+# Load the latest model version; new versions are swapped in by the registry watcher
+registry = ModelRegistry(
+    model_dir=SAVED_MODEL_DIR,
+    poll_interval=MODEL_POLL_INTERVAL_SECONDS,
+    prefer_native=MODEL_PREFER_NATIVE,
+    verify_checksums=MODEL_VERIFY_CHECKSUMS,
+    fast_scorer_max_rows=FAST_SCORER_MAX_ROWS,
+    use_prediction_table=PREDICTION_TABLE_ENABLED,
+    feature_fields=FEATURE_FIELDS,
+    feature_columns=FEATURE_COLUMNS,
+    form_categories=FORM_CATEGORIES,
+)
 try:
-    model = joblib.load(MODEL_PATH)
-    preprocessing = joblib.load(PREPROCESSING_PATH)
-    logger.info("Model and preprocessing pipeline loaded successfully.")
+    registry.load_latest()
+    logger.info(f"Model version {registry.active.version} loaded successfully.")
 except Exception as e:
     logger.error(f"Error loading model or preprocessing pipeline: {e}")
     raise HTTPException(status_code=500, detail="Model loading error.")
@@ -117,6 +219,11 @@ class PredictionResponse(BaseModel):
     recommendation: str
     probability: float
 
+# Define batch prediction response model
+class BatchPredictionResponse(BaseModel):
+    count: int
+    predictions: List[PredictionResponse]
+
 # Medical recommendation based on probability
 def get_medical_recommendation(probability):
     if 0 <= probability < 0.3:
@@ -150,6 +257,182 @@ def get_medical_recommendation(probability):
         return "Invalid probability value. Please enter a probability between 0 and 1."
 
 
+def forms_to_matrix(forms: List[DiabetesFormData], model_version: ModelVersion) -> np.ndarray:
+    """Stack the forms into one contiguous (n_forms, 16) float matrix with the model version's field extraction."""
+    return model_version.extract(forms)
+
+
+def predict_probabilities(model_version: ModelVersion, features: np.ndarray) -> np.ndarray:
+    """Run one transform + predict_proba call over a whole feature matrix."""
+    return model_version.predict_proba(features)
+
+
+# Thread/process pools that keep inference and bcrypt off the event loop
+executor = ExecutorPool(thread_workers=THREAD_POOL_WORKERS, process_workers=PROCESS_POOL_WORKERS)
+
+# Coalesces concurrent single-row /predict calls into one inference call per model version
+batcher = MicroBatcher(
+    predict_fn=predict_probabilities,
+    max_batch_size=MICRO_BATCH_MAX_SIZE,
+    max_wait_ms=MICRO_BATCH_MAX_WAIT_MS,
+    executor=executor,
+)
+
+
+# Prediction cache with an optional shared backend
+if PREDICTION_CACHE_BACKEND == "mongo":
+    cache_backend = MongoCacheBackend(prediction_cache_collection, ttl_seconds=PREDICTION_CACHE_TTL_SECONDS)
+elif PREDICTION_CACHE_BACKEND == "memory":
+    cache_backend = InMemoryCacheBackend(ttl_seconds=PREDICTION_CACHE_TTL_SECONDS)
+else:
+    cache_backend = None
+cache = PredictionCache(
+    max_size=PREDICTION_CACHE_MAX_SIZE,
+    ttl_seconds=PREDICTION_CACHE_TTL_SECONDS,
+    backend=cache_backend,
+)
+
+
+# Sliding-window feature counts of live traffic, compared with the model's baseline sketch
+drift_monitor = DriftMonitor(
+    feature_columns=FEATURE_COLUMNS,
+    form_categories=FORM_CATEGORIES,
+    model_dir=SAVED_MODEL_DIR,
+    window_seconds=DRIFT_MONITOR_WINDOW_SECONDS,
+    n_slots=DRIFT_MONITOR_SLOTS,
+    threshold=DRIFT_MONITOR_P_VALUE_THRESHOLD,
+    flush_interval_ms=DRIFT_MONITOR_FLUSH_INTERVAL_MS,
+    max_pending_rows=DRIFT_MONITOR_MAX_PENDING_ROWS,
+)
+
+
+# The model version a request starts on is captured once and used for extraction, scoring, caching
+# and logging, so a hot swap mid-request cannot mix versions
+async def predict_one(data: DiabetesFormData, model_version: ModelVersion) -> float:
+    version = model_version.version
+    features = forms_to_matrix([data], model_version)
+    if DRIFT_MONITOR_ENABLED:
+        drift_monitor.record(features, version)
+    key = int(pack_features(features)[0])
+    if PREDICTION_CACHE_ENABLED:
+        cached = await cache.get_many(version, [key])
+        if key in cached:
+            return cached[key]
+
+    if batcher.is_running:
+        probability = await batcher.submit(features[0], model_version)
+    else:
+        probability = float((await executor.run_in_thread(predict_probabilities, model_version, features))[0])
+
+    if PREDICTION_CACHE_ENABLED:
+        await cache.set_many(version, {key: probability})
+    return probability
+
+
+async def predict_matrix(features: np.ndarray, model_version: ModelVersion) -> np.ndarray:
+    """Predict a feature matrix, scoring only the distinct rows missing from the cache."""
+    if not PREDICTION_CACHE_ENABLED:
+        return await executor.run_in_thread(predict_probabilities, model_version, features)
+
+    version = model_version.version
+    keys = pack_features(features)
+    unique_keys, first_rows, inverse = np.unique(keys, return_index=True, return_inverse=True)
+    cached = await cache.get_many(version, unique_keys.tolist())
+
+    unique_probabilities = np.empty(len(unique_keys), dtype=np.float64)
+    missing = np.array([key not in cached for key in unique_keys.tolist()], dtype=bool)
+    for index in np.flatnonzero(~missing):
+        unique_probabilities[index] = cached[int(unique_keys[index])]
+    if missing.any():
+        scored = await executor.run_in_thread(predict_probabilities, model_version, features[first_rows[missing]])
+        unique_probabilities[missing] = scored
+        await cache.set_many(version, dict(zip(unique_keys[missing].tolist(), scored.tolist())))
+    return unique_probabilities[inverse]
+
+
+# Buffers prediction records and writes them to MongoDB in the background
+write_behind = WriteBehindBuffer(
+    prediction_log_collection,
+    max_queue_size=WRITE_BEHIND_MAX_QUEUE_SIZE,
+    flush_batch_size=WRITE_BEHIND_FLUSH_BATCH_SIZE,
+    flush_interval_ms=WRITE_BEHIND_FLUSH_INTERVAL_MS,
+    overflow_policy=WRITE_BEHIND_OVERFLOW_POLICY,
+    block_timeout=WRITE_BEHIND_BLOCK_TIMEOUT_SECONDS,
+)
+
+
+def build_prediction_record(data: DiabetesFormData, probability: float, version: str,
+                            created_at: datetime) -> dict:
+    """Form data plus the prediction and the model version that made it, for the prediction log."""
+    record = data.dict()
+    record.update({
+        "probability": probability,
+        "diabetesStatus": int(probability >= 0.5),
+        "modelVersion": version,
+        "createdAt": created_at,
+    })
+    return record
+
+
+async def save_prediction_records(records: List[dict]) -> None:
+    if write_behind.is_running:
+        await write_behind.submit(records)
+    elif len(records) == 1:
+        await prediction_log_collection.insert_one(records[0])
+    else:
+        await prediction_log_collection.insert_many(records, ordered=False)
+
+
+def build_prediction_response(probability: float) -> PredictionResponse:
+    return PredictionResponse(
+        diabetesStatus=int(probability >= 0.5),
+        recommendation=get_medical_recommendation(probability),
+        probability=probability
+    )
+
+
+def parse_uploaded_forms(filename: str, content: bytes) -> List[DiabetesFormData]:
+    """Parse an uploaded CSV (header row with the form field names) or NDJSON file."""
+    text = content.decode("utf-8-sig")
+    if filename.lower().endswith(".csv"):
+        rows = csv.DictReader(io.StringIO(text))
+    else:
+        rows = (json.loads(line) for line in text.splitlines() if line.strip())
+
+    forms = []
+    for line_number, row in enumerate(rows, start=1):
+        # Stop at the batch limit instead of validating the rest of an oversized file
+        if len(forms) == MAX_BATCH_SIZE:
+            raise HTTPException(status_code=413, detail=f"Batch size exceeds the limit of {MAX_BATCH_SIZE} forms.")
+        if not isinstance(row, dict):
+            raise ValueError(f"Row {line_number} is a JSON {type(row).__name__}, expected an object")
+        forms.append(DiabetesFormData(**row))
+    return forms
+
+
+async def predict_forms(forms: List[DiabetesFormData]) -> BatchPredictionResponse:
+    if not forms:
+        raise HTTPException(status_code=400, detail="At least one form is required.")
+    if len(forms) > MAX_BATCH_SIZE:
+        raise HTTPException(status_code=413, detail=f"Batch size exceeds the limit of {MAX_BATCH_SIZE} forms.")
+
+    model_version = registry.active
+    version = model_version.version
+    features = forms_to_matrix(forms, model_version)
+    if DRIFT_MONITOR_ENABLED:
+        drift_monitor.record(features, version)
+    probabilities = await predict_matrix(features, model_version)
+    predictions = [build_prediction_response(float(p)) for p in probabilities]
+
+    # Save all forms with their predictions to MongoDB
+    created_at = datetime.now(timezone.utc)
+    await save_prediction_records([
+        build_prediction_record(form, float(p), version, created_at) for form, p in zip(forms, probabilities)
+    ])
+
+    return BatchPredictionResponse(count=len(predictions), predictions=predictions)
+
+
 # Register user endpoint
 @app.post("/register", status_code=status.HTTP_201_CREATED)
 async def register_user(user: User):
@@ -164,7 +447,7 @@ async def register_user(user: User):
             raise HTTPException(status_code=400, detail="Email already registered")
 
         # Hash the password
-        hashed_password = bcrypt.hashpw(user.password.encode('utf-8'), bcrypt.gensalt())
+        hashed_password = await executor.run(BCRYPT_EXECUTOR, hash_password, user.password, BCRYPT_ROUNDS)
 
         # Insert new user into the database with the hashed password
         user_data = user.dict()
@@ -173,6 +456,8 @@ async def register_user(user: User):
         logger.info(f"User registered successfully with ID: {result.inserted_id}")
         return {"message": "User registered successfully", "user": user}
 
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error during registration: {e}")
         logger.debug(f"Exception details: {traceback.format_exc()}")
@@ -189,13 +474,15 @@ async def login_user(login_data: LoginData):
             raise HTTPException(status_code=400, detail="Invalid email or password")
 
         # Verify password
-        if not bcrypt.checkpw(login_data.password.encode('utf-8'), user['password']):
+        if not await executor.run(BCRYPT_EXECUTOR, check_password, login_data.password, user['password']):
             logger.warning(f"Invalid password for email: {login_data.email}")
             raise HTTPException(status_code=400, detail="Invalid email or password")
 
         logger.info(f"User logged in successfully: {login_data.email}")
         return {"message": "Login successful", "user": user['email']}
 
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error during login: {traceback.format_exc()}")
         raise HTTPException(status_code=500, detail="Login processing error.")
@@ -204,31 +491,110 @@ async def login_user(login_data: LoginData):
 @app.post("/predict", response_model=PredictionResponse, status_code=status.HTTP_200_OK)
 async def predict(data: DiabetesFormData):
     try:
-        # Extract features
-        features = np.array([[data.age, data.sex, data.polyuria, data.polydipsia,
-                              data.suddenWeightLoss, data.weakness, data.polyphagia,
-                              data.genitalThrush, data.visualBlurring, data.itching,
-                              data.irritability, data.delayedHealing, data.partialParesis,
-                              data.muscleStiffness, data.alopecia, data.obesity]])
+        # Extract features, preprocess and predict probability
+        model_version = registry.active
+        version = model_version.version
+        probability = await predict_one(data, model_version)
 
-        # Preprocess input
-        features = preprocessing.transform(features)
+        # Save form data with the prediction to MongoDB
+        await save_prediction_records([
+            build_prediction_record(data, probability, version, datetime.now(timezone.utc))
+        ])
 
-        # Predict probability
-        probability = float(model.predict_proba(features)[0][1])
+        return build_prediction_response(probability)
 
-        # Get recommendation
-        recommendation = get_medical_recommendation(probability)
+    except Exception as e:
+        logger.error(f"Prediction error: {traceback.format_exc()}")
+        raise HTTPException(status_code=500, detail="Prediction processing error.")
 
-        # Save form data to MongoDB
-        await diabetes_collection.insert_one(data.dict())
+# Batch diabetes prediction endpoint (JSON array of forms)
+@app.post("/predict/batch", response_model=BatchPredictionResponse, status_code=status.HTTP_200_OK)
+async def predict_batch(forms: List[DiabetesFormData]):
+    try:
+        return await predict_forms(forms)
 
-        return PredictionResponse(
-            diabetesStatus=int(probability >= 0.5),
-            recommendation=recommendation,
-            probability=probability
-        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Batch prediction error: {traceback.format_exc()}")
+        raise HTTPException(status_code=500, detail="Batch prediction processing error.")
+
+# Batch diabetes prediction endpoint (CSV or NDJSON file upload)
+@app.post("/predict/batch/upload", response_model=BatchPredictionResponse, status_code=status.HTTP_200_OK)
+async def predict_batch_upload(file: UploadFile = File(...)):
+    try:
+        content = await file.read()
+        try:
+            forms = parse_uploaded_forms(file.filename or "", content)
+        except (ValueError, ValidationError, csv.Error) as e:
+            logger.warning(f"Invalid batch upload {file.filename}: {e}")
+            raise HTTPException(status_code=422, detail=f"Invalid batch file: {e}")
+
+        return await predict_forms(forms)
 
+    except HTTPException:
+        raise
     except Exception as e:
-        logger.error(f"Prediction error: {traceback.format_exc()}")
-        raise HTTPException(status_code=500, detail="Prediction processing error.")
+        logger.error(f"Batch upload prediction error: {traceback.format_exc()}")
+        raise HTTPException(status_code=500, detail="Batch prediction processing error.")
+
+# Micro-batcher queue depth and batch size metrics
+@app.get("/metrics/batcher", status_code=status.HTTP_200_OK)
+async def batcher_metrics():
+    return batcher.metrics()
+
+# Write-behind buffer queue depth and write counters
+@app.get("/metrics/write-behind", status_code=status.HTTP_200_OK)
+async def write_behind_metrics():
+    return write_behind.metrics()
+
+# Drift monitor row counters and fold timings
+@app.get("/metrics/drift", status_code=status.HTTP_200_OK)
+async def drift_metrics():
+    return drift_monitor.metrics()
+
+# Per-feature drift of live traffic over the sliding window
+@app.get("/monitoring/drift", tags=["monitoring"], status_code=status.HTTP_200_OK)
+async def drift_monitoring_report():
+    try:
+        return drift_monitor.report()
+    except Exception as e:
+        logger.error(f"Drift report error: {traceback.format_exc()}")
+        raise HTTPException(status_code=500, detail="Drift report error.")
+
+# Prediction cache hit/miss counters
+@app.get("/metrics/cache", status_code=status.HTTP_200_OK)
+async def cache_metrics():
+    return cache.stats()
+
+# Model registry admin endpoints
+@app.get("/models", tags=["models"], status_code=status.HTTP_200_OK)
+async def list_models():
+    return registry.status()
+
+@app.post("/models/{version}/pin", tags=["models"], status_code=status.HTTP_200_OK)
+async def pin_model(version: str):
+    try:
+        await asyncio.to_thread(registry.pin, version)
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"Model version {version} not found.")
+    except Exception as e:
+        logger.error(f"Error pinning model version {version}: {traceback.format_exc()}")
+        raise HTTPException(status_code=500, detail="Model loading error.")
+    return registry.status()
+
+@app.post("/models/unpin", tags=["models"], status_code=status.HTTP_200_OK)
+async def unpin_model():
+    await asyncio.to_thread(registry.unpin)
+    return registry.status()
+
+@app.post("/models/rollback", tags=["models"], status_code=status.HTTP_200_OK)
+async def rollback_model():
+    try:
+        await asyncio.to_thread(registry.rollback)
+    except LookupError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error rolling back model: {traceback.format_exc()}")
+        raise HTTPException(status_code=500, detail="Model loading error.")
+    return registry.status()
@@ -0,0 +1,79 @@
+"""
+Parity check and per-row latency microbenchmark of the FastScorer against the model it
+was built from, for batch sizes 1 to 10k. Results are logged and written to a YAML report.
+
+    python benchmarks/fast_scorer_benchmark.py [--model saved_models/<version>/model.pkl]
+                                               [--report benchmarks/reports/fast_scorer.yaml]
+"""
+import argparse
+import os
+import platform
+import sys
+from datetime import datetime
+
+import numpy as np
+import sklearn
+import xgboost
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from diabetes.constant.Training_pipeline import MODEL_FILE_NAME, SAVED_MODEL_DIR  # noqa: E402
+from diabetes.logger import logging  # noqa: E402
+from diabetes.ml.model.fast_scorer import (FastScorer, benchmark, check_parity,  # noqa: E402
+                                           random_form_batch, scaler_arrays)
+from diabetes.utils.main_utils import load_object, write_yaml_file  # noqa: E402
+
+BATCH_SIZES = (1, 10, 100, 1000, 10000)
+
+
+def latest_model_path(model_dir: str = SAVED_MODEL_DIR) -> str:
+    versions = sorted((name for name in os.listdir(model_dir) if name.isdigit()), key=int)
+    if not versions:
+        raise FileNotFoundError(f"No saved model versions found in {model_dir}")
+    return os.path.join(model_dir, versions[-1], MODEL_FILE_NAME)
+
+
+def with_missing(x: np.ndarray, fraction: float = 0.2, seed: int = 0) -> np.ndarray:
+    x = x.copy()
+    x[np.random.default_rng(seed).random(x.shape) < fraction] = np.nan
+    return x
+
+
+def run(model_path: str, repeats: int) -> dict:
+    diabetes_model = load_object(model_path)
+    # InferencePipeline keeps its scaler as mean/scale arrays, the older diabetesModel as a preprocessor
+    scaler = (diabetes_model.mean, diabetes_model.scale) if hasattr(diabetes_model, "mean") \
+        else scaler_arrays(diabetes_model.preprocessor)
+    fast_scorer = FastScorer.from_model(diabetes_model.model, scalers=[scaler])
+    # Form validation rejects NaN, so the missing value branches are checked on the bare estimator
+    estimator_scorer = FastScorer.from_model(diabetes_model.model)
+
+    x = random_form_batch(10000)
+    scaled_with_missing = with_missing((x - scaler[0]) / scaler[1])
+    return {
+        "model_path": model_path,
+        "estimator": type(diabetes_model.model).__name__,
+        "n_trees": fast_scorer.n_trees,
+        "max_depth": fast_scorer.max_depth,
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "environment": {"python": platform.python_version(), "numpy": np.__version__,
+                        "scikit-learn": sklearn.__version__, "xgboost": xgboost.__version__},
+        "parity_max_abs_difference": {
+            "dense": check_parity(fast_scorer, diabetes_model.predict_proba, x),
+            "missing_values": check_parity(estimator_scorer, diabetes_model.model.predict_proba,
+                                           scaled_with_missing),
+        },
+        "latency": benchmark(fast_scorer, diabetes_model.predict_proba, batch_sizes=BATCH_SIZES, repeats=repeats),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", help="model.pkl to benchmark (default: latest saved model version)")
+    parser.add_argument("--report", default=os.path.join("benchmarks", "reports", "fast_scorer.yaml"))
+    parser.add_argument("--repeats", type=int, default=20)
+    args = parser.parse_args()
+
+    report = run(args.model or latest_model_path(), args.repeats)
+    write_yaml_file(args.report, report)
+    logging.info(f"FastScorer benchmark report written to {args.report}")
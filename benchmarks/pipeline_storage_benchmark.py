@@ -0,0 +1,123 @@
+"""
+End-to-end time of the table-heavy pipeline stages on a scaled-up synthetic copy of
+diabetes.csv, for each storage format. Results are logged and written to a YAML report.
+
+For every format the real components run against a disk-only artifact store, so each
+stage reads the previous stage's files back:
+  ingestion       the synthetic rows are streamed into the feature store in export-sized
+                  chunks (standing in for the MongoDB export) and split into train/test
+  validation      DataValidation schema checks
+  drift           DataValidation drift report and baseline sketch
+  transformation  DataTransformation (encoding, scaling, rebalancing, saving arrays)
+
+Run from the repository root:
+    python benchmarks/pipeline_storage_benchmark.py [--rows 1000000] [--formats csv parquet feather]
+                                                    [--report benchmarks/reports/pipeline_storage.yaml]
+"""
+import argparse
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from diabetes.components.data_ingestion import DataIngestion  # noqa: E402
+from diabetes.components.data_transformation import DataTransformation  # noqa: E402
+from diabetes.components.data_validation import DataValidation  # noqa: E402
+from diabetes.constant import Training_pipeline  # noqa: E402
+from diabetes.data_access.storage import CSV, FEATHER, PARQUET, TableWriter, synthetic_copy  # noqa: E402
+from diabetes.entity.config_entity import (DataIngestionConfig, DataTransformationConfig,  # noqa: E402
+                                           DataValidationConfig, TrainingPipelineConfig)
+from diabetes.logger import logging  # noqa: E402
+from diabetes.utils.artifact_store import ArtifactStore  # noqa: E402
+from diabetes.utils.main_utils import read_yaml, write_yaml_file  # noqa: E402
+
+
+def directory_size(dir_path: str) -> int:
+    return sum(os.path.getsize(os.path.join(root, name)) for root, _, names in os.walk(dir_path) for name in names)
+
+
+def run_format(dataframe: pd.DataFrame, storage_format: str, work_dir: str, rebalance_strategy: str) -> dict:
+    # Configs read these module constants when they are built
+    Training_pipeline.DATA_STORAGE_FORMAT = storage_format
+    Training_pipeline.ARTIFACT_DIR = os.path.join(work_dir, storage_format)
+    pipeline_config = TrainingPipelineConfig(timestamp=datetime.now())
+    artifact_store = ArtifactStore.disk_only()
+    seconds = {}
+
+    start = time.perf_counter()
+    ingestion_config = DataIngestionConfig(pipeline_config)
+    data_ingestion = DataIngestion(ingestion_config, artifact_store)
+    with TableWriter(ingestion_config.feature_store_file_path, read_yaml(Training_pipeline.SCHEMA_FILE_PATH)) as writer:
+        for offset in range(0, len(dataframe), ingestion_config.export_chunk_size):
+            writer.write(dataframe.iloc[offset:offset + ingestion_config.export_chunk_size])
+    ingestion_artifact = data_ingestion.initiate_data_ingestion(ingestion_config.feature_store_file_path)
+    seconds["ingestion"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    data_validation = DataValidation(DataValidationConfig(pipeline_config), ingestion_artifact, artifact_store)
+    validation_artifact = data_validation.initiate_data_validation(detect_drift=False)
+    seconds["validation"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    data_validation.initiate_drift_detection()
+    seconds["drift"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    transformation_config = DataTransformationConfig(pipeline_config)
+    transformation_config.rebalance_strategy = rebalance_strategy
+    DataTransformation(validation_artifact, transformation_config, artifact_store).initiate_data_transformation()
+    seconds["transformation"] = time.perf_counter() - start
+
+    return {
+        "format": storage_format,
+        "seconds": {stage: round(value, 3) for stage, value in seconds.items()},
+        "total_seconds": round(sum(seconds.values()), 3),
+        "ingested_bytes_on_disk": directory_size(os.path.dirname(os.path.dirname(
+            ingestion_config.feature_store_file_path))),
+    }
+
+
+def run(source_file_path: str, n_rows: int, formats, rebalance_strategy: str, work_dir: str) -> dict:
+    dataframe = synthetic_copy(source_file_path, n_rows)
+    results = []
+    for storage_format in formats:
+        result = run_format(dataframe, storage_format, work_dir, rebalance_strategy)
+        logging.info(f"Pipeline storage benchmark: {result}")
+        results.append(result)
+    return {
+        "source_file_path": source_file_path,
+        "rows": n_rows,
+        "rebalance_strategy": rebalance_strategy,
+        "artifact_store": "disk only",
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "environment": {"python": platform.python_version(), "pandas": pd.__version__},
+        "results": results,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--source", default="diabetes.csv")
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--formats", nargs="+", default=[CSV, PARQUET, FEATHER])
+    # rebalancing costs the same for every format, so it is off unless asked for
+    parser.add_argument("--rebalance-strategy", default="none")
+    parser.add_argument("--work-dir", help="where the artifacts are written (default: a temporary directory)")
+    parser.add_argument("--report", default=os.path.join("benchmarks", "reports", "pipeline_storage.yaml"))
+    args = parser.parse_args()
+
+    work_dir = args.work_dir or tempfile.mkdtemp(prefix="pipeline_storage_benchmark_")
+    try:
+        report = run(args.source, args.rows, args.formats, args.rebalance_strategy, work_dir)
+    finally:
+        if not args.work_dir:
+            shutil.rmtree(work_dir, ignore_errors=True)
+    write_yaml_file(args.report, report)
+    logging.info(f"Pipeline storage benchmark report written to {args.report}")
@@ -3,56 +3,130 @@ from diabetes.exception import CustomException
 from diabetes.logger import logging
 import os 
 import sys
+import pandas as pd
 from pandas import DataFrame
 from diabetes.entity.config_entity import DataIngestionConfig
 from diabetes.entity.artifact_entity import DataIngestionArtifact
 from diabetes.data_access.diabetes_data import DiabetesData
+from diabetes.data_access.feature_store import FeatureStore
+from diabetes.data_access.storage import TableWriter, iter_table, read_table
+from bson import ObjectId
+from diabetes.utils.artifact_store import ArtifactStore
+from diabetes.utils.main_utils import read_yaml
+from diabetes.constant.Training_pipeline import SCHEMA_FILE_PATH
 from sklearn.model_selection import train_test_split
-
-# from diabetes.utils.main_utils import read_yaml_file  
-
-# from diabetes.constant.training_pipeline import SCHEMA_FILE_PATH
+from typing import List, Optional
 
 
 class DataIngestion:
-    def __init__(self,data_ingestion_config:DataIngestionConfig):
+    def __init__(self,data_ingestion_config:DataIngestionConfig,
+                 artifact_store:Optional[ArtifactStore]=None):
         try:
             self.data_ingestion_config=data_ingestion_config
+            self.artifact_store = artifact_store or ArtifactStore.disk_only()
+            self._schema_config = read_yaml(SCHEMA_FILE_PATH)
 
             
         except Exception as e:
             raise CustomException(e,sys)
         
 
-    def export_data_into_feature_store(self) -> DataFrame:
+    @property
+    def schema_columns(self) -> List[str]:
+        """Columns of a collection document, in feature store order (config/schema.yaml)"""
+        return self._schema_config["numerical_columns"] + self._schema_config["categorical_columns"]
+
+
+    def export_data_into_feature_store(self) -> str:
         """
-        Export mongo db collection record as data frame into feature
+        Export mongo db collection record into the feature store file, one chunk at
+        a time; returns the path of the file
         """
         try:
             logging.info("Exporting data from mongodb to feature store")
 
             diabetes_data = DiabetesData()
 
-            dataframe = diabetes_data.export_collection_as_dataframe(collection_name=self.data_ingestion_config.collection_name)
-            
             feature_store_file_path = self.data_ingestion_config.feature_store_file_path            
 
             #creating folder
 
             dir_path = os.path.dirname(feature_store_file_path)
             os.makedirs(dir_path,exist_ok=True)
-            
-            dataframe.to_csv(feature_store_file_path,index=False,header=True)
-            return dataframe
+
+            # Stream the collection and append each chunk to the feature store as it arrives
+            with TableWriter(feature_store_file_path, self._schema_config) as writer:
+                for chunk in diabetes_data.iter_collection_chunks(
+                        collection_name=self.data_ingestion_config.collection_name,
+                        chunk_size=self.data_ingestion_config.export_chunk_size,
+                        batch_size=self.data_ingestion_config.export_batch_size,
+                        columns=self.schema_columns):
+                    writer.write(chunk)
+
+            self.export_feature_store_csv(feature_store_file_path)
+            return feature_store_file_path
         
         except  Exception as e:
             raise  CustomException(e,sys)
+
+
+    def export_incremental_data_into_feature_store(self) -> str:
+        """
+        Pull only the documents inserted after the persisted watermark into a new
+        feature store partition, then stream all partitions into this run's feature
+        store file; returns the path of the file
+        """
+        try:
+            feature_store = FeatureStore(self.data_ingestion_config.feature_store_root,
+                                         storage_format=self.data_ingestion_config.storage_format,
+                                         schema_config=self._schema_config)
+            watermark = feature_store.read_watermark()
+            query = {"_id": {"$gt": ObjectId(watermark["last_id"])}} if watermark else {}
+            logging.info(f"Incremental export from mongodb, watermark: {watermark['last_id'] if watermark else None}")
+
+            diabetes_data = DiabetesData()
+            chunks = diabetes_data.iter_collection_chunks(
+                collection_name=self.data_ingestion_config.collection_name,
+                chunk_size=self.data_ingestion_config.export_chunk_size,
+                batch_size=self.data_ingestion_config.export_batch_size,
+                query=query,
+                columns=self.schema_columns,
+                sort=[("_id", 1)],
+                include_id=True)
+            feature_store.append_chunks(chunks)
+
+            feature_store_file_path = self.data_ingestion_config.feature_store_file_path
+            with TableWriter(feature_store_file_path, self._schema_config) as writer:
+                for chunk in feature_store.iter_chunks(self.data_ingestion_config.export_chunk_size):
+                    writer.write(chunk)
+
+            self.export_feature_store_csv(feature_store_file_path)
+            logging.info(f"Merged feature store view: {writer.rows} rows from {len(feature_store.partitions())} partitions")
+            return feature_store_file_path
+
+        except  Exception as e:
+            raise  CustomException(e,sys)
         
 
 
 
-    def split_data_as_train_test(self, dataframe: DataFrame) -> None:
+    def export_feature_store_csv(self, feature_store_file_path: str) -> None:
+        """
+        Optional CSV copy of the feature store for tools that want plain text
+        """
         try:
+            if self.data_ingestion_config.export_csv:
+                with TableWriter(self.data_ingestion_config.feature_store_csv_file_path) as writer:
+                    for chunk in iter_table(feature_store_file_path, self.data_ingestion_config.export_chunk_size):
+                        writer.write(chunk)
+                logging.info(f"Exported feature store as csv to {self.data_ingestion_config.feature_store_csv_file_path}")
+        except Exception as e:
+            raise CustomException(e,sys)
+
+
+    def split_data_as_train_test(self, feature_store_file_path: str) -> None:
+        try:
+            dataframe = read_table(feature_store_file_path)
             train_set, test_set = train_test_split(
                 dataframe, test_size=self.data_ingestion_config.train_test_split_ratio
             )
@@ -69,27 +143,34 @@ class DataIngestion:
 
             logging.info(f"Exporting train and test file path.")
 
-            train_set.to_csv(
-                self.data_ingestion_config.training_file_path, index=False, header=True
-            )
+            self.artifact_store.put_table(self.data_ingestion_config.training_file_path, train_set)
 
-            test_set.to_csv(
-                self.data_ingestion_config.testing_file_path, index=False, header=True
-            )
+            self.artifact_store.put_table(self.data_ingestion_config.testing_file_path, test_set)
 
             logging.info(f"Exported train and test file path.")
         except Exception as e:
             raise CustomException(e,sys)
      
 
-    def initiate_data_ingestion(self) -> DataIngestionArtifact:
+    def export_feature_store(self) -> str:
+        if self.data_ingestion_config.incremental:
+            return self.export_incremental_data_into_feature_store()
+        return self.export_data_into_feature_store()
+
+
+    def initiate_data_ingestion(self, feature_store_file_path: Optional[str] = None) -> DataIngestionArtifact:
+        """
+        feature_store_file_path: feature store file already exported by the caller
+        (e.g. to fingerprint it for the stage cache); exported here when not given
+        """
         try:
-            dataframe = self.export_data_into_feature_store()
+            if feature_store_file_path is None:
+                feature_store_file_path = self.export_feature_store()
             
             # dataframe=dataframe.drop(self._schema_config["drop_columns"],axis=1)
 
 
-            self.split_data_as_train_test(dataframe=dataframe)
+            self.split_data_as_train_test(feature_store_file_path=feature_store_file_path)
 
             data_ingestion_artifact = DataIngestionArtifact(trained_file_path=self.data_ingestion_config.training_file_path,
             test_file_path=self.data_ingestion_config.testing_file_path)
@@ -1,25 +1,35 @@
+import os
+import shutil
 import sys
 import numpy as np
 import pandas as pd
-from imblearn.combine import SMOTETomek
-from sklearn.preprocessing import LabelEncoder, StandardScaler
+from sklearn.preprocessing import StandardScaler
 from sklearn.pipeline import Pipeline
-from diabetes.constant.Training_pipeline import TARGET_COLUMN
+from diabetes.constant.Training_pipeline import (TARGET_COLUMN, SCHEMA_FILE_PATH, DATA_TRANSFORMATION_FEATURE_SHARD_PREFIX,
+                                                 DATA_TRANSFORMATION_LABEL_SHARD_PREFIX)
 from diabetes.entity.artifact_entity import DataTransformationArtifact, DataValidationArtifact
 from diabetes.entity.config_entity import DataTransformationConfig
 from diabetes.exception import CustomException
 from diabetes.logger import logging
 from diabetes.ml.model.estimator import TargetValueMapping
-from diabetes.utils.main_utils import save_numpy_array_data, save_object
+from diabetes.ml.model.encoder import CategoricalEncoder
+from diabetes.ml.model.rebalancing import NONE, WEIGHTING_STRATEGIES, Rebalancer, balanced_scale_pos_weight
+from diabetes.utils.main_utils import save_numpy_array_data, save_object, read_yaml
+from diabetes.data_access.storage import iter_table, read_table
+from diabetes.utils.artifact_store import ArtifactStore
+from typing import Dict, List, Optional, Tuple
 from collections import Counter
 
 class DataTransformation:
 
     def __init__(self, data_validation_artifact: DataValidationArtifact, 
-                 data_transformation_config: DataTransformationConfig):
+                 data_transformation_config: DataTransformationConfig,
+                 artifact_store: Optional[ArtifactStore] = None):
         try:
             self.data_validation_artifact = data_validation_artifact
             self.data_transformation_config = data_transformation_config
+            self.artifact_store = artifact_store or ArtifactStore.disk_only()
+            self._schema_config = read_yaml(SCHEMA_FILE_PATH)
             logging.info("DataTransformation initialized.")
         except Exception as e:
             raise CustomException(e, sys)
@@ -27,18 +37,20 @@ class DataTransformation:
     @staticmethod
     def read_data(file_path) -> pd.DataFrame:
         try:
-            df = pd.read_csv(file_path)
+            df = read_table(file_path)
             logging.info(f"Data read from {file_path} successfully.")
             return df
         except Exception as e:
             raise CustomException(e, sys)
         
     @classmethod
-    def get_data_transformer_object(cls) -> Pipeline:
+    def get_data_transformer_object(cls, categorical_columns=()) -> Pipeline:
         try:
+            encoder = CategoricalEncoder(columns=list(categorical_columns))
             scaler = StandardScaler()  
             preprocessor = Pipeline(
                 steps=[
+                    ("Encoder", encoder),
                     ("Scaler", scaler)
                 ]
             )
@@ -47,25 +59,106 @@ class DataTransformation:
         except Exception as e:
             raise CustomException(e, sys) from e
 
+    def categorical_columns(self) -> List[str]:
+        return [col for col in self._schema_config["categorical_columns"] if col != TARGET_COLUMN]
+
+    def write_encoded_shards(self, table_file_path: str, shard_dir: str, encoder: CategoricalEncoder,
+                             scaler: Optional[StandardScaler] = None) -> Tuple[List[str], Dict[int, int]]:
+        """
+        Encode table_file_path chunk by chunk into float32 feature and uint8 label .npy shards,
+        updating scaler with every chunk when given. Returns the feature shard paths in order
+        and the row count of every class.
+        """
+        try:
+            shutil.rmtree(shard_dir, ignore_errors=True)
+            os.makedirs(shard_dir, exist_ok=True)
+            target_mapping = TargetValueMapping().to_dict()
+            shard_paths, counts = [], np.zeros(len(target_mapping), dtype=np.int64)
+            for index, chunk in enumerate(iter_table(table_file_path, self.data_transformation_config.chunk_rows)):
+                features = encoder.transform(chunk.drop(columns=[TARGET_COLUMN]))
+                if scaler is not None:
+                    scaler.partial_fit(features)
+                labels = chunk[TARGET_COLUMN].astype(str).map(target_mapping)
+                if labels.isna().any():
+                    raise ValueError(f"Unknown target labels in {table_file_path}, expected {list(target_mapping)}")
+                counts += np.bincount(labels.to_numpy(dtype=np.int64), minlength=len(counts))
+                shard_path = os.path.join(shard_dir, f"{DATA_TRANSFORMATION_FEATURE_SHARD_PREFIX}{index:05d}.npy")
+                save_numpy_array_data(shard_path, np.ascontiguousarray(features, dtype=np.float32))
+                save_numpy_array_data(os.path.join(shard_dir, f"{DATA_TRANSFORMATION_LABEL_SHARD_PREFIX}{index:05d}.npy"),
+                                      labels.to_numpy(dtype=np.uint8))
+                shard_paths.append(shard_path)
+            return shard_paths, {label: int(count) for label, count in enumerate(counts)}
+        except Exception as e:
+            raise CustomException(e, sys) from e
+
+    def initiate_chunked_data_transformation(self) -> DataTransformationArtifact:
+        """
+        Out-of-core transformation. The validated tables are streamed chunk by chunk: one
+        pass learns the encoder categories, a second encodes every chunk into a shard while
+        the scaler is fitted with partial_fit, and the shards are then scaled in place
+        through a memory map, so this step (and training from the shards) holds one chunk
+        in memory. The stages around it do not: ingestion splits, and data validation and
+        model evaluation read, the whole tables. Resampling needs the whole matrix, so only
+        the "none" and "class_weight" rebalancing strategies apply here; the others fall
+        back to class weights.
+        """
+        try:
+            config = self.data_transformation_config
+            train_file_path = self.data_validation_artifact.valid_train_file_path
+            test_file_path = self.data_validation_artifact.valid_test_file_path
+            # the tables are streamed from disk, so in-flight writes of them must land first
+            self.artifact_store.wait(train_file_path)
+            self.artifact_store.wait(test_file_path)
+
+            preprocessor = self.get_data_transformer_object(self.categorical_columns())
+            encoder, scaler = preprocessor.named_steps["Encoder"], preprocessor.named_steps["Scaler"]
+            for chunk in iter_table(train_file_path, config.chunk_rows):
+                encoder.partial_fit(chunk.drop(columns=[TARGET_COLUMN]))
+
+            train_shards, train_counts = self.write_encoded_shards(train_file_path, config.transformed_train_shard_dir,
+                                                                   encoder, scaler=scaler)
+            test_shards, _ = self.write_encoded_shards(test_file_path, config.transformed_test_shard_dir, encoder)
+            for shard_path in train_shards + test_shards:
+                shard = np.load(shard_path, mmap_mode="r+")
+                shard -= scaler.mean_
+                shard /= scaler.scale_
+                shard.flush()
+                del shard
+            logging.info(f"Data transformed out of core into {len(train_shards)} train and "
+                         f"{len(test_shards)} test shards of up to {config.chunk_rows} rows "
+                         f"(training class counts {train_counts})")
+
+            strategy = config.rebalance_strategy
+            if strategy not in WEIGHTING_STRATEGIES:
+                logging.info(f"Rebalancing strategy '{strategy}' needs the whole matrix, using class weights out of core")
+            scale_pos_weight = balanced_scale_pos_weight(train_counts) if strategy != NONE else None
+
+            self.artifact_store.put_object(config.transformed_object_file_path, preprocessor)
+            data_transformation_artifact = DataTransformationArtifact(
+                transformed_object_file_path=config.transformed_object_file_path,
+                transformed_train_file_path=config.transformed_train_shard_dir,
+                transformed_test_file_path=config.transformed_test_shard_dir,
+                # feature and label shards share the directory
+                transformed_train_label_file_path=config.transformed_train_shard_dir,
+                transformed_test_label_file_path=config.transformed_test_shard_dir,
+                scale_pos_weight=scale_pos_weight,
+            )
+            logging.info(f"Data transformation artifact: {data_transformation_artifact}")
+            return data_transformation_artifact
+        except Exception as e:
+            raise CustomException(e, sys) from e
+
     def initiate_data_transformation(self) -> DataTransformationArtifact:
         try:
+            if self.data_transformation_config.out_of_core:
+                return self.initiate_chunked_data_transformation()
+
             # Reading data
-            train_df = DataTransformation.read_data(self.data_validation_artifact.valid_train_file_path)
-            test_df = DataTransformation.read_data(self.data_validation_artifact.valid_test_file_path)
-
-            preprocessor = self.get_data_transformer_object()
-
-            # Encoding categorical features
-            label_encoder = LabelEncoder()
-            binary_columns = [
-                'Gender', 'Polyuria', 'Polydipsia', 'sudden weight loss', 'weakness', 'Polyphagia',
-                'Genital thrush', 'visual blurring', 'Itching', 'Irritability',
-                'delayed healing', 'partial paresis', 'muscle stiffness', 'Alopecia', 'Obesity'
-            ]
-            for col in binary_columns:
-                train_df[col] = label_encoder.fit_transform(train_df[col])
-                test_df[col] = label_encoder.transform(test_df[col])
-                logging.info(f"Column '{col}' encoded.")
+            train_df = self.artifact_store.get_table(self.data_validation_artifact.valid_train_file_path)
+            test_df = self.artifact_store.get_table(self.data_validation_artifact.valid_test_file_path)
+
+            # The fitted encoder is the first preprocessor step, so it is saved and served with the model
+            preprocessor = self.get_data_transformer_object(self.categorical_columns())
 
             # Mapping target labels
             target_mapping = TargetValueMapping().to_dict()
@@ -73,42 +166,40 @@ class DataTransformation:
             test_df[TARGET_COLUMN] = test_df[TARGET_COLUMN].map(target_mapping)
             logging.info(f"Target column '{TARGET_COLUMN}' mapped.")
 
-            # Check class distribution before SMOTETomek
-            logging.info(f"Original training target class distribution: {Counter(train_df[TARGET_COLUMN])}")
-            logging.info(f"Original test target class distribution: {Counter(test_df[TARGET_COLUMN])}")
+            logging.info(f"Test target class distribution: {Counter(test_df[TARGET_COLUMN])}")
 
             # Preparing data for transformation
-            input_feature_train_df = train_df.drop(columns=[TARGET_COLUMN], axis=1)
+            input_feature_train_df = train_df.drop(columns=[TARGET_COLUMN])
             # print(input_feature_train_df)
             target_feature_train_df = train_df[TARGET_COLUMN]
-            input_feature_test_df = test_df.drop(columns=[TARGET_COLUMN], axis=1)
+            input_feature_test_df = test_df.drop(columns=[TARGET_COLUMN])
             target_feature_test_df = test_df[TARGET_COLUMN]
 
-            # Fit and transform the data
+            # Fit and transform the data (categorical encoding, then scaling)
             preprocessor_object = preprocessor.fit(input_feature_train_df)
             transformed_input_train_feature = preprocessor.transform(input_feature_train_df)
             transformed_input_test_feature = preprocessor.transform(input_feature_test_df)
             logging.info("Data scaling completed.")
 
-            # Applying SMOTETomek
-            smt = SMOTETomek(random_state=42, sampling_strategy='minority')
-            input_feature_train_final, target_feature_train_final = smt.fit_resample(
-                transformed_input_train_feature, target_feature_train_df
-            )
-            input_feature_test_final, target_feature_test_final = smt.fit_resample(
-                transformed_input_test_feature, target_feature_test_df
-            )
-
-            # Check class distribution after SMOTETomek
-            logging.info(f"Resampled training target class distribution: {Counter(target_feature_train_final)}")
-            logging.info(f"Resampled test target class distribution: {Counter(target_feature_test_final)}")
-
-            # Save numpy array data
-            train_arr = np.c_[input_feature_train_final, np.array(target_feature_train_final)]
-            test_arr = np.c_[input_feature_test_final, np.array(target_feature_test_final)]
-            save_numpy_array_data(self.data_transformation_config.transformed_train_file_path, array=train_arr)
-            save_numpy_array_data(self.data_transformation_config.transformed_test_file_path, array=test_arr)
-            save_object(self.data_transformation_config.transformed_object_file_path, preprocessor_object)
+            # Rebalancing the training split only; the test split keeps its real class distribution
+            config = self.data_transformation_config
+            rebalancer = Rebalancer(strategy=config.rebalance_strategy, k_neighbors=config.rebalance_k_neighbors,
+                                    algorithm=config.rebalance_nn_algorithm, n_jobs=config.rebalance_n_jobs)
+            rebalanced = rebalancer.fit_resample(transformed_input_train_feature,
+                                                 target_feature_train_df.to_numpy(dtype=np.uint8))
+            input_feature_train_final, target_feature_train_final = rebalanced.features, rebalanced.labels
+            input_feature_test_final, target_feature_test_final = transformed_input_test_feature, target_feature_test_df
+
+            # Save features and labels as separate typed, C-contiguous arrays the trainer can memory map
+            self.artifact_store.put_array(config.transformed_train_file_path,
+                                          np.ascontiguousarray(input_feature_train_final, dtype=np.float32))
+            self.artifact_store.put_array(config.transformed_train_label_file_path,
+                                          np.asarray(target_feature_train_final, dtype=np.uint8))
+            self.artifact_store.put_array(config.transformed_test_file_path,
+                                          np.ascontiguousarray(input_feature_test_final, dtype=np.float32))
+            self.artifact_store.put_array(config.transformed_test_label_file_path,
+                                          np.asarray(target_feature_test_final, dtype=np.uint8))
+            self.artifact_store.put_object(self.data_transformation_config.transformed_object_file_path, preprocessor_object)
             logging.info("Data transformation artifacts saved.")
 
             # Preparing artifact
@@ -116,6 +207,9 @@ class DataTransformation:
                 transformed_object_file_path=self.data_transformation_config.transformed_object_file_path,
                 transformed_train_file_path=self.data_transformation_config.transformed_train_file_path,
                 transformed_test_file_path=self.data_transformation_config.transformed_test_file_path,
+                transformed_train_label_file_path=config.transformed_train_label_file_path,
+                transformed_test_label_file_path=config.transformed_test_label_file_path,
+                scale_pos_weight=rebalanced.scale_pos_weight,
             )
 
             logging.info(f"Data transformation artifact: {data_transformation_artifact}")
@@ -1,14 +1,16 @@
-from distutils import dir_util
+from diabetes.constant.Training_pipeline import SCHEMA_FILE_PATH, DRIFT_BASELINE_SKETCH_FILE_NAME
 
-from diabetes.constant.Training_pipeline import SCHEMA_FILE_PATH
-
-from diabetes.entity.artifact_entity import DataIngestionArtifact, DataValidationArtifact
+from diabetes.entity.artifact_entity import DataIngestionArtifact, DataValidationArtifact, DataDriftArtifact
 
 from diabetes.entity.config_entity import DataValidationConfig
 from diabetes.exception import CustomException
 from diabetes.logger import logging
 from diabetes.utils.main_utils import read_yaml, write_yaml_file
-from scipy.stats import ks_2samp
+from diabetes.data_access.storage import concat_tables, read_table
+from diabetes.utils.artifact_store import ArtifactStore
+from diabetes.ml.metrics.drift_metric import BaselineSketch, drift_report
+from diabetes.ml.model.estimator import ModelResolver
+from typing import Optional
 import pandas as pd
 import os,sys
 
@@ -16,10 +18,12 @@ import os,sys
 class DataValidation:
 
     def __init__(self, data_validation_config: DataValidationConfig,
-                  data_ingestion_artifact: DataIngestionArtifact):
+                  data_ingestion_artifact: DataIngestionArtifact,
+                  artifact_store: Optional[ArtifactStore] = None):
         try:
             self.data_validation_config  = data_validation_config
             self.data_ingestion_artifact = data_ingestion_artifact
+            self.artifact_store = artifact_store or ArtifactStore.disk_only()
             self._schemma_config = read_yaml(SCHEMA_FILE_PATH)
 
         except Exception as e:
@@ -91,32 +95,44 @@ class DataValidation:
     @staticmethod
     def read_data(file_path)->pd.DataFrame:
         try:
-            return pd.read_csv(file_path)
+            return read_table(file_path)
         
         except Exception as e:
             raise CustomException(e,sys)
         
     
-    def detect_dataset_drift(self,base_df,current_df,threshold=0.05)->bool:
+    def build_baseline_sketch(self, dataframe: pd.DataFrame) -> BaselineSketch:
+        """
+        Category counts and histograms of dataframe; schema columns missing from it are skipped
+        """
         try:
-            status=True
-            report ={}
-            for column in base_df.columns:
-                d1 = base_df[column]
-                d2  = current_df[column]
-                is_same_dist = ks_2samp(d1,d2)
-                if threshold<=is_same_dist.pvalue:
-                    is_found=False
-                else:
-                    is_found = True 
-                    status=False
-                report.update({column:{
-                    "p_value":float(is_same_dist.pvalue),
-                    "drift_status":is_found
-                    
-                    }})
+            categorical_columns = [col for col in self._schemma_config.get("categorical_columns", [])
+                                   if col in dataframe.columns]
+            numerical_columns = [col for col in self._schemma_config.get("numerical_columns", [])
+                                 if col in dataframe.columns]
+            return BaselineSketch.from_dataframe(dataframe, categorical_columns, numerical_columns,
+                                                 max_bins=self.data_validation_config.drift_sketch_bins)
+        except Exception as e:
+            raise CustomException(e,sys)
+
+
+    def detect_dataset_drift(self,base_df,current_df,threshold=None,baseline:Optional[BaselineSketch]=None,
+                             drift_report_file_path:Optional[str]=None)->bool:
+        """
+        Chi-square on the categorical columns and KS/Wasserstein on the numerical ones,
+        computed from bucket counts of current_df against the sketch of base_df
+        (or a stored baseline sketch, in which case base_df is not read)
+        """
+        try:
+            if threshold is None:
+                threshold = self.data_validation_config.drift_threshold
+            if baseline is None:
+                baseline = self.build_baseline_sketch(base_df)
+
+            report = drift_report(baseline, baseline.bucket_counts(current_df), threshold=threshold)
+            status = not any(column_report["drift_status"] for column_report in report.values())
             
-            drift_report_file_path = self.data_validation_config.drift_report_file_path
+            drift_report_file_path = drift_report_file_path or self.data_validation_config.drift_report_file_path
             
             #Create directory
             dir_path = os.path.dirname(drift_report_file_path)
@@ -125,18 +141,26 @@ class DataValidation:
             return status
         except Exception as e:
             raise CustomException(e,sys)
+
+
+    @staticmethod
+    def serving_baseline_sketch_path() -> Optional[str]:
+        """Baseline sketch pushed with the model currently being served, if it has one"""
+        model_resolver = ModelResolver()
+        if not model_resolver.is_model_exists():
+            return None
+        sketch_path = os.path.join(os.path.dirname(model_resolver.get_best_model_path()),
+                                   DRIFT_BASELINE_SKETCH_FILE_NAME)
+        return sketch_path if os.path.exists(sketch_path) else None
         
 
     
-    def initiate_data_validation(self)->DataValidationArtifact:
+    def validate_columns(self, train_dataframe: pd.DataFrame, test_dataframe: pd.DataFrame) -> None:
+        """
+        Schema checks on both splits; raises with every problem found
+        """
         try:
             error_message = ""
-            train_file_path = self.data_ingestion_artifact.trained_file_path
-            test_file_path = self.data_ingestion_artifact.test_file_path
-
-            #Reading data from train and test file location
-            train_dataframe = DataValidation.read_data(train_file_path)
-            test_dataframe = DataValidation.read_data(test_file_path)
 
             #Validate number of columns
             status = self.validate_number_of_columns(dataframe=train_dataframe)
@@ -172,9 +196,68 @@ class DataValidation:
             
             if len(error_message)>0:
                 raise Exception(error_message)   
+        except Exception as e:
+            raise CustomException(e,sys)
+
+
+    def initiate_drift_detection(self) -> DataDriftArtifact:
+        """
+        Drift report between the train and test splits. Independent of the schema
+        checks, so the pipeline runs it concurrently with them. The train split's
+        sketch is saved for the pusher, and when the served model has a sketch the
+        whole ingested data is also checked against it.
+        """
+        try:
+            train_dataframe = self.artifact_store.get_table(self.data_ingestion_artifact.trained_file_path)
+            test_dataframe = self.artifact_store.get_table(self.data_ingestion_artifact.test_file_path)
+
+            baseline = self.build_baseline_sketch(train_dataframe)
+            baseline.save(self.data_validation_config.baseline_sketch_file_path)
+
+            status = self.detect_dataset_drift(base_df=train_dataframe,current_df=test_dataframe,baseline=baseline)
+
+            serving_drift_detected, serving_drift_report_file_path = None, None
+            serving_sketch_path = self.serving_baseline_sketch_path()
+            if serving_sketch_path is not None:
+                serving_drift_report_file_path = self.data_validation_config.serving_drift_report_file_path
+                serving_status = self.detect_dataset_drift(
+                    base_df=None, current_df=concat_tables([train_dataframe, test_dataframe]),
+                    baseline=BaselineSketch.load(serving_sketch_path),
+                    drift_report_file_path=serving_drift_report_file_path)
+                serving_drift_detected = not serving_status
+
+            data_drift_artifact = DataDriftArtifact(
+                drift_detected=not status,
+                drift_report_file_path=self.data_validation_config.drift_report_file_path,
+                baseline_sketch_file_path=self.data_validation_config.baseline_sketch_file_path,
+                serving_drift_detected=serving_drift_detected,
+                serving_drift_report_file_path=serving_drift_report_file_path,
+            )
+            logging.info(f"Data drift artifact: {data_drift_artifact}")
+            return data_drift_artifact
+        except Exception as e:
+            raise CustomException(e,sys)
+
+
+    def initiate_data_validation(self, detect_drift: bool = True)->DataValidationArtifact:
+        """
+        detect_drift=False only runs the schema checks (validation_status is then
+        True); the drift report comes from initiate_drift_detection instead
+        """
+        try:
+            train_file_path = self.data_ingestion_artifact.trained_file_path
+            test_file_path = self.data_ingestion_artifact.test_file_path
+
+            #Reading data from train and test file location
+            train_dataframe = self.artifact_store.get_table(train_file_path)
+            test_dataframe = self.artifact_store.get_table(test_file_path)
+
+            self.validate_columns(train_dataframe, test_dataframe)
             
             #Let check data drift
-            status = self.detect_dataset_drift(base_df=train_dataframe,current_df=test_dataframe)
+            status = True
+            if detect_drift:
+                status = self.detect_dataset_drift(base_df=train_dataframe,current_df=test_dataframe)
 
             data_validation_artifact = DataValidationArtifact(
                 validation_status=status,
@@ -192,8 +275,3 @@ class DataValidation:
             return data_validation_artifact
         except Exception as e:
             raise CustomException(e,sys)
-        
-
-
-
-
@@ -1,45 +1,154 @@
 from diabetes.exception import CustomException
 from diabetes.logger import logging
 from diabetes.entity.artifact_entity import DataValidationArtifact, ModelTrainerArtifact, ModelEvaluationArtifact
-from diabetes.entity.config_entity import ModelEvaluationConfig, ModelTrainerConfig
+from diabetes.entity.config_entity import ModelEvaluationConfig
 from diabetes.ml.metrics.classification_metric import get_classification_score
-from diabetes.ml.model.estimator import diabetesModel, ModelResolver, TargetValueMapping
-from diabetes.utils.main_utils import save_object, load_object, write_yaml_file
-from diabetes.constant.Training_pipeline import TARGET_COLUMN
+from diabetes.ml.model.estimator import ModelResolver, TargetValueMapping
+from diabetes.utils.main_utils import load_object, write_yaml_file, read_yaml
+from diabetes.data_access.storage import concat_tables
+from diabetes.utils.artifact_store import ArtifactStore
+from diabetes.ml.model.search import measure_latency
+from diabetes.ml.model.evaluation_cache import BestModelPredictionCache
+from diabetes.constant.Training_pipeline import TARGET_COLUMN, SCHEMA_FILE_PATH
+from diabetes.ml.model.encoder import CategoricalEncoder, find_encoder
+from diabetes.ml.model.inference import InferencePipeline, load_feature_fields
+from typing import Dict, List, Optional
+import numpy as np
 import pandas as pd
 import os
 import sys
+import time
 
 class ModelEvaluation:
 
     def __init__(self, model_eval_config: ModelEvaluationConfig,
                     data_validation_artifact: DataValidationArtifact,
-                    model_trainer_artifact: ModelTrainerArtifact):
+                    model_trainer_artifact: ModelTrainerArtifact,
+                    artifact_store: Optional[ArtifactStore] = None):
         try:
             self.model_eval_config = model_eval_config
             self.data_validation_artifact = data_validation_artifact
             self.model_trainer_artifact = model_trainer_artifact
+            self.artifact_store = artifact_store or ArtifactStore.disk_only()
+            self._schema_config = read_yaml(SCHEMA_FILE_PATH)
         except Exception as e:
             raise CustomException(e, sys)
 
+    def legacy_codes(self, df: pd.DataFrame) -> np.ndarray:
+        """
+        Feature matrix of a model saved without its CategoricalEncoder (the preprocessor is only a
+        scaler): categorical columns as the code of their label in the schema's serving_fields
+        """
+        labels = {field.column: field.labels for field in load_feature_fields(self._schema_config) if field.labels}
+        features = np.empty(df.shape, dtype=np.float64)
+        for i, column in enumerate(df.columns):
+            if column in labels:
+                codes = pd.Index(labels[column]).get_indexer(df[column].astype(str))
+                if (codes < 0).any():
+                    raise ValueError(f"Column '{column}' has labels outside {list(labels[column])}")
+                features[:, i] = codes
+            else:
+                features[:, i] = df[column].to_numpy(dtype=np.float64)
+        return features
+
+    @staticmethod
+    def model_encoder(model) -> Optional[CategoricalEncoder]:
+        """The fitted CategoricalEncoder saved with the model, if it has one"""
+        if isinstance(model, InferencePipeline):
+            return model.encoder
+        return find_encoder(getattr(model, "preprocessor", None))
+
+    def model_input(self, model, df: pd.DataFrame):
+        """
+        The raw feature frame for models saved with their encoder, so it is encoded with the
+        categories fitted in training; the schema's label codes for older scaler-only models
+        """
+        return df if self.model_encoder(model) is not None else self.legacy_codes(df)
+
+    def predict_rows(self, model, df: pd.DataFrame) -> np.ndarray:
+        return model.predict(self.model_input(model, df))
+
+    def model_matrix(self, model, df: pd.DataFrame) -> np.ndarray:
+        """The model input as a float matrix in encoder codes, for latency benchmarks"""
+        encoder = self.model_encoder(model)
+        return encoder.transform(df) if encoder is not None else self.legacy_codes(df)
+
+    def benchmark_models(self, model_file_paths: Dict[str, str], df: pd.DataFrame) -> Dict[str, dict]:
+        """
+        Serialized size, load time (best of 3) and predict_proba latency of saved models, by name.
+        Latency is timed in `latency_rounds` rounds that alternate between the models, so machine
+        noise hits them alike; p50 is the best of the rounds' medians and p99 the median of the
+        rounds' p99, which is reported but, taken over a few dozen timings, too noisy to gate on
+        """
+        try:
+            config = self.model_eval_config
+            models, benchmarks = {}, {}
+            for name, model_file_path in model_file_paths.items():
+                # the trained model may still be being written by the artifact store
+                self.artifact_store.wait(model_file_path)
+                load_seconds = []
+                for _ in range(3):
+                    start = time.perf_counter()
+                    models[name] = load_object(file_path=model_file_path)
+                    load_seconds.append(time.perf_counter() - start)
+                benchmarks[name] = {"serialized_bytes": os.path.getsize(model_file_path),
+                                    "load_seconds": min(load_seconds)}
+
+            inputs = {name: self.model_matrix(model, df) for name, model in models.items()}
+            rounds = {name: [] for name in models}
+            for _ in range(config.latency_rounds):
+                for name, model in models.items():
+                    rounds[name].append(measure_latency(model, inputs[name], batch_sizes=config.latency_batch_sizes,
+                                                        repeats=config.latency_repeats))
+            for name, latencies in rounds.items():
+                for batch_size in config.latency_batch_sizes:
+                    p50, p99 = f"p50_ms_batch_{batch_size}", f"p99_ms_batch_{batch_size}"
+                    benchmarks[name][p50] = min(latency[p50] for latency in latencies)
+                    benchmarks[name][p99] = float(np.median([latency[p99] for latency in latencies]))
+                logging.info(f"Benchmark of {model_file_paths[name]}: {benchmarks[name]}")
+            return benchmarks
+        except Exception as e:
+            raise CustomException(e, sys)
+
+    def check_budgets(self, trained: dict, best: dict) -> List[str]:
+        """
+        Regression budgets of the trained model against the best model; returns the violations.
+        Latency is gated on p50 only, p99 stays in the report
+        """
+        config = self.model_eval_config
+        violations = []
+        for batch_size in config.latency_batch_sizes:
+            name = f"p50_ms_batch_{batch_size}"
+            budget = best[name] * config.latency_budget_ratio + config.latency_budget_slack_ms
+            if trained[name] > budget:
+                violations.append(f"{name} {trained[name]:.3f} > budget {budget:.3f}")
+        size_budget = best["serialized_bytes"] * config.size_budget_ratio
+        if trained["serialized_bytes"] > size_budget:
+            violations.append(f"serialized_bytes {trained['serialized_bytes']} > budget {size_budget:.0f}")
+        load_budget = best["load_seconds"] * config.load_time_budget_ratio + config.load_time_budget_slack_seconds
+        if trained["load_seconds"] > load_budget:
+            violations.append(f"load_seconds {trained['load_seconds']:.4f} > budget {load_budget:.4f}")
+        return violations
+
     def initiate_model_evaluation(self) -> ModelEvaluationArtifact:
         try:
             valid_train_file_path = self.data_validation_artifact.valid_train_file_path
             valid_test_file_path = self.data_validation_artifact.valid_test_file_path
 
             # Load train and test dataframes
-            train_df = pd.read_csv(valid_train_file_path)
-            test_df = pd.read_csv(valid_test_file_path)
+            train_df = self.artifact_store.get_table(valid_train_file_path)
+            test_df = self.artifact_store.get_table(valid_test_file_path)
 
             # Concatenate train and test dataframes
-            df = pd.concat([train_df, test_df])
+            df = concat_tables([train_df, test_df])
 
             # Transform target labels
             y_true = df[TARGET_COLUMN]
             target_mapping = TargetValueMapping().to_dict()
-            y_true = y_true.map(target_mapping)
+            y_true = y_true.map(target_mapping).astype(int)
 
             # Drop target column from dataframe
+            # every model encodes the raw features itself, with the encoder saved alongside it
             df.drop(TARGET_COLUMN, axis=1, inplace=True)
 
             # Load models
@@ -49,6 +158,7 @@ class ModelEvaluation:
             is_model_accepted = True
 
             if not model_resolver.is_model_exists():
+                trained_benchmark = self.benchmark_models({"trained": train_model_file_path}, df)["trained"]
                 # No model exists, so we use the trained model as the latest model
                 model_evaluation_artifact = ModelEvaluationArtifact(
                     is_model_accepted=is_model_accepted,
@@ -56,19 +166,22 @@ class ModelEvaluation:
                     best_model_path=None,
                     trained_model_path=train_model_file_path,
                     train_model_metric_artifact=self.model_trainer_artifact.test_metric_artifact,
-                    best_model_metric_artifact=None
+                    best_model_metric_artifact=None,
+                    benchmark={"trained": trained_benchmark},
                 )
 
+                write_yaml_file(self.model_eval_config.report_file_path, model_evaluation_artifact.__dict__)
                 logging.info(f"Model evaluation artifact: {model_evaluation_artifact}")
                 return model_evaluation_artifact
 
             latest_model_path = model_resolver.get_best_model_path()
-            latest_model = load_object(file_path=latest_model_path)
-            train_model = load_object(file_path=train_model_file_path)
+            train_model = self.artifact_store.get_object(train_model_file_path)
 
-            # Predict using both models
-            y_trained_pred = train_model.predict(df)
-            y_latest_pred = latest_model.predict(df)
+            # Predict using both models; the best model only scores rows it has not seen before
+            y_trained_pred = self.predict_rows(train_model, df)
+            prediction_cache = BestModelPredictionCache(self.model_eval_config.prediction_cache_dir)
+            y_latest_pred = prediction_cache.predict(
+                latest_model_path, df, lambda rows: self.predict_rows(load_object(file_path=latest_model_path), rows))
 
             # Evaluate metrics
             trained_metric = get_classification_score(y_true, y_trained_pred)
@@ -82,13 +195,35 @@ class ModelEvaluation:
             else:
                 is_model_accepted = False
 
+            # A better F1 does not ship a model that blows the latency/size/load budgets
+            # both models are timed in the same interleaved rounds
+            benchmarks = self.benchmark_models({"trained": train_model_file_path, "best": latest_model_path}, df)
+            trained_benchmark, best_benchmark = benchmarks["trained"], benchmarks["best"]
+            budget_violations = self.check_budgets(trained_benchmark, best_benchmark)
+            if budget_violations:
+                logging.info(f"Trained model exceeds regression budgets: {budget_violations}")
+                is_model_accepted = False
+
             model_evaluation_artifact = ModelEvaluationArtifact(
                 is_model_accepted=is_model_accepted,
                 improved_accuracy=improved_accuracy,
                 best_model_path=latest_model_path,
                 trained_model_path=train_model_file_path,
                 train_model_metric_artifact=trained_metric,
-                best_model_metric_artifact=latest_metric
+                best_model_metric_artifact=latest_metric,
+                benchmark={
+                    "trained": trained_benchmark,
+                    "best": best_benchmark,
+                    "budgets": {
+                        "latency_percentile": "p50",
+                        "latency_ratio": self.model_eval_config.latency_budget_ratio,
+                        "latency_slack_ms": self.model_eval_config.latency_budget_slack_ms,
+                        "size_ratio": self.model_eval_config.size_budget_ratio,
+                        "load_time_ratio": self.model_eval_config.load_time_budget_ratio,
+                        "load_time_slack_seconds": self.model_eval_config.load_time_budget_slack_seconds,
+                    },
+                    "violations": budget_violations,
+                },
             )
 
             model_eval_report = model_evaluation_artifact.__dict__
@@ -1,9 +1,12 @@
 from diabetes.exception import CustomException
 from diabetes.logger import logging
-from diabetes.entity.artifact_entity import ModelPusherArtifact
+from diabetes.entity.artifact_entity import ModelPusherArtifact, PredictionTableArtifact, DataDriftArtifact
 from diabetes.entity.config_entity import ModelPusherConfig
 
 from diabetes.entity.artifact_entity import ModelEvaluationArtifact
+from diabetes.constant.Training_pipeline import (NATIVE_MANIFEST_FILE_NAME, NATIVE_MODEL_FILE_NAME,
+                                                 NATIVE_SCALER_FILE_NAME, DRIFT_BASELINE_SKETCH_FILE_NAME)
+from typing import Optional
 import os, sys
 import shutil
 
@@ -11,27 +14,58 @@ class ModelPusher:
 
     def __init__(self,
                  model_pusher_config: ModelPusherConfig,
-                 model_eval_artifact: ModelEvaluationArtifact):
+                 model_eval_artifact: ModelEvaluationArtifact,
+                 prediction_table_artifact: Optional[PredictionTableArtifact] = None,
+                 data_drift_artifact: Optional[DataDriftArtifact] = None):
 
         try:
             self.model_pusher_config = model_pusher_config
             self.model_eval_artifact = model_eval_artifact
+            self.prediction_table_artifact = prediction_table_artifact
+            self.data_drift_artifact = data_drift_artifact
         except Exception as e:
             raise CustomException(e, sys)
 
+    def copy_model_files(self, model_file_path: str) -> None:
+        """Copy the trained model, its native artifact, prediction table and drift baseline next to model_file_path."""
+        trained_model_path = self.model_eval_artifact.trained_model_path
+        trained_model_dir = os.path.dirname(trained_model_path)
+        dst_dir = os.path.dirname(model_file_path)
+        os.makedirs(dst_dir, exist_ok=True)
+
+        shutil.copy(src=trained_model_path, dst=model_file_path)
+
+        if os.path.exists(os.path.join(trained_model_dir, NATIVE_MANIFEST_FILE_NAME)):
+            for file_name in (NATIVE_MODEL_FILE_NAME, NATIVE_SCALER_FILE_NAME, NATIVE_MANIFEST_FILE_NAME):
+                shutil.copy(src=os.path.join(trained_model_dir, file_name), dst=os.path.join(dst_dir, file_name))
+
+        if self.prediction_table_artifact is not None:
+            for file_path in (self.prediction_table_artifact.table_file_path,
+                              self.prediction_table_artifact.meta_file_path):
+                shutil.copy(src=file_path, dst=os.path.join(dst_dir, os.path.basename(file_path)))
+
+        if self.data_drift_artifact is not None and self.data_drift_artifact.baseline_sketch_file_path:
+            shutil.copy(src=self.data_drift_artifact.baseline_sketch_file_path,
+                        dst=os.path.join(dst_dir, DRIFT_BASELINE_SKETCH_FILE_NAME))
+
     def initiate_model_pusher(self) -> ModelPusherArtifact:
         try:
-            trained_model_path = self.model_eval_artifact.trained_model_path
-            
             # Creating model pusher dir to save model
             model_file_path = self.model_pusher_config.model_file_path
-            os.makedirs(os.path.dirname(model_file_path), exist_ok=True)
-            shutil.copy(src=trained_model_path, dst=model_file_path)
+            self.copy_model_files(model_file_path)
 
-            # Saved model dir
+            # Saved model dir: stage the version in a hidden directory and rename it into
+            # place, so a serving process watching saved_models never sees a partial version
             saved_model_path = self.model_pusher_config.saved_model_path
-            os.makedirs(os.path.dirname(saved_model_path), exist_ok=True)
-            shutil.copy(src=trained_model_path, dst=saved_model_path)
+            version_dir = os.path.dirname(saved_model_path)
+            staging_dir = os.path.join(os.path.dirname(version_dir), f".{os.path.basename(version_dir)}.tmp")
+            shutil.rmtree(staging_dir, ignore_errors=True)
+            try:
+                self.copy_model_files(os.path.join(staging_dir, os.path.basename(saved_model_path)))
+                os.replace(staging_dir, version_dir)
+            except Exception:
+                shutil.rmtree(staging_dir, ignore_errors=True)
+                raise
 
             # Prepare artifact
             model_pusher_artifact = ModelPusherArtifact(saved_model_path=saved_model_path, model_file_path=model_file_path)
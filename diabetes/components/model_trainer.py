@@ -1,5 +1,5 @@
 
-from diabetes.utils.main_utils import load_numpy_array_data
+from diabetes.utils.main_utils import list_numpy_array_shards
 from diabetes.exception import CustomException
 from diabetes.logger import logging
 from diabetes.entity.artifact_entity import DataTransformationArtifact,ModelTrainerArtifact
@@ -9,68 +9,107 @@ import numpy as np
 from xgboost import XGBClassifier
 from sklearn.ensemble import RandomForestClassifier
 from diabetes.ml.metrics.classification_metric import get_classification_score
-from diabetes.ml.model.estimator import diabetesModel
-from diabetes.utils.main_utils import save_object,load_object
+from diabetes.ml.model.inference import InferencePipeline, load_feature_fields
+from diabetes.ml.model.artifact import NATIVE_MODEL_TYPES, save_native_model
+from diabetes.constant.Training_pipeline import (SCHEMA_FILE_PATH, DATA_TRANSFORMATION_FEATURE_SHARD_PREFIX,
+                                                 DATA_TRANSFORMATION_LABEL_SHARD_PREFIX)
+from diabetes.ml.model.search import CandidateSearch
+from diabetes.ml.model.external_memory import fit_external_memory, score_shards
+from diabetes.ml.model.rebalancing import class_weight_params
+from diabetes.utils.main_utils import save_object,load_object,read_yaml,write_yaml_file
+from diabetes.utils.artifact_store import ArtifactStore
+from typing import Optional
 
 
 class ModelTrainer:
     def __init__(self,model_trainer_config:ModelTrainerConfig,
-        data_transformation_artifact:DataTransformationArtifact):
+        data_transformation_artifact:DataTransformationArtifact,
+        artifact_store:Optional[ArtifactStore]=None):
 
         try:
             self.model_trainer_config=model_trainer_config
             self.data_transformation_artifact=data_transformation_artifact
+            self.artifact_store = artifact_store or ArtifactStore.disk_only()
+            self._schema_config = read_yaml(SCHEMA_FILE_PATH)
 
             
         except Exception as e:
             raise CustomException(e,sys)
 
-    # def perform_hyper_paramter_tunig(self):...
+    def perform_hyper_paramter_tunig(self,x_train,y_train,model_config:dict):
+        """
+        Successive halving search over the model families in config/model.yaml;
+        writes the leaderboard and returns the winning model
+        """
+        try:
+            model, leaderboard = CandidateSearch(
+                model_config, scale_pos_weight=self.data_transformation_artifact.scale_pos_weight).fit(x_train, y_train)
+            write_yaml_file(self.model_trainer_config.leaderboard_file_path, leaderboard)
+            logging.info(f"Candidate search winner: {leaderboard['finalists'][0]}")
+            return model
+        except Exception as e:
+            raise CustomException(e,sys)
     
 
     def train_model(self,x_train,y_train):
         try:
-<<<<<<< HEAD
-            rf = XGBClassifier()
-=======
-            rf = RandomForestClassifier()
->>>>>>> ed7611ae3604b226d42bb1657982103d8034da7c
+            model_config = read_yaml(self.model_trainer_config.model_config_file_path) \
+                if os.path.exists(self.model_trainer_config.model_config_file_path) else {}
+            if model_config.get("search", {}).get("enabled", False):
+                return self.perform_hyper_paramter_tunig(x_train, y_train, model_config)
+
+            rf = XGBClassifier(**class_weight_params(XGBClassifier, self.data_transformation_artifact.scale_pos_weight))
             rf.fit(x_train,y_train)
             return rf
         except Exception as e:
             raise e
     
+    def train_model_external_memory(self, feature_paths, label_paths):
+        """Out-of-core training: XGBoost reads the transformed shards through its external memory iterator"""
+        try:
+            model_config = read_yaml(self.model_trainer_config.model_config_file_path) \
+                if os.path.exists(self.model_trainer_config.model_config_file_path) else {}
+            if model_config.get("search", {}).get("enabled", False):
+                logging.info("Candidate search needs the training data in memory, training the default XGBClassifier")
+            model = XGBClassifier(**class_weight_params(XGBClassifier, self.data_transformation_artifact.scale_pos_weight))
+            return fit_external_memory(model, feature_paths, label_paths,
+                                       self.model_trainer_config.external_memory_cache_dir)
+        except Exception as e:
+            raise CustomException(e, sys)
+
     def initiate_model_trainer(self)->ModelTrainerArtifact:
         try:
             train_file_path = self.data_transformation_artifact.transformed_train_file_path
             test_file_path = self.data_transformation_artifact.transformed_test_file_path
 
-            #loading training array and testing array
-            train_arr = load_numpy_array_data(train_file_path)
-            test_arr = load_numpy_array_data(test_file_path)
+            if os.path.isdir(train_file_path):
+                # out-of-core DataTransformation wrote the arrays as feature and label shards
+                train_shards, test_shards = [
+                    (list_numpy_array_shards(shard_dir, DATA_TRANSFORMATION_FEATURE_SHARD_PREFIX),
+                     list_numpy_array_shards(shard_dir, DATA_TRANSFORMATION_LABEL_SHARD_PREFIX))
+                    for shard_dir in (train_file_path, test_file_path)]
+                model = self.train_model_external_memory(*train_shards)
+                # scored shard by shard from confusion counts, without the full label arrays
+                classification_train_metric = score_shards(model, *train_shards)
+                classification_test_metric = score_shards(model, *test_shards)
+            else:
+                #loading training and testing arrays: memory-mapped float32 features and uint8 labels
+                x_train = self.artifact_store.get_array(train_file_path)
+                y_train = self.artifact_store.get_array(self.data_transformation_artifact.transformed_train_label_file_path)
+                x_test = self.artifact_store.get_array(test_file_path)
+                y_test = self.artifact_store.get_array(self.data_transformation_artifact.transformed_test_label_file_path)
 
-            x_train, y_train, x_test, y_test = (
-                train_arr[:, :-1],
-                train_arr[:, -1],
-                test_arr[:, :-1],
-                test_arr[:, -1],
-            )
+                model = self.train_model(x_train, y_train)
 
-            model = self.train_model(x_train, y_train)
+                y_train_pred = model.predict(x_train)
+                y_test_pred = model.predict(x_test)
 
-            y_train_pred = model.predict(x_train)
+                classification_train_metric =  get_classification_score(y_true=y_train, y_pred=y_train_pred)
+                classification_test_metric = get_classification_score(y_true=y_test, y_pred=y_test_pred)
 
 
-            classification_train_metric =  get_classification_score(y_true=y_train, y_pred=y_train_pred)
-            
             if classification_train_metric.f1_score<=self.model_trainer_config.expected_accuracy:
                 raise Exception("Trained model is not good to provide expected accuracy")
-            
-            y_test_pred = model.predict(x_test)
-
-
-
-            classification_test_metric = get_classification_score(y_true=y_test, y_pred=y_test_pred)
 
 
             #Overfitting and Underfitting
@@ -79,19 +118,28 @@ class ModelTrainer:
             if diff>self.model_trainer_config.overfitting_underfitting_threshold:
                 raise Exception("Model is not good try to do more experimentation.")
 
-            preprocessor = load_object(file_path=self.data_transformation_artifact.transformed_object_file_path)
+            preprocessor = self.artifact_store.get_object(self.data_transformation_artifact.transformed_object_file_path)
             
             model_dir_path = os.path.dirname(self.model_trainer_config.trained_model_file_path)
             os.makedirs(model_dir_path,exist_ok=True)
-            diabetes_model = diabetesModel(preprocessor=preprocessor,model=model)
-            save_object(self.model_trainer_config.trained_model_file_path, obj=diabetes_model)
+            # Request fields, encoder, scaler and classifier are saved as one inference pipeline,
+            # which the server loads as is
+            diabetes_model = InferencePipeline.from_training(preprocessor, model,
+                                                             fields=load_feature_fields(self._schema_config))
+            self.artifact_store.put_object(self.model_trainer_config.trained_model_file_path, diabetes_model)
+
+            # Pickle free copy of the model for fast loading in the server
+            if isinstance(model, NATIVE_MODEL_TYPES):
+                save_native_model(model_dir_path, diabetes_model)
             
 
             #model trainer artifact
 
+            leaderboard_file_path = self.model_trainer_config.leaderboard_file_path
             model_trainer_artifact = ModelTrainerArtifact(trained_model_file_path=self.model_trainer_config.trained_model_file_path, 
             train_metric_artifact=classification_train_metric,
-            test_metric_artifact=classification_test_metric)
+            test_metric_artifact=classification_test_metric,
+            leaderboard_file_path=leaderboard_file_path if os.path.exists(leaderboard_file_path) else None)
             logging.info(f"Model trainer artifact: {model_trainer_artifact}")
             return model_trainer_artifact
         except Exception as e:
@@ -0,0 +1,56 @@
+from diabetes.exception import CustomException
+from diabetes.logger import logging
+from diabetes.entity.artifact_entity import ModelEvaluationArtifact, PredictionTableArtifact
+from diabetes.entity.config_entity import PredictionTableConfig
+from diabetes.ml.model.prediction_table import PredictionTable
+from diabetes.utils.main_utils import load_object, write_yaml_file
+from diabetes.utils.artifact_store import ArtifactStore
+from typing import Optional
+import sys
+
+
+class PredictionTableBuilder:
+
+    def __init__(self, prediction_table_config: PredictionTableConfig,
+                 model_eval_artifact: ModelEvaluationArtifact,
+                 artifact_store: Optional[ArtifactStore] = None):
+        try:
+            self.prediction_table_config = prediction_table_config
+            self.model_eval_artifact = model_eval_artifact
+            self.artifact_store = artifact_store or ArtifactStore.disk_only()
+        except Exception as e:
+            raise CustomException(e, sys)
+
+    def initiate_prediction_table(self) -> PredictionTableArtifact:
+        """
+        Score every possible form with the accepted model and check the table
+        against the model before it is published with it.
+        """
+        try:
+            model = self.artifact_store.get_object(self.model_eval_artifact.trained_model_path)
+
+            prediction_table = PredictionTable.build(model.predict_proba,
+                                                     quantization=self.prediction_table_config.quantization)
+            max_abs_error = prediction_table.check_consistency(
+                model.predict_proba, sample_size=self.prediction_table_config.check_sample_size)
+
+            table_file_path, meta_file_path = prediction_table.save(self.prediction_table_config.prediction_table_dir)
+
+            write_yaml_file(self.prediction_table_config.report_file_path, {
+                "entries": int(prediction_table.table.size),
+                "quantization": self.prediction_table_config.quantization,
+                "build_seconds": float(prediction_table.meta["build_seconds"]),
+                "check_sample_size": self.prediction_table_config.check_sample_size,
+                "max_abs_error": max_abs_error,
+            })
+
+            prediction_table_artifact = PredictionTableArtifact(
+                table_file_path=table_file_path,
+                meta_file_path=meta_file_path,
+                max_abs_error=max_abs_error,
+            )
+            logging.info(f"Prediction table artifact: {prediction_table_artifact}")
+            return prediction_table_artifact
+
+        except Exception as e:
+            raise CustomException(e, sys)
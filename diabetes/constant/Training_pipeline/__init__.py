@@ -14,9 +14,32 @@ TEST_FILE_NAME: str = "test.csv"
 
 PREPROCSSING_OBJECT_FILE_NAME = "preprocessing.pkl"
 MODEL_FILE_NAME = "model.pkl"
+# Histograms / category counts of the training split, pushed with each model for drift checks
+DRIFT_BASELINE_SKETCH_FILE_NAME = "baseline_sketch.json"
+
+# Native (pickle free) model artifact: XGBoost UBJSON booster, raw scaler arrays and a manifest
+NATIVE_MODEL_FILE_NAME = "model.ubj"
+NATIVE_SCALER_FILE_NAME = "scaler.npy"
+NATIVE_MANIFEST_FILE_NAME = "manifest.json"
 
 
 SCHEMA_FILE_PATH = os.path.join("config", "schema.yaml")
+
+# Stage outputs are handed to the next stage in memory and written to disk
+# in the background ("async"), immediately ("sync") or at the end of the run ("lazy")
+ARTIFACT_STORE_IN_MEMORY: bool = True
+ARTIFACT_STORE_PERSIST: str = "async"
+
+# Stage outputs are reused when the hash of their inputs, schema, constants and code matches
+STAGE_CACHE_ENABLED: bool = True
+STAGE_CACHE_DIR: str = os.path.join(ARTIFACT_DIR, "stage_cache")
+# Progress of the latest run, used by --resume
+RUN_STATE_FILE_PATH: str = os.path.join(ARTIFACT_DIR, "run_state.json")
+
+# Stages run as a DAG; independent stages (e.g. drift detection and training) run concurrently
+PIPELINE_MAX_WORKERS: int = 2
+# Per stage wall time and peak memory, written to the run's artifact dir
+PIPELINE_REPORT_FILE_NAME: str = "pipeline_report.yaml"
 # SCHEMA_DROP_COLS = "drop_columns"
 
 
@@ -29,6 +52,16 @@ DATA_INGESTION_DIR_NAME: str = "data_ingestion"
 DATA_INGESTION_FEATURE_STORE_DIR: str = "feature_store"
 DATA_INGESTION_INGESTED_DIR: str = "ingested"
 DATA_INGESTION_TRAIN_TEST_SPLIT_RATION: float = 0.1
+DATA_INGESTION_EXPORT_CHUNK_SIZE: int = 50000
+DATA_INGESTION_EXPORT_BATCH_SIZE: int = 10000
+# Incremental ingestion: delta pulls past a persisted `_id` watermark into a feature
+# store that lives outside the timestamped artifact dir
+DATA_INGESTION_INCREMENTAL: bool = True
+DATA_INGESTION_FEATURE_STORE_ROOT: str = os.path.join("feature_store", PIPELINE_NAME)
+# Table format for the feature store and train/test files: "parquet", "feather" (Arrow IPC) or "csv"
+DATA_STORAGE_FORMAT: str = "parquet"
+# Also write the merged feature store as diabetes.csv next to the columnar file
+DATA_INGESTION_EXPORT_CSV: bool = False
 
 
 """
@@ -40,6 +73,11 @@ DATA_VALIDATION_VALID_DIR: str = "validated"
 DATA_VALIDATION_INVALID_DIR: str = "invalid"
 DATA_VALIDATION_DRIFT_REPORT_DIR: str = "drift_report"
 DATA_VALIDATION_DRIFT_REPORT_FILE_NAME: str = "report.yaml"
+# Drift of the whole ingested data against the sketch of the model currently being served
+DATA_VALIDATION_SERVING_DRIFT_REPORT_FILE_NAME: str = "serving_model_report.yaml"
+DATA_VALIDATION_DRIFT_P_VALUE_THRESHOLD: float = 0.05
+# Numerical columns get one bin per value up to this many distinct integers, else this many equal bins
+DATA_VALIDATION_DRIFT_SKETCH_BINS: int = 128
 
 """
 Data Transformation ralated constant start with DATA_TRANSFORMATION VAR NAME
@@ -48,6 +86,31 @@ Data Transformation ralated constant start with DATA_TRANSFORMATION VAR NAME
 DATA_TRANSFORMATION_DIR_NAME: str = "data_transformation"
 DATA_TRANSFORMATION_TRANSFORMED_DATA_DIR: str = "transformed"
 DATA_TRANSFORMATION_TRANSFORMED_OBJECT_DIR: str = "transformed_object"
+# Transformed data is stored as C-contiguous float32 features (train.npy / test.npy) and
+# separate uint8 labels, so the trainer memory maps both without copies
+DATA_TRANSFORMATION_TRAIN_LABEL_FILE_NAME: str = "train_labels.npy"
+DATA_TRANSFORMATION_TEST_LABEL_FILE_NAME: str = "test_labels.npy"
+# Class rebalancing of the training split (the test split keeps its real distribution):
+# "none", "class_weight", "random_oversample", "smote" or "smote_tomek"
+DATA_TRANSFORMATION_REBALANCE_STRATEGY: str = "smote"
+# SMOTE neighbours, found with this NearestNeighbors algorithm on n_jobs threads (-1: every core)
+DATA_TRANSFORMATION_REBALANCE_K_NEIGHBORS: int = 5
+DATA_TRANSFORMATION_REBALANCE_NN_ALGORITHM: str = "kd_tree"
+DATA_TRANSFORMATION_REBALANCE_N_JOBS: int = -1
+# Out-of-core transformation and training: the validated tables are streamed in chunks,
+# the encoder and scaler are fitted with partial_fit and the transformed train/test data is
+# written as float32 feature and uint8 label .npy shards that XGBoost trains from through
+# its external memory iterator and that are scored shard by shard; these two steps hold one
+# chunk in memory whatever the row count. Ingestion's train/test split, data validation and
+# model evaluation still load the whole tables. Only the "none" and "class_weight"
+# rebalancing strategies apply, the others fall back to class_weight
+DATA_TRANSFORMATION_OUT_OF_CORE: bool = False
+DATA_TRANSFORMATION_CHUNK_ROWS: int = 100000
+DATA_TRANSFORMATION_TRAIN_SHARD_DIR: str = "train"
+DATA_TRANSFORMATION_TEST_SHARD_DIR: str = "test"
+# shard i is stored as <prefix><i:05d>.npy
+DATA_TRANSFORMATION_FEATURE_SHARD_PREFIX: str = "features-"
+DATA_TRANSFORMATION_LABEL_SHARD_PREFIX: str = "labels-"
 
 
 """
@@ -59,6 +122,11 @@ MODEL_TRAINER_TRAINED_MODEL_DIR: str = "trained_model"
 MODEL_TRAINER_TRAINED_MODEL_NAME: str = "model.pkl"
 MODEL_TRAINER_EXPECTED_SCORE: float = 0.9
 MODEL_TRAINER_OVER_FIITING_UNDER_FITTING_THRESHOLD: float = 0.05
+# Candidate model families, parameter grids and successive halving settings
+MODEL_TRAINER_MODEL_CONFIG_FILE_PATH: str = os.path.join("config", "model.yaml")
+MODEL_TRAINER_LEADERBOARD_FILE_NAME: str = "leaderboard.yaml"
+# XGBoost external memory cache (quantized pages) of out-of-core training
+MODEL_TRAINER_EXTERNAL_MEMORY_CACHE_DIR: str = "external_memory_cache"
 
 """
 Model Trainer ralated constant start with MODE TRAINER VAR NAME
@@ -66,8 +134,33 @@ Model Trainer ralated constant start with MODE TRAINER VAR NAME
 MODEL_EVALUATION_DIR_NAME: str = "model_evaluation"
 MODEL_EVALUATION_CHANGED_THRESHOLD_SCORE: float = 0.02
 MODEL_EVALUATION_REPORT_NAME= "report.yaml"
+# Latency / size gate: the trained model is rejected when it exceeds the best model's
+# numbers by more than ratio (plus slack, to absorb timer noise on sub-millisecond calls).
+# Latency is gated on the best p50 of LATENCY_ROUNDS interleaved rounds of LATENCY_REPEATS calls
+MODEL_EVALUATION_LATENCY_BATCH_SIZES: tuple = (1, 1024)
+MODEL_EVALUATION_LATENCY_REPEATS: int = 50
+MODEL_EVALUATION_LATENCY_ROUNDS: int = 5
+MODEL_EVALUATION_LATENCY_BUDGET_RATIO: float = 1.5
+MODEL_EVALUATION_LATENCY_BUDGET_SLACK_MS: float = 1.0
+MODEL_EVALUATION_SIZE_BUDGET_RATIO: float = 2.0
+MODEL_EVALUATION_LOAD_TIME_BUDGET_RATIO: float = 2.0
+MODEL_EVALUATION_LOAD_TIME_BUDGET_SLACK_SECONDS: float = 0.05
+# Best model predictions by (model version, row fingerprint), shared across runs so
+# evaluation only scores rows the best model has not seen
+MODEL_EVALUATION_PREDICTION_CACHE_DIR: str = os.path.join(ARTIFACT_DIR, "best_model_predictions")
+
 
 
+"""
+Prediction table related constant start with PREDICTION_TABLE VAR NAME
+"""
+PREDICTION_TABLE_DIR_NAME: str = "prediction_table"
+PREDICTION_TABLE_FILE_NAME: str = "prediction_table.npy"
+PREDICTION_TABLE_META_FILE_NAME: str = "prediction_table.json"
+PREDICTION_TABLE_REPORT_NAME: str = "report.yaml"
+PREDICTION_TABLE_QUANTIZATION: str = "uint16"
+PREDICTION_TABLE_CHECK_SAMPLE_SIZE: int = 10000
+
 
 MODEL_PUSHER_DIR_NAME = "model_pusher"
 
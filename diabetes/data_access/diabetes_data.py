@@ -1,5 +1,6 @@
 import sys
-from typing import Optional
+import time
+from typing import Iterator, List, Optional
 import logging
 import numpy as np
 import pandas as pd
@@ -28,10 +29,7 @@ class DiabetesData:
             data_frame.reset_index(drop=True, inplace=True)
             records = list(json.loads(data_frame.T.to_json()).values())
 
-            if database_name is None:
-                collection = self.mongo_client.database[collection_name]
-            else:
-                collection = self.mongo_client[database_name][collection_name]
+            collection = self._get_collection(collection_name, database_name)
 
             collection.insert_many(records)
             logging.info(f"Inserted {len(records)} records into collection '{collection_name}' in database '{database_name or DATABASE_NAME}'.")
@@ -40,22 +38,118 @@ class DiabetesData:
             logging.error(f"Error saving CSV file to MongoDB: {e}")
             raise CustomException(e, sys)
 
+    def _get_collection(self, collection_name: str, database_name: Optional[str] = None):
+        if database_name is None:
+            return self.mongo_client.database[collection_name]
+        return self.mongo_client.client[database_name][collection_name]
+
+    @staticmethod
+    def _new_buffer(value, size: int) -> np.ndarray:
+        # bool is a subclass of int, so check it first
+        if isinstance(value, (bool, np.bool_)):
+            return np.empty(size, dtype=object)
+        if isinstance(value, (int, np.integer)):
+            return np.empty(size, dtype=np.int64)
+        if isinstance(value, (float, np.floating)):
+            return np.empty(size, dtype=np.float64)
+        return np.empty(size, dtype=object)
+
+    @staticmethod
+    def _buffers_to_dataframe(buffers: dict, columns: List[str], n_rows: int) -> pd.DataFrame:
+        df = pd.DataFrame({column: buffers[column][:n_rows] for column in columns}, copy=False)
+        df.replace({"na": np.nan}, inplace=True)
+        return df
+
+    def iter_collection_chunks(self, collection_name: str, database_name: Optional[str] = None,
+                               chunk_size: int = 50000, batch_size: int = 10000,
+                               query: Optional[dict] = None,
+                               columns: Optional[List[str]] = None,
+                               sort: Optional[List[tuple]] = None,
+                               include_id: bool = False) -> Iterator[pd.DataFrame]:
+        """
+        Stream a collection as DataFrames of at most chunk_size rows.
+
+        The server-side projection keeps only `columns` (when given) and drops `_id`, so
+        fields outside the schema never leave the server; the cursor fetches batch_size
+        documents per round trip, and each column is accumulated straight into a typed
+        NumPy buffer instead of building a list of dicts. Column names come from
+        `columns` (the schema) or else the first document, dtypes from the first
+        document; a column whose values stop matching its numeric buffer falls back to
+        object dtype, and a column missing from a document is stored as None. Without
+        `columns`, keys a later document has beyond the first document's are ignored.
+        With include_id=True `_id` is kept as the first column (used for incremental
+        ingestion watermarks).
+        """
+        try:
+            collection = self._get_collection(collection_name, database_name)
+            projection = {column: 1 for column in columns or ()}
+            if not include_id:
+                projection["_id"] = 0
+            elif columns:
+                columns = ["_id"] + [column for column in columns if column != "_id"]
+            cursor = collection.find(query or {}, projection or None, batch_size=batch_size)
+            if sort:
+                cursor = cursor.sort(sort)
+
+            start = time.perf_counter()
+            total_rows = 0
+            buffers, n_rows = None, 0
+            for document in cursor:
+                if buffers is None:
+                    if columns is None:
+                        columns = list(document.keys())
+                    buffers = {column: self._new_buffer(document.get(column), chunk_size) for column in columns}
+
+                for column in columns:
+                    value = document.get(column)
+                    buffer = buffers[column]
+                    if buffer.dtype != object:
+                        if value is None or isinstance(value, (str, bool)):
+                            buffers[column] = buffer = buffer.astype(object)
+                        elif buffer.dtype == np.int64 and isinstance(value, float):
+                            buffers[column] = buffer = buffer.astype(np.float64)
+                    buffer[n_rows] = value
+                n_rows += 1
+
+                if n_rows == chunk_size:
+                    total_rows += n_rows
+                    yield self._buffers_to_dataframe(buffers, columns, n_rows)
+                    buffers = {column: np.empty(chunk_size, dtype=buffers[column].dtype) for column in columns}
+                    n_rows = 0
+
+            if n_rows:
+                total_rows += n_rows
+                yield self._buffers_to_dataframe(buffers, columns, n_rows)
+
+            elapsed = time.perf_counter() - start
+            logging.info(f"Streamed {total_rows} rows from '{collection_name}' in {elapsed:.2f}s "
+                         f"({total_rows / elapsed if elapsed else 0:.0f} rows/sec).")
+        except Exception as e:
+            logging.error(f"Error streaming collection to DataFrame chunks: {e}")
+            raise CustomException(e, sys)
+
     def export_collection_as_dataframe(
-        self, collection_name: str, database_name: Optional[str] = None) -> pd.DataFrame:
+        self, collection_name: str, database_name: Optional[str] = None,
+        stream: bool = False, chunk_size: int = 50000, batch_size: int = 10000) -> pd.DataFrame:
         try:
             """
             Export entire collection as DataFrame:
             Return pd.DataFrame of collection
+            With stream=True the frame is assembled from iter_collection_chunks
             """
-            if database_name is None:
-                collection = self.mongo_client.database[collection_name]
-            else:
-                collection = self.mongo_client[database_name][collection_name]
+            if stream:
+                chunks = list(self.iter_collection_chunks(
+                    collection_name, database_name, chunk_size=chunk_size, batch_size=batch_size))
+                df = pd.concat(chunks, ignore_index=True) if chunks else pd.DataFrame()
+                logging.info(f"Exported collection '{collection_name}' from database '{database_name or DATABASE_NAME}' as DataFrame.")
+                return df
+
+            collection = self._get_collection(collection_name, database_name)
 
             df = pd.DataFrame(list(collection.find()))
 
             if "_id" in df.columns.to_list():
-                df = df.drop(columns=["_id"], axis=1)
+                df = df.drop(columns=["_id"])
 
             df.replace({"na": np.nan}, inplace=True)
             logging.info(f"Exported collection '{collection_name}' from database '{database_name or DATABASE_NAME}' as DataFrame.")
@@ -0,0 +1,154 @@
+import json
+import os
+import sys
+from datetime import datetime
+from typing import Iterator, List, Optional, Tuple
+
+import pandas as pd
+
+from diabetes.data_access.storage import (CSV, FORMAT_SUFFIXES, SUFFIX_FORMATS, TableWriter, concat_tables,
+                                          iter_table, read_table, resolve_format)
+from diabetes.exception import CustomException
+from diabetes.logger import logging
+
+
+class FeatureStore:
+    """
+    Local, append-only feature store kept across pipeline runs.
+
+    Every incremental ingestion writes the documents pulled since the last run as
+    a new partition file and then advances the persisted watermark (the last
+    MongoDB `_id` ingested). The partition's last `_id` is also part of its file
+    name, so a crash between moving a partition into place and writing the
+    watermark cannot make the next run import the same `_id` range again:
+    `read_watermark()` never returns an `_id` older than the newest partition's.
+    `load()` returns the merged view of all partitions.
+    New partitions are written in storage_format, with the column types of
+    schema_config (see TableWriter); existing partitions are read in whatever
+    format they were written in.
+    """
+
+    WATERMARK_FILE_NAME = "watermark.json"
+    PARTITION_PREFIX = "part-"
+
+    def __init__(self, root_dir: str, storage_format: str = CSV, schema_config: Optional[dict] = None):
+        self.root_dir = root_dir
+        self.storage_format = resolve_format(storage_format)
+        self.schema_config = schema_config
+        self.watermark_file_path = os.path.join(root_dir, self.WATERMARK_FILE_NAME)
+
+    def read_watermark(self) -> Optional[dict]:
+        try:
+            watermark = None
+            if os.path.exists(self.watermark_file_path):
+                with open(self.watermark_file_path) as file_obj:
+                    watermark = json.load(file_obj)
+
+            partition_path, last_id = self.last_partition_id()
+            if last_id is not None and (watermark is None or last_id > watermark["last_id"]):
+                logging.warning(f"Watermark {watermark['last_id'] if watermark else None} is behind partition "
+                                f"{os.path.basename(partition_path)}, resuming after {last_id}")
+                watermark = {**(watermark or {}), "last_id": last_id,
+                             "last_partition": os.path.basename(partition_path)}
+            return watermark
+        except Exception as e:
+            raise CustomException(e, sys)
+
+    def last_partition_id(self) -> Tuple[Optional[str], Optional[str]]:
+        """Path and last `_id` of the partition holding the newest documents (None, None without any)."""
+        newest = (None, None)
+        for partition_path in self.partitions():
+            last_id = self._partition_id(partition_path)
+            # ObjectIds are fixed width hex, so string order is _id order
+            if last_id is not None and (newest[1] is None or last_id > newest[1]):
+                newest = (partition_path, last_id)
+        return newest
+
+    @classmethod
+    def _partition_id(cls, partition_path: str) -> Optional[str]:
+        # part-<timestamp>-<last _id>.<suffix>; partitions written before the _id was in the name have none
+        stem = os.path.splitext(os.path.basename(partition_path))[0]
+        last_id = stem[len(cls.PARTITION_PREFIX):].rpartition("-")[2]
+        return last_id if len(last_id) == 24 and all(c in "0123456789abcdef" for c in last_id) else None
+
+    def write_watermark(self, last_id: str, rows: int, partition: Optional[str]) -> dict:
+        """Persist the watermark atomically so a crash never leaves it half written."""
+        try:
+            previous = self.read_watermark() or {}
+            watermark = {
+                "last_id": last_id,
+                "updated_at": datetime.now().isoformat(),
+                "last_run_rows": rows,
+                "total_rows": previous.get("total_rows", 0) + rows,
+                "last_partition": partition,
+            }
+            os.makedirs(self.root_dir, exist_ok=True)
+            tmp_file_path = f"{self.watermark_file_path}.tmp"
+            with open(tmp_file_path, "w") as file_obj:
+                json.dump(watermark, file_obj, indent=2)
+            os.replace(tmp_file_path, self.watermark_file_path)
+            return watermark
+        except Exception as e:
+            raise CustomException(e, sys)
+
+    def new_partition_path(self, last_id: Optional[str] = None) -> str:
+        name = f"{self.PARTITION_PREFIX}{datetime.now().strftime('%Y%m%d_%H%M%S_%f')}"
+        if last_id is not None:
+            name = f"{name}-{last_id}"
+        return os.path.join(self.root_dir, name + FORMAT_SUFFIXES[self.storage_format])
+
+    def partitions(self) -> List[str]:
+        if not os.path.isdir(self.root_dir):
+            return []
+        return sorted(
+            os.path.join(self.root_dir, name) for name in os.listdir(self.root_dir)
+            if name.startswith(self.PARTITION_PREFIX) and os.path.splitext(name)[1] in SUFFIX_FORMATS
+        )
+
+    def append_chunks(self, chunks: Iterator[pd.DataFrame], id_column: str = "_id") -> dict:
+        """
+        Write the chunks to a new partition (without `id_column`) and advance the
+        watermark to the last `id_column` value seen. Returns the new watermark, or
+        the current one when there was nothing new.
+        """
+        try:
+            partition_path = self.new_partition_path()
+            # same suffix so the writer picks the format; the leading dot hides it from partitions()
+            tmp_partition_path = os.path.join(self.root_dir, f".tmp-{os.path.basename(partition_path)}")
+            os.makedirs(self.root_dir, exist_ok=True)
+
+            last_id = None
+            with TableWriter(tmp_partition_path, self.schema_config) as writer:
+                for chunk in chunks:
+                    last_id = str(chunk[id_column].iloc[-1])
+                    writer.write(chunk.drop(columns=[id_column]))
+            rows = writer.rows
+
+            if rows == 0:
+                logging.info("Feature store is up to date, no new documents.")
+                return self.read_watermark()
+
+            # the partition and its last _id become visible together, before the watermark file is updated
+            partition_path = self.new_partition_path(last_id)
+            os.replace(tmp_partition_path, partition_path)
+            watermark = self.write_watermark(last_id=last_id, rows=rows, partition=os.path.basename(partition_path))
+            logging.info(f"Appended {rows} rows to feature store partition {partition_path}")
+            return watermark
+        except Exception as e:
+            raise CustomException(e, sys)
+
+    def iter_partitions(self) -> Iterator[pd.DataFrame]:
+        for partition_path in self.partitions():
+            yield read_table(partition_path)
+
+    def iter_chunks(self, chunk_rows: int) -> Iterator[pd.DataFrame]:
+        """Merged view of every partition as DataFrames of at most chunk_rows rows."""
+        for partition_path in self.partitions():
+            yield from iter_table(partition_path, chunk_rows)
+
+    def load(self) -> pd.DataFrame:
+        """Merged view of every partition."""
+        try:
+            return concat_tables(self.iter_partitions())
+        except Exception as e:
+            raise CustomException(e, sys)
@@ -0,0 +1,225 @@
+import os
+import sys
+from typing import Dict, Iterable, Iterator, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from diabetes.exception import CustomException
+from diabetes.logger import logging
+
+try:
+    import pyarrow as pa
+    import pyarrow.feather as feather
+    import pyarrow.parquet as pq
+except ImportError:  # CSV keeps working without pyarrow
+    pa = feather = pq = None
+
+CSV, PARQUET, FEATHER = "csv", "parquet", "feather"
+FORMAT_SUFFIXES = {CSV: ".csv", PARQUET: ".parquet", FEATHER: ".arrow"}
+SUFFIX_FORMATS = {suffix: fmt for fmt, suffix in FORMAT_SUFFIXES.items()}
+
+
+def resolve_format(storage_format: str) -> str:
+    """Validate the format name and fall back to CSV when pyarrow is not installed."""
+    storage_format = storage_format.lower()
+    if storage_format not in FORMAT_SUFFIXES:
+        raise ValueError(f"Unknown storage format '{storage_format}', expected one of {list(FORMAT_SUFFIXES)}")
+    if storage_format != CSV and pa is None:
+        logging.warning(f"pyarrow is not installed, storing tables as {CSV} instead of {storage_format}")
+        return CSV
+    return storage_format
+
+
+def with_format_suffix(file_path: str, storage_format: str) -> str:
+    """diabetes.csv -> diabetes.parquet for storage_format='parquet'."""
+    return os.path.splitext(file_path)[0] + FORMAT_SUFFIXES[resolve_format(storage_format)]
+
+
+def format_of(file_path: str) -> str:
+    suffix = os.path.splitext(file_path)[1].lower()
+    if suffix not in SUFFIX_FORMATS:
+        raise ValueError(f"Cannot infer storage format from '{file_path}'")
+    return SUFFIX_FORMATS[suffix]
+
+
+def to_columnar_dtypes(dataframe: pd.DataFrame) -> pd.DataFrame:
+    """
+    Store the string columns (Yes/No flags, Gender, class) as categoricals so they
+    are dictionary encoded on disk and never re-parsed or re-inferred on read.
+    Numeric columns are left untouched.
+    """
+    columns = {column: dataframe[column].astype("category") for column in dataframe.columns
+               if not isinstance(dataframe[column].dtype, pd.CategoricalDtype)
+               and (pd.api.types.is_object_dtype(dataframe[column]) or pd.api.types.is_string_dtype(dataframe[column]))}
+    return dataframe.assign(**columns) if columns else dataframe
+
+
+def write_table(dataframe: pd.DataFrame, file_path: str) -> str:
+    """Write dataframe to file_path in the format given by its suffix."""
+    try:
+        os.makedirs(os.path.dirname(file_path) or ".", exist_ok=True)
+        storage_format = format_of(file_path)
+        if storage_format == CSV:
+            dataframe.to_csv(file_path, index=False, header=True)
+        elif storage_format == PARQUET:
+            to_columnar_dtypes(dataframe).to_parquet(file_path, index=False, engine="pyarrow")
+        else:
+            # uncompressed Arrow IPC so reads can be memory mapped without a copy
+            feather.write_feather(to_columnar_dtypes(dataframe).reset_index(drop=True), file_path,
+                                  compression="uncompressed")
+        return file_path
+    except Exception as e:
+        raise CustomException(e, sys)
+
+
+def read_table(file_path: str, columns: Optional[List[str]] = None, memory_map: bool = True) -> pd.DataFrame:
+    """Read a table written by write_table; Parquet and Arrow files are memory mapped by default."""
+    try:
+        storage_format = format_of(file_path)
+        if storage_format == CSV:
+            return pd.read_csv(file_path, usecols=columns)
+        if storage_format == PARQUET:
+            table = pq.read_table(file_path, columns=columns, memory_map=memory_map)
+        else:
+            table = feather.read_table(file_path, columns=columns, memory_map=memory_map)
+        return table.to_pandas(strings_to_categorical=True)
+    except Exception as e:
+        raise CustomException(e, sys)
+
+
+def iter_table(file_path: str, chunk_rows: int, columns: Optional[List[str]] = None) -> Iterator[pd.DataFrame]:
+    """
+    Stream a table written by write_table as DataFrames of at most chunk_rows rows,
+    so a file larger than memory can be processed one chunk at a time. Parquet is
+    read batch by batch and Arrow files are memory mapped; chunks of a columnar
+    file keep their categorical dtypes, whose categories may differ between chunks.
+    """
+    try:
+        storage_format = format_of(file_path)
+        if storage_format == CSV:
+            yield from pd.read_csv(file_path, usecols=columns, chunksize=chunk_rows)
+        elif storage_format == PARQUET:
+            parquet_file = pq.ParquetFile(file_path, memory_map=True)
+            for batch in parquet_file.iter_batches(batch_size=chunk_rows, columns=columns):
+                yield batch.to_pandas(strings_to_categorical=True)
+        else:
+            table = feather.read_table(file_path, columns=columns, memory_map=True)
+            for batch in table.to_batches(max_chunksize=chunk_rows):
+                yield batch.to_pandas(strings_to_categorical=True)
+    except Exception as e:
+        raise CustomException(e, sys)
+
+
+class TableWriter:
+    """
+    Append DataFrame chunks to a single table file. Parquet chunks become row
+    groups, Arrow chunks become record batches and CSV chunks are appended.
+
+    The Arrow schema is fixed on the first chunk, with the types of the columns in
+    schema_config (config/schema.yaml) taken from the config rather than from the
+    chunk: numerical columns are float64 and categorical columns strings, so a later
+    chunk holding NaNs, only nulls or new categories is written with the same types.
+    Parquet dictionary encodes the strings with the categories seen so far; Arrow
+    files store them plain, since an IPC file cannot replace a dictionary between
+    batches, and are read back as categoricals.
+    """
+
+    def __init__(self, file_path: str, schema_config: Optional[dict] = None):
+        self.file_path = file_path
+        self.storage_format = format_of(file_path)
+        self.numerical_columns = set((schema_config or {}).get("numerical_columns", []))
+        self.categorical_columns = set((schema_config or {}).get("categorical_columns", []))
+        self.rows = 0
+        self._writer = None
+        self._schema = None
+        self._categories: Dict[str, List[str]] = {}
+
+    def _schema_of(self, dataframe: pd.DataFrame) -> "pa.Schema":
+        inferred = pa.Schema.from_pandas(to_columnar_dtypes(dataframe), preserve_index=False)
+        fields = []
+        for field in inferred:
+            if field.name in self.numerical_columns:
+                field = field.with_type(pa.float64())
+            elif field.name in self.categorical_columns or pa.types.is_dictionary(field.type):
+                field = field.with_type(pa.dictionary(pa.int32(), pa.string())
+                                        if self.storage_format == PARQUET else pa.string())
+            fields.append(field)
+        return pa.schema(fields)
+
+    def _conform(self, dataframe: pd.DataFrame) -> pd.DataFrame:
+        columns = {}
+        for field in self._schema:
+            values = dataframe[field.name]
+            if pa.types.is_string(field.type):
+                columns[field.name] = values.astype(str).astype(object).where(values.notna(), None)
+            elif pa.types.is_dictionary(field.type):
+                labels = values.where(values.isna(), values.astype(str))
+                categories = self._categories.setdefault(field.name, [])
+                known = set(categories)
+                categories.extend(sorted(label for label in labels.dropna().unique() if label not in known))
+                columns[field.name] = pd.Categorical(labels, categories=categories)
+            elif pa.types.is_float64(field.type) and field.name in self.numerical_columns:
+                columns[field.name] = pd.to_numeric(values).astype(np.float64)
+            else:
+                columns[field.name] = values
+        return pd.DataFrame(columns, index=dataframe.index)
+
+    def write(self, dataframe: pd.DataFrame) -> None:
+        try:
+            if self.storage_format == CSV:
+                os.makedirs(os.path.dirname(self.file_path) or ".", exist_ok=True)
+                dataframe.to_csv(self.file_path, index=False, header=self.rows == 0,
+                                 mode="w" if self.rows == 0 else "a")
+            else:
+                if self._writer is None:
+                    os.makedirs(os.path.dirname(self.file_path) or ".", exist_ok=True)
+                    self._schema = self._schema_of(dataframe)
+                    if self.storage_format == PARQUET:
+                        self._writer = pq.ParquetWriter(self.file_path, self._schema)
+                    else:
+                        self._writer = pa.ipc.new_file(self.file_path, self._schema)
+                table = pa.Table.from_pandas(self._conform(dataframe), schema=self._schema, preserve_index=False)
+                self._writer.write_table(table)
+            self.rows += len(dataframe)
+        except Exception as e:
+            raise CustomException(e, sys)
+
+    def close(self) -> None:
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def concat_tables(dataframes: Iterable[pd.DataFrame]) -> pd.DataFrame:
+    """
+    Concatenate frames read from different files. Categoricals whose categories
+    differ between files (e.g. a partition with only 'Yes') are unioned so the
+    result stays categorical instead of falling back to object.
+    """
+    frames = list(dataframes)
+    if not frames:
+        return pd.DataFrame()
+    unified = {}
+    for column in frames[0].columns:
+        if all(isinstance(frame[column].dtype, pd.CategoricalDtype) for frame in frames):
+            unified[column] = pd.api.types.union_categoricals([frame[column] for frame in frames]).categories
+    if unified:
+        frames = [frame.assign(**{column: frame[column].cat.set_categories(categories)
+                                  for column, categories in unified.items()}) for frame in frames]
+    return pd.concat(frames, ignore_index=True)
+
+
+def synthetic_copy(source_file_path: str, n_rows: int, seed: int = 42) -> pd.DataFrame:
+    """Scaled-up copy of diabetes.csv: resampled rows with Age jittered by up to +/-3 years."""
+    source = pd.read_csv(source_file_path)
+    rng = np.random.default_rng(seed)
+    dataframe = source.iloc[rng.integers(0, len(source), n_rows)].reset_index(drop=True)
+    dataframe["Age"] = np.clip(dataframe["Age"].to_numpy() + rng.integers(-3, 4, n_rows), 2, 90)
+    return dataframe
@@ -1,4 +1,5 @@
 from dataclasses import dataclass
+from typing import Optional
 
 @dataclass
 
@@ -16,12 +17,25 @@ class DataValidationArtifact:
     invalid_test_file_path: str
     drift_report_file_path: str
 
+
+@dataclass
+class DataDriftArtifact:
+    drift_detected: bool
+    drift_report_file_path: str
+    baseline_sketch_file_path: Optional[str] = None
+    serving_drift_detected: Optional[bool] = None
+    serving_drift_report_file_path: Optional[str] = None
+
     
 @dataclass
 class DataTransformationArtifact:
     transformed_object_file_path: str
     transformed_train_file_path: str
     transformed_test_file_path: str
+    transformed_train_label_file_path: Optional[str] = None
+    transformed_test_label_file_path: Optional[str] = None
+    # positive class weight for the trainer, set by the class_weight rebalancing strategy
+    scale_pos_weight: Optional[float] = None
 
 
 @dataclass
@@ -35,6 +49,7 @@ class ModelTrainerArtifact:
     trained_model_file_path: str
     train_metric_artifact: ClassificationMetricArtifact
     test_metric_artifact: ClassificationMetricArtifact
+    leaderboard_file_path: Optional[str] = None
 
 
 @dataclass
@@ -47,6 +62,13 @@ class ModelEvaluationArtifact:
     trained_model_path: str
     train_model_metric_artifact: ClassificationMetricArtifact
     best_model_metric_artifact: ClassificationMetricArtifact
+    benchmark: Optional[dict] = None
+
+@dataclass
+class PredictionTableArtifact:
+    table_file_path: str
+    meta_file_path: str
+    max_abs_error: float
 
 @dataclass
 class ModelPusherArtifact:
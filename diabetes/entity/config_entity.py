@@ -1,6 +1,7 @@
 from datetime import datetime
 import os
 from diabetes.constant  import Training_pipeline
+from diabetes.data_access.storage import with_format_suffix
 
 class TrainingPipelineConfig:
    
@@ -24,22 +25,36 @@ class DataIngestionConfig:
                 training_pipeline_config.artifact_dir, Training_pipeline.DATA_INGESTION_DIR_NAME
             )
 
-            self.feature_store_file_path: str = os.path.join(
+            self.storage_format: str = Training_pipeline.DATA_STORAGE_FORMAT
+
+            self.feature_store_csv_file_path: str = os.path.join(
                 self.data_ingestion_dir, Training_pipeline.DATA_INGESTION_FEATURE_STORE_DIR, Training_pipeline.FILE_NAME
             )
 
-            self.training_file_path: str = os.path.join(
+            self.feature_store_file_path: str = with_format_suffix(self.feature_store_csv_file_path, self.storage_format)
+
+            self.training_file_path: str = with_format_suffix(os.path.join(
                 self.data_ingestion_dir, Training_pipeline.DATA_INGESTION_INGESTED_DIR, Training_pipeline.TRAIN_FILE_NAME
-            )
+            ), self.storage_format)
 
-            self.testing_file_path: str = os.path.join(
+            self.testing_file_path: str = with_format_suffix(os.path.join(
                 self.data_ingestion_dir, Training_pipeline.DATA_INGESTION_INGESTED_DIR, Training_pipeline.TEST_FILE_NAME
-            )
+            ), self.storage_format)
+
+            self.export_csv: bool = Training_pipeline.DATA_INGESTION_EXPORT_CSV
             
             self.train_test_split_ratio: float = Training_pipeline.DATA_INGESTION_TRAIN_TEST_SPLIT_RATION
             
             self.collection_name: str = Training_pipeline.DATA_INGESTION_COLLECTION_NAME
 
+            self.export_chunk_size: int = Training_pipeline.DATA_INGESTION_EXPORT_CHUNK_SIZE
+
+            self.export_batch_size: int = Training_pipeline.DATA_INGESTION_EXPORT_BATCH_SIZE
+
+            self.incremental: bool = Training_pipeline.DATA_INGESTION_INCREMENTAL
+
+            self.feature_store_root: str = Training_pipeline.DATA_INGESTION_FEATURE_STORE_ROOT
+
 
 class DataValidationConfig:
 
@@ -65,6 +80,22 @@ class DataValidationConfig:
             Training_pipeline.DATA_VALIDATION_DRIFT_REPORT_FILE_NAME,
         )
 
+        self.serving_drift_report_file_path: str = os.path.join(
+            self.data_validation_dir,
+            Training_pipeline.DATA_VALIDATION_DRIFT_REPORT_DIR,
+            Training_pipeline.DATA_VALIDATION_SERVING_DRIFT_REPORT_FILE_NAME,
+        )
+
+        self.baseline_sketch_file_path: str = os.path.join(
+            self.data_validation_dir,
+            Training_pipeline.DATA_VALIDATION_DRIFT_REPORT_DIR,
+            Training_pipeline.DRIFT_BASELINE_SKETCH_FILE_NAME,
+        )
+
+        self.drift_threshold: float = Training_pipeline.DATA_VALIDATION_DRIFT_P_VALUE_THRESHOLD
+
+        self.drift_sketch_bins: int = Training_pipeline.DATA_VALIDATION_DRIFT_SKETCH_BINS
+
 
 
 class DataTransformationConfig:
@@ -80,9 +111,33 @@ class DataTransformationConfig:
             Training_pipeline.TEST_FILE_NAME.replace("csv", "npy"), )
         
         
+        self.transformed_train_label_file_path: str = os.path.join(self.data_transformation_dir,
+            Training_pipeline.DATA_TRANSFORMATION_TRANSFORMED_DATA_DIR, Training_pipeline.DATA_TRANSFORMATION_TRAIN_LABEL_FILE_NAME)
+
+        self.transformed_test_label_file_path: str = os.path.join(self.data_transformation_dir,
+            Training_pipeline.DATA_TRANSFORMATION_TRANSFORMED_DATA_DIR, Training_pipeline.DATA_TRANSFORMATION_TEST_LABEL_FILE_NAME)
+
         self.transformed_object_file_path: str = os.path.join( self.data_transformation_dir, Training_pipeline.DATA_TRANSFORMATION_TRANSFORMED_OBJECT_DIR,
             Training_pipeline.PREPROCSSING_OBJECT_FILE_NAME,)
 
+        self.rebalance_strategy: str = Training_pipeline.DATA_TRANSFORMATION_REBALANCE_STRATEGY
+
+        self.rebalance_k_neighbors: int = Training_pipeline.DATA_TRANSFORMATION_REBALANCE_K_NEIGHBORS
+
+        self.rebalance_nn_algorithm: str = Training_pipeline.DATA_TRANSFORMATION_REBALANCE_NN_ALGORITHM
+
+        self.rebalance_n_jobs: int = Training_pipeline.DATA_TRANSFORMATION_REBALANCE_N_JOBS
+
+        self.out_of_core: bool = Training_pipeline.DATA_TRANSFORMATION_OUT_OF_CORE
+
+        self.chunk_rows: int = Training_pipeline.DATA_TRANSFORMATION_CHUNK_ROWS
+
+        self.transformed_train_shard_dir: str = os.path.join(self.data_transformation_dir,
+            Training_pipeline.DATA_TRANSFORMATION_TRANSFORMED_DATA_DIR, Training_pipeline.DATA_TRANSFORMATION_TRAIN_SHARD_DIR)
+
+        self.transformed_test_shard_dir: str = os.path.join(self.data_transformation_dir,
+            Training_pipeline.DATA_TRANSFORMATION_TRANSFORMED_DATA_DIR, Training_pipeline.DATA_TRANSFORMATION_TEST_SHARD_DIR)
+
    
 
 class ModelTrainerConfig:
@@ -105,6 +160,16 @@ class ModelTrainerConfig:
         
         self.overfitting_underfitting_threshold = Training_pipeline.MODEL_TRAINER_OVER_FIITING_UNDER_FITTING_THRESHOLD
 
+        self.model_config_file_path: str = Training_pipeline.MODEL_TRAINER_MODEL_CONFIG_FILE_PATH
+
+        self.leaderboard_file_path: str = os.path.join(
+            self.model_trainer_dir, Training_pipeline.MODEL_TRAINER_LEADERBOARD_FILE_NAME
+        )
+
+        self.external_memory_cache_dir: str = os.path.join(
+            self.model_trainer_dir, Training_pipeline.MODEL_TRAINER_EXTERNAL_MEMORY_CACHE_DIR
+        )
+
     
 
 
@@ -121,6 +186,41 @@ class ModelEvaluationConfig:
         
         self.change_threshold = Training_pipeline.MODEL_EVALUATION_CHANGED_THRESHOLD_SCORE
 
+        self.latency_batch_sizes: tuple = Training_pipeline.MODEL_EVALUATION_LATENCY_BATCH_SIZES
+
+        self.latency_repeats: int = Training_pipeline.MODEL_EVALUATION_LATENCY_REPEATS
+
+        self.latency_rounds: int = Training_pipeline.MODEL_EVALUATION_LATENCY_ROUNDS
+
+        self.latency_budget_ratio: float = Training_pipeline.MODEL_EVALUATION_LATENCY_BUDGET_RATIO
+
+        self.latency_budget_slack_ms: float = Training_pipeline.MODEL_EVALUATION_LATENCY_BUDGET_SLACK_MS
+
+        self.size_budget_ratio: float = Training_pipeline.MODEL_EVALUATION_SIZE_BUDGET_RATIO
+
+        self.load_time_budget_ratio: float = Training_pipeline.MODEL_EVALUATION_LOAD_TIME_BUDGET_RATIO
+
+        self.load_time_budget_slack_seconds: float = Training_pipeline.MODEL_EVALUATION_LOAD_TIME_BUDGET_SLACK_SECONDS
+
+        self.prediction_cache_dir: str = Training_pipeline.MODEL_EVALUATION_PREDICTION_CACHE_DIR
+
+
+
+
+class PredictionTableConfig:
+
+    def __init__(self,training_pipeline_config:TrainingPipelineConfig):
+
+        self.prediction_table_dir: str = os.path.join(
+            training_pipeline_config.artifact_dir, Training_pipeline.PREDICTION_TABLE_DIR_NAME
+        )
+
+        self.report_file_path = os.path.join(self.prediction_table_dir,Training_pipeline.PREDICTION_TABLE_REPORT_NAME)
+
+        self.quantization: str = Training_pipeline.PREDICTION_TABLE_QUANTIZATION
+
+        self.check_sample_size: int = Training_pipeline.PREDICTION_TABLE_CHECK_SAMPLE_SIZE
+
 
 
 
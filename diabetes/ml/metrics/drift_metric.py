@@ -0,0 +1,197 @@
+import json
+import os
+import sys
+from typing import Dict, Iterable, Mapping
+
+import numpy as np
+import pandas as pd
+from scipy.stats import chi2, kstwobign
+
+from diabetes.exception import CustomException
+
+CATEGORICAL, NUMERICAL = "categorical", "numerical"
+# floor for bucket proportions in PSI, so an empty bucket does not give log(0)
+PSI_EPSILON = 1e-4
+
+
+def histogram_edges(values: np.ndarray, max_bins: int) -> np.ndarray:
+    """
+    Bin edges for a numerical column: one bin per value when the column holds
+    at most max_bins distinct integers (exact KS), otherwise max_bins equal-width bins.
+    """
+    values = values[np.isfinite(values)]
+    if len(values) == 0:
+        return np.array([-0.5, 0.5])
+    low, high = float(values.min()), float(values.max())
+    if np.all(values == np.round(values)) and high - low + 1 <= max_bins:
+        return np.arange(low, high + 2) - 0.5
+    if low == high:
+        return np.array([low - 0.5, high + 0.5])
+    return np.linspace(low, high, max_bins + 1)
+
+
+class BaselineSketch:
+    """
+    Compact summary of a training table that later data is tested against.
+
+    Categorical columns keep per-category counts plus a trailing bucket for
+    categories never seen in training. Numerical columns keep a histogram with
+    an underflow and an overflow bucket. Incoming data is reduced to counts on
+    the same buckets (bucket_counts), so a drift check never needs the training
+    rows again. Saved as a few KB of JSON next to each pushed model.
+    """
+
+    def __init__(self, columns: Dict[str, dict], n_rows: int):
+        self.columns = columns
+        self.n_rows = n_rows
+
+    @classmethod
+    def from_dataframe(cls, dataframe: pd.DataFrame, categorical_columns: Iterable[str],
+                       numerical_columns: Iterable[str], max_bins: int = 128) -> "BaselineSketch":
+        try:
+            columns = {}
+            for column in categorical_columns:
+                categories = np.asarray(pd.factorize(dataframe[column])[1], dtype=str)
+                columns[column] = {"kind": CATEGORICAL, "categories": sorted(categories.tolist())}
+            for column in numerical_columns:
+                values = np.asarray(dataframe[column], dtype=np.float64)
+                columns[column] = {"kind": NUMERICAL, "edges": histogram_edges(values, max_bins).tolist()}
+
+            sketch = cls(columns, n_rows=len(dataframe))
+            for column, counts in sketch.bucket_counts(dataframe).items():
+                sketch.columns[column]["counts"] = counts.tolist()
+            return sketch
+        except Exception as e:
+            raise CustomException(e, sys)
+
+    def n_buckets(self, column: str) -> int:
+        spec = self.columns[column]
+        if spec["kind"] == CATEGORICAL:
+            return len(spec["categories"]) + 1
+        return len(spec["edges"]) + 1
+
+    def bucket_index(self, column: str, values) -> np.ndarray:
+        """Bucket of every value of one column; values outside the baseline go to the extra buckets."""
+        spec = self.columns[column]
+        if spec["kind"] == CATEGORICAL:
+            # factorize (or reuse the categorical codes) and map only the distinct values
+            if isinstance(getattr(values, "dtype", None), pd.CategoricalDtype):
+                codes, uniques = values.cat.codes.to_numpy(), values.cat.categories
+            else:
+                codes, uniques = pd.factorize(values if hasattr(values, "dtype") else np.asarray(values, dtype=object))
+            unseen = len(spec["categories"])
+            lookup = pd.Index(spec["categories"]).get_indexer(np.asarray(uniques, dtype=str))
+            # missing values have code -1 and land in the trailing unseen bucket
+            lookup = np.append(np.where(lookup < 0, unseen, lookup), unseen)
+            return lookup[codes].astype(np.int64)
+
+        edges = np.asarray(spec["edges"])
+        values = np.asarray(values, dtype=np.float64)
+        index = np.searchsorted(edges, values, side="right")
+        # the top edge closes the last bin instead of opening the overflow bucket
+        return np.where(values == edges[-1], len(edges) - 1, index).astype(np.int64)
+
+    def bucket_counts(self, data: Mapping) -> Dict[str, np.ndarray]:
+        """
+        Counts of data (a DataFrame or a dict of column arrays) on the sketch's
+        buckets, for every column in one bincount over column-offset bucket ids.
+        """
+        names = list(self.columns)
+        sizes = np.array([self.n_buckets(name) for name in names])
+        offsets = np.concatenate([[0], np.cumsum(sizes)[:-1]])
+        bucket_ids = np.concatenate([self.bucket_index(name, data[name]) + offset
+                                     for name, offset in zip(names, offsets)])
+        counts = np.bincount(bucket_ids, minlength=int(sizes.sum()))
+        return dict(zip(names, np.split(counts, offsets[1:])))
+
+    def baseline_counts(self) -> Dict[str, np.ndarray]:
+        return {name: np.asarray(spec["counts"], dtype=np.int64) for name, spec in self.columns.items()}
+
+    def to_dict(self) -> dict:
+        return {"n_rows": self.n_rows, "columns": self.columns}
+
+    @classmethod
+    def from_dict(cls, content: dict) -> "BaselineSketch":
+        return cls(content["columns"], content["n_rows"])
+
+    def save(self, file_path: str) -> None:
+        try:
+            os.makedirs(os.path.dirname(file_path) or ".", exist_ok=True)
+            with open(file_path, "w") as file_obj:
+                json.dump(self.to_dict(), file_obj)
+        except Exception as e:
+            raise CustomException(e, sys)
+
+    @classmethod
+    def load(cls, file_path: str) -> "BaselineSketch":
+        try:
+            with open(file_path) as file_obj:
+                return cls.from_dict(json.load(file_obj))
+        except Exception as e:
+            raise CustomException(e, sys)
+
+
+def drift_report(baseline: BaselineSketch, current_counts: Mapping[str, np.ndarray],
+                 threshold: float = 0.05) -> Dict[str, dict]:
+    """
+    Per-column drift of current_counts against the baseline sketch.
+
+    Every column's counts are padded into one matrix so PSI, the chi-square
+    homogeneity test and the KS statistic are computed for all columns at once.
+    Categorical columns are judged by chi-square, numerical columns by the
+    two-sample KS test (asymptotic p-value) and also get the Wasserstein distance,
+    with each bucket's mass placed at its bin centre. A column drifts when its
+    p-value is below threshold.
+    """
+    try:
+        names = list(baseline.columns)
+        baseline_counts = baseline.baseline_counts()
+        width = max(len(baseline_counts[name]) for name in names)
+        base = np.zeros((len(names), width))
+        current = np.zeros((len(names), width))
+        for i, name in enumerate(names):
+            base[i, :len(baseline_counts[name])] = baseline_counts[name]
+            current[i, :len(current_counts[name])] = current_counts[name]
+
+        n_base = np.maximum(base.sum(axis=1, keepdims=True), 1)
+        n_current = np.maximum(current.sum(axis=1, keepdims=True), 1)
+        used = (base + current) > 0
+
+        p_base = np.maximum(base / n_base, PSI_EPSILON)
+        p_current = np.maximum(current / n_current, PSI_EPSILON)
+        psi = np.where(used, (p_current - p_base) * np.log(p_current / p_base), 0.0).sum(axis=1)
+
+        total = base + current
+        n_total = n_base + n_current
+        with np.errstate(divide="ignore", invalid="ignore"):
+            expected_base = total * n_base / n_total
+            expected_current = total * n_current / n_total
+            cells = np.where(used, (base - expected_base) ** 2 / expected_base
+                             + (current - expected_current) ** 2 / expected_current, 0.0)
+        chi_statistic = cells.sum(axis=1)
+        dof = used.sum(axis=1) - 1
+        chi_p_value = np.where(dof > 0, chi2.sf(chi_statistic, np.maximum(dof, 1)), 1.0)
+
+        cdf_gap = np.cumsum(base, axis=1) / n_base - np.cumsum(current, axis=1) / n_current
+        ks_statistic = np.abs(cdf_gap).max(axis=1)
+        effective_n = np.sqrt((n_base * n_current / n_total).ravel())
+        ks_p_value = np.clip(kstwobign.sf(effective_n * ks_statistic), 0.0, 1.0)
+
+        report = {}
+        for i, name in enumerate(names):
+            spec = baseline.columns[name]
+            if spec["kind"] == CATEGORICAL:
+                entry = {"test": "chi2", "statistic": float(chi_statistic[i]), "p_value": float(chi_p_value[i])}
+            else:
+                edges = np.asarray(spec["edges"])
+                centres = np.concatenate([[edges[0]], (edges[:-1] + edges[1:]) / 2, [edges[-1]]])
+                n = len(centres)
+                wasserstein = float(np.sum(np.abs(cdf_gap[i, :n - 1]) * np.diff(centres)))
+                entry = {"test": "ks", "statistic": float(ks_statistic[i]), "p_value": float(ks_p_value[i]),
+                         "wasserstein": wasserstein}
+            entry["psi"] = float(psi[i])
+            entry["drift_status"] = bool(entry["p_value"] < threshold)
+            report[name] = entry
+        return report
+    except Exception as e:
+        raise CustomException(e, sys)
@@ -0,0 +1,111 @@
+import hashlib
+import json
+import os
+import sys
+import time
+
+import numpy as np
+from xgboost import XGBClassifier
+
+from diabetes.constant.Training_pipeline import (NATIVE_MANIFEST_FILE_NAME, NATIVE_MODEL_FILE_NAME,
+                                                 NATIVE_SCALER_FILE_NAME)
+from diabetes.exception import CustomException
+from diabetes.logger import logging
+from diabetes.ml.model.encoder import CategoricalEncoder
+from diabetes.ml.model.inference import FeatureField, InferencePipeline
+
+NATIVE_ARTIFACT_FORMAT_VERSION = 1
+# Estimators save_native_model can write; any other model is only saved as model.pkl
+NATIVE_MODEL_TYPES = (XGBClassifier,)
+
+
+def file_sha256(file_path: str) -> str:
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as file_obj:
+        for chunk in iter(lambda: file_obj.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def save_native_model(dir_path: str, pipeline: InferencePipeline) -> dict:
+    """
+    Write `model.ubj`, `scaler.npy` and `manifest.json` into dir_path.
+    Only pipelines around an XGBClassifier are supported. The encoder categories
+    and the request fields are recorded in the manifest.
+    """
+    try:
+        model, encoder = pipeline.model, pipeline.encoder
+        if not isinstance(model, NATIVE_MODEL_TYPES):
+            raise TypeError(f"Native artifact only supports XGBClassifier, got {type(model).__name__}")
+
+        os.makedirs(dir_path, exist_ok=True)
+        model_path = os.path.join(dir_path, NATIVE_MODEL_FILE_NAME)
+        scaler_path = os.path.join(dir_path, NATIVE_SCALER_FILE_NAME)
+        model.save_model(model_path)
+        np.save(scaler_path, np.ascontiguousarray(np.vstack([pipeline.mean, pipeline.scale]), dtype=np.float64))
+
+        manifest = {
+            "format_version": NATIVE_ARTIFACT_FORMAT_VERSION,
+            "model_type": type(model).__name__,
+            "n_features": int(pipeline.n_features),
+            "feature_names": [str(name) for name in encoder.feature_names_in_] if encoder is not None else [],
+            "categories": encoder.categories_ if encoder is not None else None,
+            "fields": [field.to_dict() for field in pipeline.fields] if pipeline.fields else None,
+            "created_at": time.time(),
+            "files": {
+                NATIVE_MODEL_FILE_NAME: file_sha256(model_path),
+                NATIVE_SCALER_FILE_NAME: file_sha256(scaler_path),
+            },
+        }
+        with open(os.path.join(dir_path, NATIVE_MANIFEST_FILE_NAME), "w") as file_obj:
+            json.dump(manifest, file_obj, indent=2)
+
+        logging.info(f"Native model artifact saved to {dir_path}")
+        return manifest
+    except Exception as e:
+        raise CustomException(e, sys) from e
+
+
+def is_native_model(dir_path: str) -> bool:
+    return os.path.exists(os.path.join(dir_path, NATIVE_MANIFEST_FILE_NAME))
+
+
+def load_native_model(dir_path: str, verify: bool = True) -> InferencePipeline:
+    """
+    Load a native artifact. The scaler is memory-mapped so forked workers share its
+    pages; with verify=True every file is checked against the manifest checksum.
+    """
+    try:
+        with open(os.path.join(dir_path, NATIVE_MANIFEST_FILE_NAME)) as file_obj:
+            manifest = json.load(file_obj)
+        if manifest.get("format_version") != NATIVE_ARTIFACT_FORMAT_VERSION:
+            raise ValueError(f"Unsupported native artifact format: {manifest.get('format_version')}")
+
+        if verify:
+            for file_name, checksum in manifest["files"].items():
+                if file_sha256(os.path.join(dir_path, file_name)) != checksum:
+                    raise ValueError(f"Checksum mismatch for {os.path.join(dir_path, file_name)}")
+
+        scaler = np.load(os.path.join(dir_path, NATIVE_SCALER_FILE_NAME), mmap_mode="r")
+        model = XGBClassifier()
+        model.load_model(os.path.join(dir_path, NATIVE_MODEL_FILE_NAME))
+        encoder = CategoricalEncoder.from_categories(manifest["feature_names"], manifest["categories"]) \
+            if manifest.get("categories") else None
+        fields = [FeatureField.from_dict(field) for field in manifest["fields"]] if manifest.get("fields") else None
+        # scaler[0] is the mean and scaler[1] the scale of every feature
+        return InferencePipeline(model=model, mean=scaler[0], scale=scaler[1], encoder=encoder, fields=fields)
+    except Exception as e:
+        raise CustomException(e, sys) from e
+
+
+if __name__ == "__main__":
+    # Convert a pickled saved model version in place, e.g.
+    # python -m diabetes.ml.model.artifact saved_models/1731484161
+    from diabetes.constant.Training_pipeline import MODEL_FILE_NAME
+    from diabetes.utils.main_utils import load_object
+
+    version_dir = sys.argv[1]
+    diabetes_model = load_object(os.path.join(version_dir, MODEL_FILE_NAME))
+    if not isinstance(diabetes_model, InferencePipeline):
+        diabetes_model = InferencePipeline.from_training(diabetes_model.preprocessor, diabetes_model.model)
+    print(save_native_model(version_dir, diabetes_model))
@@ -0,0 +1,149 @@
+import sys
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+from sklearn.base import BaseEstimator, TransformerMixin
+from sklearn.pipeline import Pipeline
+
+from diabetes.exception import CustomException
+
+MAX_CATEGORIES = np.iinfo(np.uint8).max + 1
+
+
+class CategoricalEncoder(BaseEstimator, TransformerMixin):
+    """
+    Encodes the categorical columns of a feature frame as uint8 codes.
+
+    Categories are learned once on the training split and sorted, so codes match
+    the LabelEncoder layout (Female/Male and No/Yes -> 0/1). Each column is
+    factorized and only its distinct values are looked up, so a column is one
+    vectorized pass however many rows it has. It is the first step of the
+    preprocessing pipeline and is saved with it, so training, evaluation and
+    serving all encode with the same fitted categories.
+
+    transform accepts a DataFrame with the training column names, or a matrix in
+    training column order whose categorical columns already hold codes (the
+    server's form matrix); codes are checked against the fitted categories.
+    Unknown categories raise instead of being encoded silently.
+    """
+
+    def __init__(self, columns: Sequence[str] = ()):
+        self.columns = columns
+
+    @classmethod
+    def from_categories(cls, feature_names: Sequence[str], categories: Dict[str, Sequence[str]]) -> "CategoricalEncoder":
+        """Rebuild a fitted encoder from its feature names and categories, e.g. from a native manifest"""
+        encoder = cls(columns=list(categories))
+        encoder.feature_names_in_ = np.asarray(feature_names, dtype=object)
+        encoder.n_features_in_ = len(feature_names)
+        encoder.categories_ = {column: list(labels) for column, labels in categories.items()}
+        return encoder
+
+    def fit(self, X: pd.DataFrame, y=None) -> "CategoricalEncoder":
+        for attribute in ("feature_names_in_", "n_features_in_", "categories_"):
+            self.__dict__.pop(attribute, None)
+        return self.partial_fit(X)
+
+    def partial_fit(self, X: pd.DataFrame, y=None) -> "CategoricalEncoder":
+        """Learn the categories of one chunk; categories are the sorted union over every chunk seen"""
+        try:
+            if not hasattr(self, "categories_"):
+                missing = [column for column in self.columns if column not in X.columns]
+                if missing:
+                    raise ValueError(f"Categorical columns {missing} are missing from the frame")
+                self.feature_names_in_ = np.asarray(X.columns, dtype=object)
+                self.n_features_in_ = len(X.columns)
+                self.categories_ = {column: [] for column in self.columns}
+            elif list(X.columns) != list(self.feature_names_in_):
+                raise ValueError(f"Chunk columns {list(X.columns)} do not match {list(self.feature_names_in_)}")
+            for column in self.columns:
+                categories = set(self.categories_[column])
+                categories.update(np.asarray(pd.factorize(X[column])[1], dtype=str).tolist())
+                if len(categories) > MAX_CATEGORIES:
+                    raise ValueError(f"Column '{column}' has {len(categories)} categories, more than uint8 codes allow")
+                self.categories_[column] = sorted(categories)
+            return self
+        except Exception as e:
+            raise CustomException(e, sys) from e
+
+    def _column_codes(self, column: str, values) -> np.ndarray:
+        categories = self.categories_[column]
+        if pd.api.types.is_numeric_dtype(getattr(values, "dtype", None)):
+            codes = np.asarray(values, dtype=np.float64)
+            invalid = (codes != np.round(codes)) | (codes < 0) | (codes >= len(categories))
+            if invalid.any():
+                raise ValueError(f"Column '{column}' has codes outside 0..{len(categories) - 1}: "
+                                 f"{np.unique(codes[invalid])[:10].tolist()}")
+            return codes.astype(np.uint8)
+
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            codes, uniques = values.cat.codes.to_numpy(), values.cat.categories
+        else:
+            codes, uniques = pd.factorize(values)
+        lookup = pd.Index(categories).get_indexer(np.asarray(uniques, dtype=str))
+        if (lookup < 0).any() or (codes < 0).any():
+            unknown = [str(value) for value, index in zip(uniques, lookup) if index < 0]
+            raise ValueError(f"Column '{column}' has unknown or missing categories {unknown[:10]}, "
+                             f"expected {categories}")
+        return lookup.astype(np.uint8)[codes]
+
+    def _columns_of(self, X) -> Dict[str, object]:
+        if isinstance(X, pd.DataFrame):
+            return {column: X[column] for column in self.feature_names_in_}
+        X = np.asarray(X)
+        if X.ndim != 2 or X.shape[1] != self.n_features_in_:
+            raise ValueError(f"Expected a matrix with {self.n_features_in_} columns, got shape {X.shape}")
+        return {column: X[:, i] for i, column in enumerate(self.feature_names_in_)}
+
+    def encode(self, X) -> np.ndarray:
+        """uint8 matrix of the categorical columns only, in `columns` order"""
+        try:
+            values = self._columns_of(X)
+            encoded = np.empty((len(next(iter(values.values()))), len(self.columns)), dtype=np.uint8)
+            for i, column in enumerate(self.columns):
+                encoded[:, i] = self._column_codes(column, values[column])
+            return encoded
+        except Exception as e:
+            raise CustomException(e, sys) from e
+
+    def transform(self, X) -> np.ndarray:
+        """Float matrix of every feature in training column order, categorical columns as codes"""
+        try:
+            values = self._columns_of(X)
+            n_rows = len(next(iter(values.values())))
+            transformed = np.empty((n_rows, self.n_features_in_), dtype=np.float64)
+            for i, column in enumerate(self.feature_names_in_):
+                if column in self.categories_:
+                    transformed[:, i] = self._column_codes(column, values[column])
+                else:
+                    transformed[:, i] = np.asarray(values[column], dtype=np.float64)
+            return transformed
+        except Exception as e:
+            raise CustomException(e, sys) from e
+
+    def code_lookup(self, column: str, labels: Sequence[str]) -> np.ndarray:
+        """Encoder code of every label, e.g. to map another 0/1 layout onto this encoder's"""
+        categories = self.categories_[column]
+        unknown = [label for label in labels if label not in categories]
+        if unknown:
+            raise ValueError(f"Column '{column}' was trained without categories {unknown}, has {categories}")
+        return np.array([categories.index(label) for label in labels], dtype=np.uint8)
+
+
+def find_encoder(preprocessor) -> Optional[CategoricalEncoder]:
+    """The CategoricalEncoder of a preprocessor (or its Pipeline steps), if it has one"""
+    if isinstance(preprocessor, CategoricalEncoder):
+        return preprocessor
+    if isinstance(preprocessor, Pipeline):
+        for _, step in preprocessor.steps:
+            if isinstance(step, CategoricalEncoder):
+                return step
+    return None
+
+
+def non_encoder_steps(preprocessor) -> List:
+    """Steps of a preprocessor other than the CategoricalEncoder, which is the identity on coded input"""
+    if isinstance(preprocessor, Pipeline):
+        return [step for _, step in preprocessor.steps if not isinstance(step, CategoricalEncoder)]
+    return [] if isinstance(preprocessor, CategoricalEncoder) else [preprocessor]
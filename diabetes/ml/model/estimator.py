@@ -51,9 +51,13 @@ class ModelResolver:
         except Exception as e:
             raise e    
 
+    def timestamps(self) -> list:
+        """Pushed model versions; staging dirs a failed push left behind are skipped"""
+        return [int(name) for name in os.listdir(self.model_dir) if name.isdigit()]
+
     def get_best_model_path(self) -> str:
         try:
-            timestamps = list(map(int, os.listdir(self.model_dir)))
+            timestamps = self.timestamps()
             latest_timestamp = max(timestamps)
             latest_model_path = os.path.join(self.model_dir, f"{latest_timestamp}", MODEL_FILE_NAME)
             return latest_model_path
@@ -65,7 +69,7 @@ class ModelResolver:
             if not os.path.exists(self.model_dir):
                 return False
 
-            timestamps = os.listdir(self.model_dir)
+            timestamps = self.timestamps()
             if len(timestamps) == 0:
                 return False
             
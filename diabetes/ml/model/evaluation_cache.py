@@ -0,0 +1,93 @@
+import os
+import shutil
+import sys
+from typing import Callable, Tuple
+
+import numpy as np
+import pandas as pd
+
+from diabetes.exception import CustomException
+from diabetes.logger import logging
+from diabetes.pipeline.stage_cache import file_fingerprint
+
+
+def row_fingerprints(df: pd.DataFrame) -> np.ndarray:
+    """One uint64 hash per row of the raw feature frame; equal rows hash equally."""
+    return pd.util.hash_pandas_object(df, index=False).to_numpy(dtype=np.uint64)
+
+
+class BestModelPredictionCache:
+    """
+    Predictions of the current best model, kept across evaluation runs.
+
+    Entries are keyed by (model version, row fingerprint). A version is the saved
+    model directory name plus a hash of its model file, so a re-pushed directory
+    never serves stale predictions. Each version stores sorted row hashes and
+    their int8 predictions as two .npy files; lookups are a vectorized
+    searchsorted. Only the latest version is kept, since only the best model is
+    ever re-scored.
+    """
+
+    HASHES_FILE_NAME = "row_hashes.npy"
+    PREDICTIONS_FILE_NAME = "predictions.npy"
+
+    def __init__(self, cache_dir: str):
+        self.cache_dir = cache_dir
+
+    @staticmethod
+    def model_version(model_file_path: str) -> str:
+        version = os.path.basename(os.path.dirname(os.path.abspath(model_file_path)))
+        return f"{version}-{file_fingerprint(model_file_path)[:16]}"
+
+    def _load(self, version: str) -> Tuple[np.ndarray, np.ndarray]:
+        version_dir = os.path.join(self.cache_dir, version)
+        hashes_path = os.path.join(version_dir, self.HASHES_FILE_NAME)
+        predictions_path = os.path.join(version_dir, self.PREDICTIONS_FILE_NAME)
+        if not (os.path.exists(hashes_path) and os.path.exists(predictions_path)):
+            return np.empty(0, dtype=np.uint64), np.empty(0, dtype=np.int8)
+        return np.load(hashes_path), np.load(predictions_path)
+
+    def _save(self, version: str, hashes: np.ndarray, predictions: np.ndarray) -> None:
+        version_dir = os.path.join(self.cache_dir, version)
+        tmp_dir = os.path.join(self.cache_dir, f".{version}.tmp")
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        os.makedirs(tmp_dir)
+        np.save(os.path.join(tmp_dir, self.HASHES_FILE_NAME), hashes)
+        np.save(os.path.join(tmp_dir, self.PREDICTIONS_FILE_NAME), predictions)
+        shutil.rmtree(version_dir, ignore_errors=True)
+        os.replace(tmp_dir, version_dir)
+        for name in os.listdir(self.cache_dir):
+            if name != version and not name.startswith("."):
+                shutil.rmtree(os.path.join(self.cache_dir, name), ignore_errors=True)
+
+    def predict(self, model_file_path: str, df: pd.DataFrame, predict_fn: Callable[[pd.DataFrame], np.ndarray]) -> np.ndarray:
+        """
+        Predictions for every row of df. Cached rows are looked up; only unseen
+        rows are passed to predict_fn, and their predictions are added to the cache.
+        """
+        try:
+            version = self.model_version(model_file_path)
+            cached_hashes, cached_predictions = self._load(version)
+            hashes = row_fingerprints(df)
+
+            positions = np.searchsorted(cached_hashes, hashes)
+            positions = np.minimum(positions, max(len(cached_hashes) - 1, 0))
+            found = (cached_hashes[positions] == hashes) if len(cached_hashes) else np.zeros(len(hashes), dtype=bool)
+
+            predictions = np.empty(len(hashes), dtype=np.int8)
+            predictions[found] = cached_predictions[positions[found]]
+
+            missing = ~found
+            if missing.any():
+                predictions[missing] = np.asarray(predict_fn(df[missing]), dtype=np.int8)
+                new_hashes, first = np.unique(hashes[missing], return_index=True)
+                merged_hashes = np.concatenate([cached_hashes, new_hashes])
+                merged_predictions = np.concatenate([cached_predictions, predictions[missing][first]])
+                order = np.argsort(merged_hashes, kind="stable")
+                self._save(version, merged_hashes[order], merged_predictions[order])
+
+            logging.info(f"Best model predictions for {version}: {int(found.sum())} cached, "
+                         f"{int(missing.sum())} scored")
+            return predictions
+        except Exception as e:
+            raise CustomException(e, sys)
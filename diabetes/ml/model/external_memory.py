@@ -0,0 +1,88 @@
+import os
+import sys
+from typing import Sequence
+
+import numpy as np
+import xgboost
+from xgboost import XGBClassifier
+
+from diabetes.entity.artifact_entity import ClassificationMetricArtifact
+from diabetes.exception import CustomException
+from diabetes.logger import logging
+
+
+class ShardIterator(xgboost.DataIter):
+    """
+    Feeds float32 feature and uint8 label .npy shards to XGBoost one memory-mapped
+    shard at a time, so training never holds more than one shard in memory.
+    """
+
+    def __init__(self, feature_paths: Sequence[str], label_paths: Sequence[str], cache_prefix: str):
+        if len(feature_paths) != len(label_paths):
+            raise ValueError(f"{len(feature_paths)} feature shards but {len(label_paths)} label shards")
+        self.feature_paths = list(feature_paths)
+        self.label_paths = list(label_paths)
+        self._index = 0
+        super().__init__(cache_prefix=cache_prefix)
+
+    def next(self, input_data) -> bool:
+        if self._index == len(self.feature_paths):
+            return False
+        input_data(data=np.load(self.feature_paths[self._index], mmap_mode="r", allow_pickle=False),
+                   label=np.load(self.label_paths[self._index], mmap_mode="r", allow_pickle=False))
+        self._index += 1
+        return True
+
+    def reset(self) -> None:
+        self._index = 0
+
+
+def external_memory_matrix(feature_paths: Sequence[str], label_paths: Sequence[str],
+                           cache_dir: str) -> xgboost.DMatrix:
+    """Quantized external memory DMatrix over the shards, with its pages cached in cache_dir"""
+    os.makedirs(cache_dir, exist_ok=True)
+    iterator = ShardIterator(feature_paths, label_paths, cache_prefix=os.path.join(cache_dir, "cache"))
+    # ExtMemQuantileDMatrix is the external memory matrix of XGBoost 3; older releases take the iterator in DMatrix
+    if hasattr(xgboost, "ExtMemQuantileDMatrix"):
+        return xgboost.ExtMemQuantileDMatrix(iterator)
+    return xgboost.DMatrix(iterator)
+
+
+def fit_external_memory(model: XGBClassifier, feature_paths: Sequence[str], label_paths: Sequence[str],
+                        cache_dir: str) -> XGBClassifier:
+    """Train `model`'s parameters on the shards with XGBoost's external memory; returns the fitted classifier"""
+    try:
+        params = {**model.get_xgb_params(), "tree_method": "hist"}
+        booster = xgboost.train(params, external_memory_matrix(feature_paths, label_paths, cache_dir),
+                                num_boost_round=model.n_estimators or 100)
+        fitted = XGBClassifier(**model.get_params())
+        fitted.load_model(bytearray(booster.save_raw(raw_format="ubj")))
+        logging.info(f"Trained {booster.num_boosted_rounds()} rounds on {len(feature_paths)} shards in external memory")
+        return fitted
+    except Exception as e:
+        raise CustomException(e, sys) from e
+
+
+def score_shards(model, feature_paths: Sequence[str], label_paths: Sequence[str]) -> ClassificationMetricArtifact:
+    """
+    F1, precision and recall of the model over every shard, scored one memory-mapped shard at
+    a time; only the confusion counts are kept, so no label or prediction array spans the shards
+    """
+    try:
+        true_positives = false_positives = false_negatives = 0
+        for feature_path, label_path in zip(feature_paths, label_paths):
+            labels = np.load(label_path, mmap_mode="r", allow_pickle=False).astype(bool)
+            predictions = np.asarray(model.predict(np.load(feature_path, mmap_mode="r", allow_pickle=False))).astype(bool)
+            true_positives += int(np.count_nonzero(labels & predictions))
+            false_positives += int(np.count_nonzero(~labels & predictions))
+            false_negatives += int(np.count_nonzero(labels & ~predictions))
+
+        # zero denominators score 0, like sklearn's default zero_division
+        precision = true_positives / (true_positives + false_positives) if true_positives + false_positives else 0.0
+        recall = true_positives / (true_positives + false_negatives) if true_positives + false_negatives else 0.0
+        f1 = 2 * precision * recall / (precision + recall) if precision + recall else 0.0
+        metric = ClassificationMetricArtifact(f1_score=f1, precision_score=precision, recall_score=recall)
+        logging.info(f"Scored {len(feature_paths)} shards: {metric}")
+        return metric
+    except Exception as e:
+        raise CustomException(e, sys) from e
@@ -0,0 +1,300 @@
+import json
+import sys
+import time
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import StandardScaler
+from xgboost import XGBClassifier
+
+from diabetes.exception import CustomException
+from diabetes.logger import logging
+from diabetes.ml.model.encoder import CategoricalEncoder, non_encoder_steps
+
+
+def scaler_arrays(preprocessor) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Return (mean, scale) of a fitted StandardScaler or a Pipeline made of StandardScalers.
+    A CategoricalEncoder step is skipped: scorers take already encoded features.
+    """
+    if isinstance(preprocessor, StandardScaler):
+        n_features = preprocessor.n_features_in_
+        mean = preprocessor.mean_ if preprocessor.with_mean else np.zeros(n_features)
+        scale = preprocessor.scale_ if preprocessor.with_std else np.ones(n_features)
+        return np.asarray(mean, dtype=np.float64), np.asarray(scale, dtype=np.float64)
+    if isinstance(preprocessor, (Pipeline, CategoricalEncoder)):
+        mean, scale = np.zeros(preprocessor.n_features_in_), np.ones(preprocessor.n_features_in_)
+        for step in non_encoder_steps(preprocessor):
+            mean, scale = compose_scalers((mean, scale), scaler_arrays(step))
+        return mean, scale
+    raise TypeError(f"Only StandardScaler preprocessing can be folded, got {type(preprocessor).__name__}")
+
+
+def compose_scalers(first: Tuple[np.ndarray, np.ndarray],
+                    second: Tuple[np.ndarray, np.ndarray]) -> Tuple[np.ndarray, np.ndarray]:
+    """((x - m1) / s1 - m2) / s2 == (x - (m1 + m2 * s1)) / (s1 * s2)"""
+    (m1, s1), (m2, s2) = first, second
+    return m1 + m2 * s1, s1 * s2
+
+
+class FastScorer:
+    """
+    Tree ensemble flattened into NumPy node arrays with the StandardScaler folded
+    into the split thresholds, so scoring a batch is a vectorized traversal over
+    raw (unscaled) features with no sklearn/XGBoost call overhead.
+
+    Leaves point to themselves, so every tree can be walked for `max_depth` steps
+    in lock step. For XGBoost `value` holds leaf margins that are summed and passed
+    through the sigmoid; for random forests it holds the positive class fraction
+    that is averaged over the trees.
+    """
+
+    def __init__(self, feature: np.ndarray, threshold: np.ndarray, left: np.ndarray,
+                 right: np.ndarray, default_left: np.ndarray, value: np.ndarray,
+                 roots: np.ndarray, max_depth: int, kind: str, base_margin: float = 0.0):
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.default_left = default_left
+        self.value = value
+        self.roots = roots
+        self.max_depth = max_depth
+        self.kind = kind
+        self.base_margin = base_margin
+        self.children = np.column_stack([right, left]).ravel()
+
+    @property
+    def n_trees(self) -> int:
+        return len(self.roots)
+
+    @classmethod
+    def from_model(cls, model, scalers: Sequence[Tuple[np.ndarray, np.ndarray]] = ()) -> "FastScorer":
+        """
+        Build a scorer from a fitted XGBClassifier or RandomForestClassifier.
+        `scalers` are the (mean, scale) pairs applied to the raw input before the model, in order.
+        """
+        try:
+            mean, scale = None, None
+            for scaler in scalers:
+                mean, scale = scaler if mean is None else compose_scalers((mean, scale), scaler)
+
+            if isinstance(model, XGBClassifier):
+                trees, kind, base_margin = cls._xgboost_trees(model), "xgboost", cls._xgboost_base_margin(model)
+            elif isinstance(model, RandomForestClassifier):
+                trees, kind, base_margin = cls._forest_trees(model), "forest", 0.0
+            else:
+                raise TypeError(f"FastScorer does not support {type(model).__name__}")
+
+            return cls._flatten(trees, kind=kind, base_margin=base_margin, mean=mean, scale=scale,
+                                inclusive=(kind == "forest"))
+        except Exception as e:
+            raise CustomException(e, sys) from e
+
+    @staticmethod
+    def _xgboost_base_margin(model: XGBClassifier) -> float:
+        config = json.loads(model.get_booster().save_config())
+        objective = config["learner"]["objective"]["name"]
+        if objective != "binary:logistic":
+            raise TypeError(f"FastScorer only supports binary:logistic, got {objective}")
+        base_score = float(config["learner"]["learner_model_param"]["base_score"].strip("[]"))
+        return float(np.log(base_score / (1.0 - base_score)))
+
+    @staticmethod
+    def _xgboost_trees(model: XGBClassifier) -> List[dict]:
+        booster = model.get_booster()
+        raw_model = json.loads(booster.save_raw("json"))["learner"]["gradient_booster"]["model"]
+        trees = raw_model["trees"]
+        best_iteration = getattr(model, "best_iteration", None)
+        if best_iteration is not None:
+            trees = trees[: best_iteration + 1]
+
+        flat_trees = []
+        for tree in trees:
+            left = np.asarray(tree["left_children"], dtype=np.int32)
+            is_leaf = left == -1
+            # Round trip through float32, the precision XGBoost stores and compares in
+            conditions = np.asarray(tree["split_conditions"], dtype=np.float32).astype(np.float64)
+            flat_trees.append({
+                "feature": np.asarray(tree["split_indices"], dtype=np.int32),
+                "threshold": conditions,
+                "left": left,
+                "right": np.asarray(tree["right_children"], dtype=np.int32),
+                "default_left": np.asarray(tree["default_left"], dtype=bool),
+                # Leaf nodes store their margin in split_conditions
+                "value": np.where(is_leaf, conditions, 0.0),
+                "is_leaf": is_leaf,
+            })
+        return flat_trees
+
+    @staticmethod
+    def _forest_trees(model: RandomForestClassifier) -> List[dict]:
+        positive_index = list(model.classes_).index(1)
+        flat_trees = []
+        for estimator in model.estimators_:
+            tree = estimator.tree_
+            left = tree.children_left.astype(np.int32)
+            counts = tree.value[:, 0, :]
+            flat_trees.append({
+                "feature": np.maximum(tree.feature, 0).astype(np.int32),
+                "threshold": tree.threshold.astype(np.float64),
+                "left": left,
+                "right": tree.children_right.astype(np.int32),
+                # Trees from sklearn releases without missing value support have no default branch
+                "default_left": np.asarray(getattr(tree, "missing_go_to_left", np.zeros(len(left))), dtype=bool),
+                "value": counts[:, positive_index] / counts.sum(axis=1),
+                "is_leaf": left == -1,
+            })
+        return flat_trees
+
+    @staticmethod
+    def _raw_thresholds(threshold: np.ndarray, mean: np.ndarray, scale: np.ndarray,
+                        inclusive: bool) -> np.ndarray:
+        """
+        Map split thresholds back to raw feature space.
+
+        Both XGBoost and sklearn trees cast the scaled feature to float32 before
+        comparing (`x < t` for XGBoost, `x <= t` for sklearn), and training values
+        sit exactly on the thresholds, so `t * s + m` is not exact enough. Bisect in
+        float64 for the smallest raw value that goes right; the raw split then
+        becomes `x < boundary` for both model types.
+        """
+        def goes_right(x):
+            scaled = ((x - mean) / scale).astype(np.float32)
+            return scaled > threshold if inclusive else scaled >= threshold
+
+        # sklearn splits missing from present values with an infinite threshold, which needs no mapping
+        finite = np.isfinite(threshold)
+        guess = np.where(finite, threshold * scale + mean, 0.0)
+        width = (np.abs(guess) + np.abs(scale) + 1.0) * 1e-4
+        low, high = guess - width, guess + width
+        for _ in range(100):
+            mid = (low + high) / 2
+            right = goes_right(mid)
+            high = np.where(right, mid, high)
+            low = np.where(right, low, mid)
+        return np.where(finite, high, threshold)
+
+    @classmethod
+    def _flatten(cls, trees: List[dict], kind: str, base_margin: float,
+                 mean: Optional[np.ndarray], scale: Optional[np.ndarray],
+                 inclusive: bool) -> "FastScorer":
+        offsets = np.cumsum([0] + [len(tree["left"]) for tree in trees])
+        feature, threshold, left, right, default_left, value = [], [], [], [], [], []
+        max_depth = 0
+
+        for offset, tree in zip(offsets[:-1], trees):
+            node_ids = np.arange(len(tree["left"]), dtype=np.int32) + offset
+            is_leaf = tree["is_leaf"]
+            tree_feature = np.where(is_leaf, 0, tree["feature"]).astype(np.int32)
+
+            # Fold the scaler into the threshold: (x - m) / s < t  <=>  x < t * s + m
+            tree_mean = mean[tree_feature] if mean is not None else np.zeros(len(tree_feature))
+            tree_scale = scale[tree_feature] if scale is not None else np.ones(len(tree_feature))
+            tree_threshold = np.where(is_leaf, np.inf, cls._raw_thresholds(
+                np.where(is_leaf, 0.0, tree["threshold"]), tree_mean, tree_scale, inclusive))
+
+            feature.append(tree_feature)
+            threshold.append(tree_threshold)
+            left.append(np.where(is_leaf, node_ids, tree["left"] + offset))
+            right.append(np.where(is_leaf, node_ids, tree["right"] + offset))
+            default_left.append(tree["default_left"])
+            value.append(tree["value"])
+            max_depth = max(max_depth, cls._depth(tree["left"], tree["right"]))
+
+        return cls(
+            feature=np.concatenate(feature).astype(np.int32),
+            threshold=np.concatenate(threshold).astype(np.float64),
+            left=np.concatenate(left).astype(np.int32),
+            right=np.concatenate(right).astype(np.int32),
+            default_left=np.concatenate(default_left).astype(bool),
+            value=np.concatenate(value).astype(np.float64),
+            roots=offsets[:-1].astype(np.int32),
+            max_depth=max_depth,
+            kind=kind,
+            base_margin=base_margin,
+        )
+
+    @staticmethod
+    def _depth(left: np.ndarray, right: np.ndarray) -> int:
+        depth = np.zeros(len(left), dtype=np.int32)
+        # Parents always precede their children in both XGBoost and sklearn node order
+        for node in range(len(left)):
+            if left[node] != -1:
+                depth[left[node]] = depth[node] + 1
+                depth[right[node]] = depth[node] + 1
+        return int(depth.max())
+
+    def leaf_values(self, x: np.ndarray) -> np.ndarray:
+        x = np.ascontiguousarray(x, dtype=np.float64)
+        n_rows = x.shape[0]
+        # Gather features from the flattened matrix: row i, feature f -> i * n_features + f
+        row_offsets = (np.arange(n_rows, dtype=np.int64) * x.shape[1])[:, None]
+        flat_x = x.ravel()
+        has_missing = bool(np.isnan(flat_x).any())
+
+        nodes = np.broadcast_to(self.roots, (n_rows, self.n_trees)).copy()
+        for _ in range(self.max_depth):
+            values = flat_x.take(row_offsets + self.feature.take(nodes))
+            go_left = values < self.threshold.take(nodes)
+            if has_missing:
+                go_left = np.where(np.isnan(values), self.default_left.take(nodes), go_left)
+            # children[2 * node] is the right child and children[2 * node + 1] the left one
+            nodes = self.children.take(2 * nodes + go_left)
+        return self.value.take(nodes)
+
+    def predict_positive(self, x: np.ndarray) -> np.ndarray:
+        leaves = self.leaf_values(x)
+        if self.kind == "xgboost":
+            return 1.0 / (1.0 + np.exp(-(self.base_margin + leaves.sum(axis=1))))
+        return leaves.mean(axis=1)
+
+    def predict_proba(self, x: np.ndarray) -> np.ndarray:
+        positive = self.predict_positive(x)
+        return np.column_stack([1.0 - positive, positive])
+
+    def predict(self, x: np.ndarray) -> np.ndarray:
+        return (self.predict_positive(x) >= 0.5).astype(np.int64)
+
+
+def check_parity(scorer: FastScorer, reference_predict_proba, x: np.ndarray, atol: float = 1e-5) -> float:
+    """
+    Compare the scorer with the original model on `x`; raise if the positive class
+    probabilities differ by more than `atol`. Returns the max absolute difference.
+    """
+    expected = np.asarray(reference_predict_proba(x))[:, 1]
+    actual = scorer.predict_positive(x)
+    max_diff = float(np.max(np.abs(expected - actual)))
+    if max_diff > atol:
+        raise ValueError(f"FastScorer parity check failed: max abs difference {max_diff} > {atol}")
+    return max_diff
+
+
+def random_form_batch(n_rows: int, seed: int = 0) -> np.ndarray:
+    """Random raw inputs in the serving layout: age followed by 15 binary flags."""
+    rng = np.random.default_rng(seed)
+    x = rng.integers(0, 2, size=(n_rows, 16)).astype(np.float64)
+    x[:, 0] = rng.integers(2, 66, size=n_rows)
+    return x
+
+
+def benchmark(scorer: FastScorer, reference_predict_proba,
+              batch_sizes: Sequence[int] = (1, 10, 100, 1000, 10000), repeats: int = 20) -> List[dict]:
+    """Per-row latency of the fast scorer against the reference model for each batch size."""
+    results = []
+    for batch_size in batch_sizes:
+        x = random_form_batch(batch_size, seed=batch_size)
+        row = {"batch_size": batch_size}
+        for name, fn in (("reference", reference_predict_proba), ("fast_scorer", scorer.predict_proba)):
+            fn(x)
+            start = time.perf_counter()
+            for _ in range(repeats):
+                fn(x)
+            row[f"{name}_us_per_row"] = round((time.perf_counter() - start) / repeats / batch_size * 1e6, 3)
+        row["speedup"] = round(row["reference_us_per_row"] / row["fast_scorer_us_per_row"], 3)
+        results.append(row)
+        logging.info(f"FastScorer benchmark: {row}")
+    return results
+
@@ -0,0 +1,177 @@
+import operator
+import sys
+from collections.abc import Mapping
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from diabetes.exception import CustomException
+from diabetes.ml.model.encoder import CategoricalEncoder, find_encoder
+from diabetes.ml.model.fast_scorer import scaler_arrays
+
+
+@dataclass(frozen=True)
+class FeatureField:
+    """A request field, the training column it feeds and, for categorical fields, the label of every code"""
+    name: str
+    column: str
+    labels: Optional[Tuple[str, ...]] = None
+
+    def to_dict(self) -> dict:
+        return {"name": self.name, "column": self.column, "labels": list(self.labels) if self.labels else None}
+
+    @classmethod
+    def from_dict(cls, field: dict) -> "FeatureField":
+        labels = field.get("labels")
+        return cls(name=field["name"], column=field["column"], labels=tuple(labels) if labels else None)
+
+
+def load_feature_fields(schema_config: dict) -> List[FeatureField]:
+    """The `serving_fields` of config/schema.yaml, in model input order"""
+    return [FeatureField.from_dict(field) for field in schema_config.get("serving_fields", [])]
+
+
+def extract_fields(records: Sequence, names: Sequence[str]) -> np.ndarray:
+    """
+    Stack `names` of every record into an (n_records, n_names) float matrix in one pass.
+    Records are mappings or objects with the fields as attributes (e.g. pydantic forms).
+    """
+    if len(records) == 0:
+        return np.empty((0, len(names)), dtype=np.float64)
+    getter = operator.itemgetter(*names) if isinstance(records[0], Mapping) else operator.attrgetter(*names)
+    return np.array(list(map(getter, records)), dtype=np.float64).reshape(len(records), len(names))
+
+
+class InferencePipeline:
+    """
+    The trained model as one inference graph: field extraction, categorical
+    encoding, scaling and the classifier. ModelTrainer saves it as model.pkl (and
+    its native artifact), and the server loads it as a single unit, so a request
+    is scored exactly the way the training split was transformed.
+
+    predict_proba(records) takes a batch of typed records (mappings or objects with
+    the `fields` as attributes) holding each categorical field as the code of its
+    `labels`. Fields are gathered straight into a float matrix, form codes are
+    mapped onto the fitted encoder's codes with one lookup and the scaler is
+    applied as mean/scale arrays; no DataFrame is built on the way.
+
+    DataFrames with the training column names and matrices already in encoder
+    codes are accepted too, like the diabetesModel wrapper this replaces.
+    """
+
+    def __init__(self, model, mean: np.ndarray, scale: np.ndarray,
+                 encoder: Optional[CategoricalEncoder] = None, fields: Optional[Sequence[FeatureField]] = None):
+        try:
+            self.model = model
+            self.mean = np.asarray(mean, dtype=np.float64)
+            self.scale = np.asarray(scale, dtype=np.float64)
+            self.encoder = encoder
+            self.fields = list(fields) if fields else None
+            self.n_features = len(self.mean)
+
+            if encoder is not None and encoder.n_features_in_ != self.n_features:
+                raise ValueError(f"Encoder has {encoder.n_features_in_} features, the scaler {self.n_features}")
+            if self.fields is not None:
+                if len(self.fields) != self.n_features:
+                    raise ValueError(f"{len(self.fields)} fields given for {self.n_features} features")
+                if encoder is not None and [field.column for field in self.fields] != list(encoder.feature_names_in_):
+                    raise ValueError(f"Field columns {[field.column for field in self.fields]} do not match "
+                                     f"the encoder features {list(encoder.feature_names_in_)}")
+            self._build_lookups()
+        except Exception as e:
+            raise CustomException(e, sys) from e
+
+    @classmethod
+    def from_training(cls, preprocessor, model, fields: Optional[Sequence[FeatureField]] = None) -> "InferencePipeline":
+        """Fuse a fitted preprocessing Pipeline (CategoricalEncoder + StandardScaler) with its classifier"""
+        mean, scale = scaler_arrays(preprocessor)
+        return cls(model=model, mean=mean, scale=scale, encoder=find_encoder(preprocessor), fields=fields)
+
+    def _build_lookups(self) -> None:
+        # One concatenated table maps the code of every categorical feature onto the encoder's code,
+        # so a whole batch is validated and encoded with a single gather
+        categories = self.encoder.categories_ if self.encoder is not None else {}
+        columns = list(self.encoder.feature_names_in_) if self.encoder is not None else []
+        index, lookups, encoder_sizes = [], [], []
+        for i in range(self.n_features):
+            field = self.fields[i] if self.fields is not None else None
+            column = field.column if field is not None else (columns[i] if columns else None)
+            if column in categories:
+                labels = field.labels if field is not None and field.labels else categories[column]
+                lookups.append(self.encoder.code_lookup(column, labels))
+                encoder_sizes.append(len(categories[column]))
+                index.append(i)
+            elif field is not None and field.labels:
+                lookups.append(np.arange(len(field.labels), dtype=np.uint8))
+                encoder_sizes.append(len(field.labels))
+                index.append(i)
+
+        self._categorical_index = np.array(index, dtype=np.int64)
+        self._field_sizes = np.array([len(lookup) for lookup in lookups], dtype=np.int64)
+        self._encoder_sizes = np.array(encoder_sizes, dtype=np.int64)
+        self._offsets = np.concatenate([[0], np.cumsum(self._field_sizes)[:-1]]).astype(np.int64)
+        self._code_table = np.concatenate(lookups).astype(np.float64) if lookups else np.zeros(0)
+        # feature index -> encoder code of every field code, only where the layouts differ
+        self.form_lookups: Dict[int, np.ndarray] = {
+            int(i): lookup for i, lookup in zip(index, lookups)
+            if not np.array_equal(lookup, np.arange(len(lookup)))
+        }
+
+    @property
+    def field_names(self) -> List[str]:
+        return [field.name for field in self.fields] if self.fields is not None else []
+
+    @staticmethod
+    def _check_codes(codes: np.ndarray, sizes: np.ndarray, index: np.ndarray) -> None:
+        invalid = (codes != np.round(codes)) | (codes < 0) | (codes >= sizes)
+        if invalid.any():
+            rows, columns = np.nonzero(invalid)
+            raise ValueError(f"Feature {int(index[columns[0]])} has code {codes[rows[0], columns[0]]} outside "
+                             f"0..{int(sizes[columns[0]]) - 1} ({int(invalid.sum())} invalid values)")
+
+    def extract(self, records: Sequence) -> np.ndarray:
+        """Field codes of every record as an (n_records, n_features) float matrix"""
+        if self.fields is None:
+            raise ValueError("This model was saved without request fields; pass a feature matrix instead")
+        return extract_fields(records, self.field_names)
+
+    def encode_fields(self, features: np.ndarray) -> np.ndarray:
+        """Map field codes onto the encoder's codes, checking them against the field labels"""
+        features = np.array(features, dtype=np.float64)
+        if len(self._categorical_index):
+            codes = features[:, self._categorical_index]
+            self._check_codes(codes, self._field_sizes, self._categorical_index)
+            features[:, self._categorical_index] = self._code_table[self._offsets + codes.astype(np.int64)]
+        return features
+
+    def transform(self, x) -> np.ndarray:
+        """Scaled model input of a DataFrame (training columns) or a matrix in encoder codes"""
+        if isinstance(x, pd.DataFrame):
+            features = self.encoder.transform(x) if self.encoder is not None else x.to_numpy(dtype=np.float64)
+        else:
+            features = np.asarray(x, dtype=np.float64)
+            if features.ndim != 2 or features.shape[1] != self.n_features:
+                raise ValueError(f"Expected a matrix with {self.n_features} columns, got shape {features.shape}")
+            if len(self._categorical_index):
+                self._check_codes(features[:, self._categorical_index], self._encoder_sizes, self._categorical_index)
+        return (features - self.mean) / self.scale
+
+    def _model_input(self, x) -> np.ndarray:
+        if isinstance(x, (pd.DataFrame, np.ndarray)):
+            return self.transform(x)
+        return self.transform(self.encode_fields(self.extract(x)))
+
+    def predict(self, x) -> np.ndarray:
+        try:
+            return self.model.predict(self._model_input(x))
+        except Exception as e:
+            raise CustomException(e, sys) from e
+
+    def predict_proba(self, x) -> np.ndarray:
+        """(n, 2) class probabilities of a batch of records, a DataFrame or an encoded matrix"""
+        try:
+            return self.model.predict_proba(self._model_input(x))
+        except Exception as e:
+            raise CustomException(e, sys) from e
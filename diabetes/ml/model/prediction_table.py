@@ -0,0 +1,143 @@
+import json
+import os
+import sys
+import time
+from typing import Callable, Tuple
+
+import numpy as np
+
+from diabetes.constant.Training_pipeline import PREDICTION_TABLE_FILE_NAME, PREDICTION_TABLE_META_FILE_NAME
+from diabetes.exception import CustomException
+from diabetes.logger import logging
+
+AGE_MIN = 2
+AGE_MAX = 65
+N_FLAGS = 15
+N_MASKS = 1 << N_FLAGS
+
+QUANTIZATION_SCALES = {"uint8": 255.0, "uint16": 65535.0, "float16": None}
+
+
+class PredictionTable:
+    """
+    Precomputed positive class probability for every possible form.
+
+    Inputs are age followed by 15 binary flags, so every form maps to
+    `table[age - AGE_MIN, bitmask]` where bit i of the bitmask is flag i.
+    The table is stored quantized (uint8/uint16) or as float16 and loaded
+    memory-mapped, so a lookup is one gather regardless of model size.
+    """
+
+    def __init__(self, table: np.ndarray, meta: dict):
+        self.table = table
+        self.meta = meta
+        self.scale = QUANTIZATION_SCALES[meta["quantization"]]
+        self._bit_weights = (1 << np.arange(N_FLAGS)).astype(np.int64)
+
+    @property
+    def max_quantization_error(self) -> float:
+        if self.scale is None:
+            # float16 has 11 significant bits; probabilities are at most 1
+            return 2.0 ** -11
+        return 0.5 / self.scale
+
+    @staticmethod
+    def all_flag_combinations() -> np.ndarray:
+        return ((np.arange(N_MASKS)[:, None] >> np.arange(N_FLAGS)) & 1).astype(np.float64)
+
+    def encode(self, features: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Return (age row, bitmask, valid) for every row of `features`."""
+        features = np.asarray(features, dtype=np.float64)
+        ages = features[:, 0]
+        flags = features[:, 1:]
+        valid = ((features.shape[1] == N_FLAGS + 1)
+                 & (ages == np.round(ages)) & (ages >= AGE_MIN) & (ages <= AGE_MAX)
+                 & np.all((flags == 0) | (flags == 1), axis=1))
+        age_index = np.where(valid, ages - AGE_MIN, 0).astype(np.int64)
+        masks = np.where(valid, flags.astype(np.int64) @ self._bit_weights, 0)
+        return age_index, masks, valid
+
+    def dequantize(self, values: np.ndarray) -> np.ndarray:
+        values = np.asarray(values, dtype=np.float64)
+        return values if self.scale is None else values / self.scale
+
+    def lookup(self, features: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Return (probability, valid); rows outside the table's domain are not valid."""
+        age_index, masks, valid = self.encode(features)
+        return self.dequantize(self.table[age_index, masks]), valid
+
+    @classmethod
+    def build(cls, predict_proba: Callable[[np.ndarray], np.ndarray],
+              quantization: str = "uint16") -> "PredictionTable":
+        """Score every (age, flags) combination, one age (32768 rows) per model call."""
+        if quantization not in QUANTIZATION_SCALES:
+            raise ValueError(f"Unknown quantization: {quantization}")
+        scale = QUANTIZATION_SCALES[quantization]
+        dtype = np.float16 if scale is None else np.dtype(quantization)
+
+        start = time.perf_counter()
+        flags = cls.all_flag_combinations()
+        table = np.empty((AGE_MAX - AGE_MIN + 1, N_MASKS), dtype=dtype)
+        features = np.empty((N_MASKS, N_FLAGS + 1), dtype=np.float64)
+        features[:, 1:] = flags
+        for age in range(AGE_MIN, AGE_MAX + 1):
+            features[:, 0] = age
+            probability = np.asarray(predict_proba(features))[:, 1]
+            table[age - AGE_MIN] = probability if scale is None else np.round(probability * scale)
+
+        meta = {
+            "age_min": AGE_MIN,
+            "age_max": AGE_MAX,
+            "n_flags": N_FLAGS,
+            "quantization": quantization,
+            "created_at": time.time(),
+            "build_seconds": time.perf_counter() - start,
+        }
+        logging.info(f"Prediction table with {table.size} entries built in {meta['build_seconds']:.2f}s")
+        return cls(table=table, meta=meta)
+
+    def check_consistency(self, predict_proba: Callable[[np.ndarray], np.ndarray],
+                          sample_size: int = 10000, seed: int = 42) -> float:
+        """
+        Compare the table with `predict_proba` on a random sample of forms and
+        raise if any difference exceeds the quantization error. Returns the max difference.
+        """
+        rng = np.random.default_rng(seed)
+        features = np.empty((sample_size, N_FLAGS + 1), dtype=np.float64)
+        features[:, 0] = rng.integers(AGE_MIN, AGE_MAX + 1, size=sample_size)
+        features[:, 1:] = rng.integers(0, 2, size=(sample_size, N_FLAGS))
+
+        expected = np.asarray(predict_proba(features))[:, 1]
+        actual, _ = self.lookup(features)
+        max_error = float(np.max(np.abs(expected - actual)))
+        tolerance = self.max_quantization_error + 1e-6
+        if max_error > tolerance:
+            raise ValueError(f"Prediction table disagrees with the model: max abs error {max_error} > {tolerance}")
+        return max_error
+
+    def save(self, dir_path: str) -> Tuple[str, str]:
+        try:
+            os.makedirs(dir_path, exist_ok=True)
+            table_file_path = os.path.join(dir_path, PREDICTION_TABLE_FILE_NAME)
+            meta_file_path = os.path.join(dir_path, PREDICTION_TABLE_META_FILE_NAME)
+            np.save(table_file_path, np.ascontiguousarray(self.table))
+            with open(meta_file_path, "w") as file_obj:
+                json.dump(self.meta, file_obj, indent=2)
+            return table_file_path, meta_file_path
+        except Exception as e:
+            raise CustomException(e, sys) from e
+
+    @classmethod
+    def exists(cls, dir_path: str) -> bool:
+        return (os.path.exists(os.path.join(dir_path, PREDICTION_TABLE_FILE_NAME))
+                and os.path.exists(os.path.join(dir_path, PREDICTION_TABLE_META_FILE_NAME)))
+
+    @classmethod
+    def load(cls, dir_path: str) -> "PredictionTable":
+        try:
+            with open(os.path.join(dir_path, PREDICTION_TABLE_META_FILE_NAME)) as file_obj:
+                meta = json.load(file_obj)
+            table = np.load(os.path.join(dir_path, PREDICTION_TABLE_FILE_NAME), mmap_mode="r")
+            return cls(table=table, meta=meta)
+        except Exception as e:
+            raise CustomException(e, sys) from e
@@ -0,0 +1,135 @@
+import sys
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+from imblearn.combine import SMOTETomek
+from imblearn.over_sampling import SMOTE, RandomOverSampler
+from imblearn.under_sampling import TomekLinks
+from sklearn.neighbors import NearestNeighbors
+from xgboost import XGBClassifier
+
+from diabetes.exception import CustomException
+from diabetes.logger import logging
+
+NONE, CLASS_WEIGHT, RANDOM_OVERSAMPLE, SMOTE_OVERSAMPLE, SMOTE_TOMEK = (
+    "none", "class_weight", "random_oversample", "smote", "smote_tomek")
+REBALANCE_STRATEGIES = (NONE, CLASS_WEIGHT, RANDOM_OVERSAMPLE, SMOTE_OVERSAMPLE, SMOTE_TOMEK)
+# strategies that only need the class counts, so they also work out of core
+WEIGHTING_STRATEGIES = (NONE, CLASS_WEIGHT)
+
+
+def class_counts(labels: np.ndarray) -> Dict[int, int]:
+    counts = np.bincount(np.asarray(labels, dtype=np.int64), minlength=2)
+    return {label: int(count) for label, count in enumerate(counts)}
+
+
+def balanced_scale_pos_weight(counts: Dict[int, int]) -> float:
+    """Weight of a positive row relative to a negative one that balances the two classes"""
+    if counts.get(0, 0) == 0 or counts.get(1, 0) == 0:
+        raise ValueError(f"Class weights need both classes in the training split, got {counts}")
+    return counts[0] / counts[1]
+
+
+def class_weight_params(estimator_cls: type, scale_pos_weight: Optional[float]) -> dict:
+    """Estimator parameters weighting the positive class scale_pos_weight times the negative one"""
+    if scale_pos_weight is None:
+        return {}
+    if issubclass(estimator_cls, XGBClassifier):
+        return {"scale_pos_weight": scale_pos_weight}
+    return {"class_weight": {0: 1.0, 1: scale_pos_weight}}
+
+
+@dataclass
+class RebalanceResult:
+    features: np.ndarray
+    labels: np.ndarray
+    # set by the class_weight strategy, for the trainer to pass on to the model
+    scale_pos_weight: Optional[float]
+    report: dict
+
+
+class Rebalancer:
+    """
+    Rebalances the classes of the training split; the test split is never touched.
+
+    Strategies:
+      none               keep the data as is
+      class_weight       keep the data and weight the positive class by n_negative / n_positive
+                         (scale_pos_weight for XGBoost, class_weight for sklearn models)
+      random_oversample  duplicate random minority rows up to the majority count
+      smote              interpolate new minority rows between nearest neighbours
+      smote_tomek        smote, then drop Tomek links (the former default; its extra
+                         all-rows neighbour search scales worst with row count)
+
+    Neighbour searches use a NearestNeighbors with the given `algorithm` ("kd_tree",
+    "ball_tree", "brute" or "auto") and `n_jobs` worker threads.
+    """
+
+    def __init__(self, strategy: str = SMOTE_OVERSAMPLE, k_neighbors: int = 5, algorithm: str = "kd_tree",
+                 n_jobs: Optional[int] = -1, random_state: int = 42):
+        if strategy not in REBALANCE_STRATEGIES:
+            raise ValueError(f"Unknown rebalancing strategy '{strategy}', expected one of {list(REBALANCE_STRATEGIES)}")
+        self.strategy = strategy
+        self.k_neighbors = k_neighbors
+        self.algorithm = algorithm
+        self.n_jobs = n_jobs
+        self.random_state = random_state
+
+    def _smote(self) -> SMOTE:
+        neighbors = NearestNeighbors(n_neighbors=self.k_neighbors + 1, algorithm=self.algorithm, n_jobs=self.n_jobs)
+        return SMOTE(sampling_strategy="minority", k_neighbors=neighbors, random_state=self.random_state)
+
+    def _sampler(self):
+        if self.strategy == RANDOM_OVERSAMPLE:
+            return RandomOverSampler(sampling_strategy="minority", random_state=self.random_state)
+        if self.strategy == SMOTE_OVERSAMPLE:
+            return self._smote()
+        return SMOTETomek(smote=self._smote(), tomek=TomekLinks(n_jobs=self.n_jobs), random_state=self.random_state)
+
+    def fit_resample(self, features: np.ndarray, labels: np.ndarray) -> RebalanceResult:
+        try:
+            start = time.perf_counter()
+            counts_before = class_counts(labels)
+            scale_pos_weight = None
+            if self.strategy in WEIGHTING_STRATEGIES:
+                if self.strategy == CLASS_WEIGHT:
+                    scale_pos_weight = balanced_scale_pos_weight(counts_before)
+            else:
+                features, labels = self._sampler().fit_resample(features, labels)
+
+            report = {
+                "strategy": self.strategy,
+                "seconds": round(time.perf_counter() - start, 4),
+                "rows_before": int(sum(counts_before.values())),
+                "rows_after": int(len(labels)),
+                "class_counts_before": counts_before,
+                "class_counts_after": class_counts(labels),
+                "scale_pos_weight": scale_pos_weight,
+            }
+            logging.info(f"Rebalancing: {report}")
+            return RebalanceResult(features=features, labels=labels, scale_pos_weight=scale_pos_weight, report=report)
+        except Exception as e:
+            raise CustomException(e, sys) from e
+
+
+def benchmark(features: np.ndarray, labels: np.ndarray, strategies: Sequence[str] = REBALANCE_STRATEGIES,
+              **rebalancer_params) -> List[dict]:
+    """Rebalance the same training split with every strategy and report its wall time and output size"""
+    return [Rebalancer(strategy, **rebalancer_params).fit_resample(features, labels).report for strategy in strategies]
+
+
+if __name__ == "__main__":
+    # Compare the strategies on the training split of a run made with the "none" strategy, e.g.
+    # python -m diabetes.ml.model.rebalancing artifact/<timestamp>/data_transformation/transformed
+    import os
+
+    from diabetes.constant.Training_pipeline import DATA_TRANSFORMATION_TRAIN_LABEL_FILE_NAME, TRAIN_FILE_NAME
+    from diabetes.utils.main_utils import load_numpy_array_data
+
+    transformed_dir = sys.argv[1]
+    x_train = load_numpy_array_data(os.path.join(transformed_dir, TRAIN_FILE_NAME.replace("csv", "npy")))
+    y_train = load_numpy_array_data(os.path.join(transformed_dir, DATA_TRANSFORMATION_TRAIN_LABEL_FILE_NAME))
+    for result in benchmark(x_train, y_train):
+        print(result)
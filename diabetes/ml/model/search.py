@@ -0,0 +1,177 @@
+import sys
+import time
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from sklearn.experimental import enable_halving_search_cv  # noqa: F401  (enables HalvingGridSearchCV)
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.linear_model import LogisticRegression
+from sklearn.model_selection import HalvingGridSearchCV, StratifiedKFold
+from xgboost import XGBClassifier
+
+from diabetes.exception import CustomException
+from diabetes.logger import logging
+from diabetes.ml.model.artifact import NATIVE_MODEL_TYPES
+from diabetes.ml.model.rebalancing import class_weight_params
+
+# Families that config/model.yaml can list under `candidates`
+MODEL_FAMILIES = {
+    "xgboost": XGBClassifier,
+    "random_forest": RandomForestClassifier,
+    "logistic_regression": LogisticRegression,
+}
+
+
+def measure_latency(model, x: np.ndarray, batch_sizes: Sequence[int] = (1, 1024), repeats: int = 30,
+                    seed: int = 0) -> Dict[str, float]:
+    """Median and p99 predict_proba wall time in milliseconds for each batch size."""
+    rng = np.random.default_rng(seed)
+    latency = {}
+    for batch_size in batch_sizes:
+        batch = x[rng.integers(0, len(x), batch_size)]
+        model.predict_proba(batch)
+        timings = []
+        for _ in range(repeats):
+            start = time.perf_counter()
+            model.predict_proba(batch)
+            timings.append((time.perf_counter() - start) * 1e3)
+        latency[f"p50_ms_batch_{batch_size}"] = float(np.percentile(timings, 50))
+        latency[f"p99_ms_batch_{batch_size}"] = float(np.percentile(timings, 99))
+    return latency
+
+
+class CandidateSearch:
+    """
+    Successive halving over every family and grid in the model config.
+
+    Each family runs a HalvingGridSearchCV whose folds and candidates are fit in
+    parallel on a joblib process pool (n_jobs). Every round keeps the best
+    1/factor of the configs by cross-validated score and gives them factor times
+    more samples, so losing configs are cut after being fit on a small subset.
+    The winner is the family finalist with the best CV score. The leaderboard
+    lists each config at the last round it reached, with its fit and score times.
+    Finalists are refit on all rows from `params` and the best grid point, without
+    the family's `search_params` (settings such as n_jobs: 1 that only suit the many
+    parallel search fits), and get predict_proba latency measured on that model.
+    With scale_pos_weight set (class_weight rebalancing) every family is fitted with
+    the positive class weighted that many times the negative one.
+
+    With search.require_native_artifact (the default) only families that
+    save_native_model can export are searched, so the winner always ships with the
+    pickle-free artifact the server loads fastest; other families are skipped.
+    """
+
+    def __init__(self, model_config: dict, scale_pos_weight: Optional[float] = None):
+        self.search_config = model_config.get("search", {})
+        self.candidates = model_config.get("candidates", {})
+        self.scale_pos_weight = scale_pos_weight
+        unknown = [family for family in self.candidates if family not in MODEL_FAMILIES]
+        if unknown:
+            raise ValueError(f"Unknown model families {unknown}, expected some of {list(MODEL_FAMILIES)}")
+
+    def families(self) -> List[str]:
+        """Configured families to search, without those lacking a native artifact when one is required"""
+        if not self.search_config.get("require_native_artifact", True):
+            return list(self.candidates)
+        families = [family for family in self.candidates if issubclass(MODEL_FAMILIES[family], NATIVE_MODEL_TYPES)]
+        skipped = [family for family in self.candidates if family not in families]
+        if skipped:
+            logging.info(f"Skipping model families without a native artifact: {skipped} "
+                         f"(set search.require_native_artifact to false to search them)")
+        return families
+
+    def _estimator(self, family: str, search_time: bool = False, **grid_params):
+        """Estimator of a family from its params, class weights and grid point; search_params only at search time"""
+        candidate = self.candidates[family] or {}
+        estimator_cls = MODEL_FAMILIES[family]
+        return estimator_cls(**{**(candidate.get("params") or {}),
+                                **((candidate.get("search_params") or {}) if search_time else {}),
+                                **class_weight_params(estimator_cls, self.scale_pos_weight),
+                                **grid_params})
+
+    def _search_family(self, family: str, x: np.ndarray, y: np.ndarray) -> HalvingGridSearchCV:
+        candidate = self.candidates[family] or {}
+        estimator = self._estimator(family, search_time=True)
+        random_state = self.search_config.get("random_state", 42)
+        search = HalvingGridSearchCV(
+            estimator,
+            param_grid=candidate.get("grid") or {},
+            factor=self.search_config.get("factor", 3),
+            cv=StratifiedKFold(n_splits=self.search_config.get("cv", 5), shuffle=True, random_state=random_state),
+            scoring=self.search_config.get("scoring", "f1"),
+            n_jobs=self.search_config.get("n_jobs", -1),
+            random_state=random_state,
+            refit=False,
+        )
+        start = time.perf_counter()
+        search.fit(x, y)
+        logging.info(f"{family}: best cv {search.scoring} {search.best_score_:.4f} with {search.best_params_} "
+                     f"({len(search.cv_results_['params'])} fits over {search.n_iterations_} rounds "
+                     f"in {time.perf_counter() - start:.1f}s)")
+        return search
+
+    @staticmethod
+    def _leaderboard_rows(family: str, search: HalvingGridSearchCV) -> List[dict]:
+        results = search.cv_results_
+        last_round = {}
+        for i, params in enumerate(results["params"]):
+            # rows are ordered by round, so the last row of a config is the furthest it got
+            last_round[repr(sorted(params.items()))] = i
+        rows = []
+        for i in last_round.values():
+            rows.append({
+                "family": family,
+                "params": {key: (value.item() if hasattr(value, "item") else value)
+                           for key, value in results["params"][i].items()},
+                "round": int(results["iter"][i]),
+                "n_resources": int(results["n_resources"][i]),
+                "survived": bool(results["iter"][i] == search.n_iterations_ - 1),
+                "cv_score_mean": float(results["mean_test_score"][i]),
+                "cv_score_std": float(results["std_test_score"][i]),
+                "mean_fit_seconds": float(results["mean_fit_time"][i]),
+                "mean_score_seconds": float(results["mean_score_time"][i]),
+            })
+        return rows
+
+    def fit(self, x: np.ndarray, y: np.ndarray) -> Tuple[object, dict]:
+        """Return the winning refit estimator and the leaderboard."""
+        try:
+            repeats = self.search_config.get("latency_repeats", 30)
+            rows, finalists = [], []
+            for family in self.families():
+                search = self._search_family(family, x, y)
+                rows.extend(self._leaderboard_rows(family, search))
+
+                best_params = {key: (value.item() if hasattr(value, "item") else value)
+                               for key, value in search.best_params_.items()}
+                start = time.perf_counter()
+                estimator = self._estimator(family, **best_params).fit(x, y)
+                finalists.append({
+                    "family": family,
+                    "params": best_params,
+                    "cv_score": float(search.best_score_),
+                    "refit_seconds": time.perf_counter() - start,
+                    **measure_latency(estimator, x, repeats=repeats),
+                    "_estimator": estimator,
+                })
+                summary = {key: value for key, value in finalists[-1].items() if key != "_estimator"}
+                logging.info(f"{family} finalist: {summary}")
+
+            if not finalists:
+                raise ValueError("No candidate model families to search; with search.require_native_artifact "
+                                 "at least one family must have a native artifact (xgboost)")
+            finalists.sort(key=lambda finalist: finalist["cv_score"], reverse=True)
+            rows.sort(key=lambda row: (row["survived"], row["cv_score_mean"]), reverse=True)
+            winner = finalists[0].pop("_estimator")
+            for finalist in finalists[1:]:
+                finalist.pop("_estimator")
+
+            leaderboard = {
+                "scoring": self.search_config.get("scoring", "f1"),
+                "winner": finalists[0]["family"],
+                "finalists": finalists,
+                "candidates": rows,
+            }
+            return winner, leaderboard
+        except Exception as e:
+            raise CustomException(e, sys)
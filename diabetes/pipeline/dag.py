@@ -0,0 +1,203 @@
+import os
+import resource
+import sys
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from diabetes.exception import CustomException
+from diabetes.logger import logging
+
+THREAD, PROCESS = "thread", "process"
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+
+def current_rss_bytes() -> int:
+    """Resident set size of this process; falls back to the lifetime peak where /proc is missing."""
+    try:
+        with open("/proc/self/statm") as file_obj:
+            return int(file_obj.read().split()[1]) * _PAGE_SIZE
+    except (OSError, ValueError, IndexError):
+        # ru_maxrss is in KiB on Linux and bytes on macOS
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+
+
+@dataclass
+class StageNode:
+    """
+    One pipeline stage. `fn` is called with the outputs of `inputs` (stage names),
+    in that order, and its return value is the output other stages depend on.
+    """
+    name: str
+    fn: Callable[..., Any]
+    inputs: Tuple[str, ...] = ()
+
+
+@dataclass
+class StageRun:
+    name: str
+    status: str = "pending"
+    start_seconds: Optional[float] = None
+    wall_seconds: Optional[float] = None
+    peak_rss_mb: Optional[float] = None
+    rss_growth_mb: Optional[float] = None
+    error: Optional[str] = None
+    _rss_at_start: int = field(default=0, repr=False)
+    _peak_rss: int = field(default=0, repr=False)
+
+    def to_dict(self) -> dict:
+        return {key: value for key, value in self.__dict__.items() if not key.startswith("_")}
+
+
+def _call_in_worker(fn: Callable, args: Sequence) -> Tuple[Any, float, int]:
+    """Runs in a process-pool worker, which measures its own time and peak memory."""
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start, current_rss_bytes()
+
+
+class DagScheduler:
+    """
+    Runs StageNodes as soon as all of their inputs are available, with up to
+    max_workers stages in flight on a thread pool (default) or a process pool.
+
+    Stages on a process pool must be picklable, as must their inputs and
+    outputs. In thread mode a sampler thread reads the process RSS every
+    sample_interval seconds. Each running stage records the highest value seen
+    while it ran, so stages that overlap share the same peak. On the first
+    failure no new stages are started; running ones finish and the error is
+    re-raised.
+    """
+
+    def __init__(self, max_workers: int = 2, executor: str = THREAD, sample_interval: float = 0.05):
+        if executor not in (THREAD, PROCESS):
+            raise ValueError(f"Unknown executor '{executor}'")
+        self.max_workers = max(1, max_workers)
+        self.executor = executor
+        self.sample_interval = sample_interval
+        self.runs: Dict[str, StageRun] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def validate(nodes: Sequence[StageNode]) -> List[str]:
+        """Check names and inputs and return a topological order; raises on cycles."""
+        by_name = {node.name: node for node in nodes}
+        if len(by_name) != len(nodes):
+            raise ValueError("Duplicate stage names in the pipeline DAG")
+        for node in nodes:
+            missing = [name for name in node.inputs if name not in by_name]
+            if missing:
+                raise ValueError(f"Stage '{node.name}' depends on unknown stages {missing}")
+
+        order, state = [], {}
+        def visit(name: str, path: Tuple[str, ...]) -> None:
+            if state.get(name) == "done":
+                return
+            if state.get(name) == "visiting":
+                raise ValueError(f"Cycle in the pipeline DAG: {' -> '.join(path + (name,))}")
+            state[name] = "visiting"
+            for dependency in by_name[name].inputs:
+                visit(dependency, path + (name,))
+            state[name] = "done"
+            order.append(name)
+        for node in nodes:
+            visit(node.name, ())
+        return order
+
+    def _sample_memory(self, stop_event: threading.Event) -> None:
+        while not stop_event.wait(self.sample_interval):
+            rss = current_rss_bytes()
+            with self._lock:
+                for run in self.runs.values():
+                    if run.status == "running":
+                        run._peak_rss = max(run._peak_rss, rss)
+
+    def _run_in_thread(self, node: StageNode, args: Sequence) -> Any:
+        run = self.runs[node.name]
+        rss = current_rss_bytes()
+        with self._lock:
+            run._rss_at_start, run._peak_rss = rss, rss
+        start = time.perf_counter()
+        try:
+            return node.fn(*args)
+        finally:
+            run.wall_seconds = time.perf_counter() - start
+            rss = current_rss_bytes()
+            with self._lock:
+                run._peak_rss = max(run._peak_rss, rss)
+
+    def run(self, nodes: Sequence[StageNode]) -> Dict[str, Any]:
+        """Run the DAG and return every stage's output by name."""
+        try:
+            self.validate(nodes)
+            self.runs = {node.name: StageRun(node.name) for node in nodes}
+
+            stop_sampling = threading.Event()
+            if self.executor == THREAD:
+                threading.Thread(target=self._sample_memory, args=(stop_sampling,),
+                                 name="dag-memory-sampler", daemon=True).start()
+            try:
+                results, failures = self._schedule({node.name: node for node in nodes})
+            finally:
+                stop_sampling.set()
+
+            for run in self.runs.values():
+                if run.status == "pending":
+                    run.status = "skipped"
+            if failures:
+                raise failures[0]
+            return results
+        except Exception as e:
+            raise CustomException(e, sys)
+
+    def _schedule(self, by_name: Dict[str, StageNode]) -> Tuple[Dict[str, Any], List[BaseException]]:
+        results: Dict[str, Any] = {}
+        failures: List[BaseException] = []
+        running: Dict[Future, str] = {}
+        started_at = time.perf_counter()
+        pool_cls = ThreadPoolExecutor if self.executor == THREAD else ProcessPoolExecutor
+
+        with pool_cls(max_workers=self.max_workers) as pool:
+            while True:
+                for name, node in by_name.items():
+                    run = self.runs[name]
+                    if failures or run.status != "pending" or len(running) >= self.max_workers:
+                        continue
+                    if all(self.runs[dependency].status == "done" for dependency in node.inputs):
+                        args = [results[dependency] for dependency in node.inputs]
+                        run.status = "running"
+                        run.start_seconds = round(time.perf_counter() - started_at, 3)
+                        logging.info(f"DAG: starting stage {name}")
+                        if self.executor == THREAD:
+                            future = pool.submit(self._run_in_thread, node, args)
+                        else:
+                            future = pool.submit(_call_in_worker, node.fn, args)
+                        running[future] = name
+                if not running:
+                    return results, failures
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    run = self.runs[name]
+                    try:
+                        output = future.result()
+                        if self.executor == PROCESS:
+                            output, run.wall_seconds, run._peak_rss = output
+                        results[name] = output
+                        run.status = "done"
+                    except Exception as e:
+                        run.status, run.error = "failed", str(e)
+                        failures.append(e)
+                    run.wall_seconds = round(run.wall_seconds or 0.0, 3)
+                    run.peak_rss_mb = round(run._peak_rss / 2 ** 20, 1)
+                    if self.executor == THREAD:
+                        run.rss_growth_mb = round((run._peak_rss - run._rss_at_start) / 2 ** 20, 1)
+                    logging.info(f"DAG: stage {name} {run.status} in {run.wall_seconds:.2f}s, "
+                                 f"peak rss {run.peak_rss_mb} MB")
+
+    def report(self) -> dict:
+        return {name: run.to_dict() for name, run in self.runs.items()}
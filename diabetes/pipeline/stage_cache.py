@@ -0,0 +1,192 @@
+import dataclasses
+import hashlib
+import inspect
+import json
+import os
+import sys
+import threading
+from datetime import datetime
+from typing import Dict, Iterable, Optional
+
+from diabetes.constant import Training_pipeline
+from diabetes.constant.Training_pipeline import SCHEMA_FILE_PATH
+from diabetes.entity import artifact_entity
+from diabetes.exception import CustomException
+from diabetes.logger import logging
+
+PACKAGE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# modules every stage goes through besides its own component
+SHARED_SOURCE_DIRS = ("entity", "utils", "data_access", "ml", "constant")
+
+
+def _sha256_update_file(digest, file_path: str) -> None:
+    with open(file_path, "rb") as file_obj:
+        for chunk in iter(lambda: file_obj.read(1 << 20), b""):
+            digest.update(chunk)
+
+
+def file_fingerprint(file_path: str) -> Optional[str]:
+    if not os.path.exists(file_path):
+        return None
+    digest = hashlib.sha256()
+    _sha256_update_file(digest, file_path)
+    return digest.hexdigest()
+
+
+def source_fingerprint(paths: Iterable[str]) -> str:
+    """Hash of every .py file under paths (files or directories), in a stable order."""
+    files = set()
+    for path in paths:
+        if os.path.isdir(path):
+            for root, _, names in os.walk(path):
+                files.update(os.path.join(root, name) for name in names if name.endswith(".py"))
+        elif os.path.exists(path):
+            files.add(path)
+    digest = hashlib.sha256()
+    for file_path in sorted(files):
+        digest.update(os.path.relpath(file_path, PACKAGE_DIR).encode())
+        _sha256_update_file(digest, file_path)
+    return digest.hexdigest()
+
+
+def component_fingerprint(component_cls: type) -> str:
+    """Code version of a stage: its component module plus the shared package modules."""
+    return source_fingerprint([inspect.getsourcefile(component_cls)] +
+                              [os.path.join(PACKAGE_DIR, name) for name in SHARED_SOURCE_DIRS])
+
+
+def artifact_to_dict(artifact) -> dict:
+    return {"type": type(artifact).__name__, "fields": dataclasses.asdict(artifact)}
+
+
+def artifact_from_dict(record: dict):
+    """Rebuild an *Artifact dataclass, including nested metric artifacts."""
+    cls = getattr(artifact_entity, record["type"])
+    values = {}
+    for field in dataclasses.fields(cls):
+        value = record["fields"].get(field.name)
+        if isinstance(value, dict) and dataclasses.is_dataclass(field.type):
+            value = field.type(**value)
+        values[field.name] = value
+    return cls(**values)
+
+
+def _artifact_files_exist(artifact) -> bool:
+    """Every *_path field that is set must still point at an existing file."""
+    for field in dataclasses.fields(artifact):
+        value = getattr(artifact, field.name)
+        if field.name.endswith("_path") and isinstance(value, str) and not os.path.exists(value):
+            return False
+    return True
+
+
+class StageCache:
+    """
+    Content-addressed cache of stage outputs.
+
+    A stage key hashes the stage name, its inputs (data fingerprint or upstream
+    stage keys), schema.yaml, the Training_pipeline constants and the code version
+    of the stage. A hit returns the artifact recorded for that key, whose paths
+    point into the artifact/<timestamp>/ tree of the run that computed it; a hit
+    whose files have been deleted counts as a miss.
+    """
+
+    RECORD_FILE_NAME = "record.json"
+
+    def __init__(self, cache_dir: str):
+        self.cache_dir = cache_dir
+        self._environment = {
+            "schema": file_fingerprint(SCHEMA_FILE_PATH),
+            "constants": source_fingerprint([inspect.getsourcefile(Training_pipeline)]),
+        }
+
+    def key(self, stage_name: str, component_cls: type, inputs: Dict[str, Optional[str]]) -> str:
+        payload = {
+            "stage": stage_name,
+            "inputs": inputs,
+            "code": component_fingerprint(component_cls),
+            **self._environment,
+        }
+        return hashlib.sha256(json.dumps(payload, sort_keys=True).encode()).hexdigest()
+
+    def _record_path(self, stage_name: str, key: str) -> str:
+        return os.path.join(self.cache_dir, stage_name, key, self.RECORD_FILE_NAME)
+
+    def get(self, stage_name: str, key: str):
+        try:
+            record_path = self._record_path(stage_name, key)
+            if not os.path.exists(record_path):
+                return None
+            with open(record_path) as file_obj:
+                artifact = artifact_from_dict(json.load(file_obj)["artifact"])
+            if not _artifact_files_exist(artifact):
+                logging.info(f"Stage cache entry {stage_name}/{key[:12]} lost its files, recomputing")
+                return None
+            return artifact
+        except Exception as e:
+            raise CustomException(e, sys)
+
+    def put(self, stage_name: str, key: str, artifact) -> None:
+        try:
+            record_path = self._record_path(stage_name, key)
+            os.makedirs(os.path.dirname(record_path), exist_ok=True)
+            tmp_record_path = f"{record_path}.tmp"
+            with open(tmp_record_path, "w") as file_obj:
+                json.dump({"created_at": datetime.now().isoformat(), "artifact": artifact_to_dict(artifact)},
+                          file_obj, indent=2)
+            os.replace(tmp_record_path, record_path)
+        except Exception as e:
+            raise CustomException(e, sys)
+
+
+class RunState:
+    """
+    Progress of the latest pipeline run, rewritten after every completed stage so
+    `--resume` can pick up after the last successful stage of a failed run.
+    """
+
+    RUNNING, FAILED, SUCCEEDED = "running", "failed", "succeeded"
+
+    def __init__(self, file_path: str):
+        self.file_path = file_path
+        self.state = {"timestamp": None, "status": None, "stages": {}}
+        # stages finish on different scheduler threads
+        self._lock = threading.Lock()
+
+    def load(self) -> Optional[dict]:
+        if not os.path.exists(self.file_path):
+            return None
+        with open(self.file_path) as file_obj:
+            return json.load(file_obj)
+
+    def resumable(self) -> Optional[dict]:
+        """
+        The previous run's state if it failed, else None. A run left "running" was
+        killed, possibly before its artifacts were flushed, so it is not resumed.
+        """
+        state = self.load()
+        if state is None or state["status"] != self.FAILED:
+            return None
+        return state
+
+    def start(self, timestamp: str, stages: Optional[dict] = None) -> None:
+        self.state = {"timestamp": timestamp, "status": self.RUNNING, "stages": dict(stages or {})}
+        self._write()
+
+    def record(self, stage_name: str, key: Optional[str], artifact) -> None:
+        record = {"key": key, "artifact": artifact_to_dict(artifact)}
+        with self._lock:
+            self.state["stages"] = {**self.state["stages"], stage_name: record}
+        self._write()
+
+    def finish(self, succeeded: bool) -> None:
+        self.state["status"] = self.SUCCEEDED if succeeded else self.FAILED
+        self._write()
+
+    def _write(self) -> None:
+        with self._lock:
+            os.makedirs(os.path.dirname(self.file_path) or ".", exist_ok=True)
+            tmp_file_path = f"{self.file_path}.tmp"
+            with open(tmp_file_path, "w") as file_obj:
+                json.dump(self.state, file_obj, indent=2)
+            os.replace(tmp_file_path, self.file_path)
@@ -1,7 +1,9 @@
 from diabetes.entity.config_entity import TrainingPipelineConfig,DataIngestionConfig,DataValidationConfig,DataTransformationConfig
 from diabetes.entity.artifact_entity import DataIngestionArtifact, DataValidationArtifact,DataTransformationArtifact
 from diabetes.entity.artifact_entity import ModelEvaluationArtifact,ModelPusherArtifact,ModelTrainerArtifact
+from diabetes.entity.artifact_entity import PredictionTableArtifact, DataDriftArtifact
 from diabetes.entity.config_entity import ModelPusherConfig,ModelEvaluationConfig,ModelTrainerConfig
+from diabetes.entity.config_entity import PredictionTableConfig
 
 
 from diabetes.exception import CustomException
@@ -13,8 +15,19 @@ from diabetes.components.data_transformation import DataTransformation
 from diabetes.components.model_trainer import ModelTrainer
 from diabetes.components.model_evaluation import ModelEvaluation
 from diabetes.components.model_pusher import ModelPusher
+from diabetes.components.prediction_table import PredictionTableBuilder
 
 from diabetes.constant.Training_pipeline import SAVED_MODEL_DIR
+from diabetes.constant.Training_pipeline import ARTIFACT_STORE_IN_MEMORY, ARTIFACT_STORE_PERSIST
+from diabetes.constant.Training_pipeline import RUN_STATE_FILE_PATH, STAGE_CACHE_DIR, STAGE_CACHE_ENABLED
+from diabetes.ml.model.estimator import ModelResolver
+from diabetes.pipeline.stage_cache import RunState, StageCache, artifact_from_dict, file_fingerprint
+from diabetes.constant.Training_pipeline import PIPELINE_MAX_WORKERS, PIPELINE_REPORT_FILE_NAME
+from diabetes.pipeline.dag import DagScheduler, StageNode
+from diabetes.utils.artifact_store import ArtifactStore
+from diabetes.utils.main_utils import write_yaml_file
+from datetime import datetime
+import argparse
 
 
 # from diabetes.cloud_storage.s3_syncer import S3Sync
@@ -23,8 +36,53 @@ from diabetes.constant.Training_pipeline import SAVED_MODEL_DIR
 class TrainPipeline:
     # is_pipeline_running = False
 
-    def __init__(self):
-        self.training_pipeline_config = TrainingPipelineConfig()
+    def __init__(self, resume: bool = False, use_cache: bool = STAGE_CACHE_ENABLED,
+                 max_workers: int = PIPELINE_MAX_WORKERS):
+        self.max_workers = max_workers
+        self.run_state = RunState(RUN_STATE_FILE_PATH)
+        self.stage_cache = StageCache(STAGE_CACHE_DIR) if use_cache else None
+        self.stage_keys = {}
+        self._pending_cache_records = []
+
+        # --resume: continue the last failed run in its own artifact dir, reusing its completed stages
+        previous_run = self.run_state.resumable() if resume else None
+        if previous_run is not None:
+            logging.info(f"Resuming run {previous_run['timestamp']} after stages {list(previous_run['stages'])}")
+            self.training_pipeline_config = TrainingPipelineConfig(
+                timestamp=datetime.strptime(previous_run["timestamp"], "%m_%d_%Y_%H_%M_%S"))
+            self._resume_stages = previous_run["stages"]
+        else:
+            if resume:
+                logging.info("No failed run to resume, starting a new run")
+            self.training_pipeline_config = TrainingPipelineConfig()
+            self._resume_stages = {}
+
+        self.artifact_store = ArtifactStore(keep_in_memory=ARTIFACT_STORE_IN_MEMORY, persist=ARTIFACT_STORE_PERSIST)
+
+
+    def _run_stage(self, stage_name: str, component_cls: type, inputs, compute):
+        """
+        Return the stage artifact from the resumed run, else from the stage cache
+        when the hash of inputs() matches, else by calling compute().
+        """
+        resumed = self._resume_stages.get(stage_name)
+        if resumed is not None:
+            artifact, key = artifact_from_dict(resumed["artifact"]), resumed["key"]
+            logging.info(f"{stage_name}: reused from the resumed run")
+        else:
+            key = self.stage_cache.key(stage_name, component_cls, inputs()) if self.stage_cache else None
+            artifact = self.stage_cache.get(stage_name, key) if key else None
+            if artifact is not None:
+                logging.info(f"{stage_name}: stage cache hit {key[:12]}")
+            else:
+                artifact = compute()
+                if key:
+                    # recorded once the artifact store has flushed the files to disk
+                    self._pending_cache_records.append((stage_name, key, artifact))
+        self.stage_keys[stage_name] = key
+        self.run_state.record(stage_name, key, artifact)
+        return artifact
+
 
 
     def start_data_ingestion(self)->DataIngestionArtifact:
@@ -33,9 +91,19 @@ class TrainPipeline:
 
             logging.info("Starting data ingestion")
 
-            data_ingestion = DataIngestion(data_ingestion_config=self.data_ingestion_config)
+            data_ingestion = DataIngestion(data_ingestion_config=self.data_ingestion_config,
+                                           artifact_store=self.artifact_store)
+
+            # the data fingerprint needs the exported feature store, so export it once up front
+            exported = {}
+            def inputs():
+                exported["feature_store_file_path"] = data_ingestion.export_feature_store()
+                return {"data": file_fingerprint(exported["feature_store_file_path"])}
 
-            data_ingestion_artifact = data_ingestion.initiate_data_ingestion()
+            data_ingestion_artifact = self._run_stage(
+                "data_ingestion", DataIngestion, inputs,
+                lambda: data_ingestion.initiate_data_ingestion(
+                    feature_store_file_path=exported.get("feature_store_file_path")))
 
             logging.info(f"Data ingestion completed and artifact: {data_ingestion_artifact}")
             return data_ingestion_artifact
@@ -50,23 +118,56 @@ class TrainPipeline:
                 training_pipeline_config=self.training_pipeline_config)
             data_validation = DataValidation(
             data_ingestion_artifact=data_ingestion_artifact,
-            data_validation_config = data_validation_config
+            data_validation_config = data_validation_config,
+            artifact_store=self.artifact_store
             )
 
-            data_validation_artifact = data_validation.initiate_data_validation()
+            # drift detection is its own DAG node (start_data_drift), so only the schema checks run here
+            data_validation_artifact = self._run_stage(
+                "data_validation", DataValidation,
+                lambda: {"data_ingestion": self.stage_keys.get("data_ingestion")},
+                lambda: data_validation.initiate_data_validation(detect_drift=False))
 
             return data_validation_artifact
         
         except  Exception as e:
             raise  CustomException(e,sys)
         
+    def start_data_drift(self,data_ingestion_artifact:DataIngestionArtifact)->DataDriftArtifact:
+        try:
+            data_validation_config = DataValidationConfig(
+                training_pipeline_config=self.training_pipeline_config)
+            data_validation = DataValidation(
+            data_ingestion_artifact=data_ingestion_artifact,
+            data_validation_config = data_validation_config,
+            artifact_store=self.artifact_store
+            )
+
+            # the report also compares against the served model's baseline sketch
+            serving_sketch_path = data_validation.serving_baseline_sketch_path()
+
+            data_drift_artifact = self._run_stage(
+                "data_drift", DataValidation,
+                lambda: {"data_ingestion": self.stage_keys.get("data_ingestion"),
+                         "serving_sketch": file_fingerprint(serving_sketch_path) if serving_sketch_path else None},
+                data_validation.initiate_drift_detection)
+
+            return data_drift_artifact
+
+        except  Exception as e:
+            raise  CustomException(e,sys)
+
     def start_data_transformation(self,data_validation_artifact:DataValidationArtifact):
         try:
             data_transformation_config = DataTransformationConfig(training_pipeline_config=self.training_pipeline_config)
             data_transformation = DataTransformation(data_validation_artifact=data_validation_artifact,
-            data_transformation_config=data_transformation_config
+            data_transformation_config=data_transformation_config,
+            artifact_store=self.artifact_store
             )
-            data_transformation_artifact =  data_transformation.initiate_data_transformation()
+            data_transformation_artifact = self._run_stage(
+                "data_transformation", DataTransformation,
+                lambda: {"data_validation": self.stage_keys.get("data_validation")},
+                data_transformation.initiate_data_transformation)
             return data_transformation_artifact
         
         except  Exception as e:
@@ -76,9 +177,13 @@ class TrainPipeline:
         try:
             model_trainer_config = ModelTrainerConfig(training_pipeline_config=self.training_pipeline_config)
 
-            model_trainer = ModelTrainer(model_trainer_config, data_transformation_artifact)
+            model_trainer = ModelTrainer(model_trainer_config, data_transformation_artifact, self.artifact_store)
 
-            model_trainer_artifact = model_trainer.initiate_model_trainer()
+            model_trainer_artifact = self._run_stage(
+                "model_trainer", ModelTrainer,
+                lambda: {"data_transformation": self.stage_keys.get("data_transformation"),
+                         "model_config": file_fingerprint(model_trainer_config.model_config_file_path)},
+                model_trainer.initiate_model_trainer)
 
             
             return model_trainer_artifact
@@ -96,19 +201,56 @@ class TrainPipeline:
         try:
             model_eval_config = ModelEvaluationConfig(self.training_pipeline_config)
 
-            model_eval = ModelEvaluation(model_eval_config, data_validation_artifact, model_trainer_artifact)
+            model_eval = ModelEvaluation(model_eval_config, data_validation_artifact, model_trainer_artifact,
+                                         self.artifact_store)
+
+            # the verdict also depends on the model currently being served
+            model_resolver = ModelResolver()
+            best_model_path = model_resolver.get_best_model_path() if model_resolver.is_model_exists() else None
+
+            model_eval_artifact = self._run_stage(
+                "model_evaluation", ModelEvaluation,
+                lambda: {"data_validation": self.stage_keys.get("data_validation"),
+                         "model_trainer": self.stage_keys.get("model_trainer"),
+                         "best_model": file_fingerprint(best_model_path) if best_model_path else None},
+                model_eval.initiate_model_evaluation)
+
+            if not model_eval_artifact.is_model_accepted:
+                raise Exception("Trained model is not better than the best model")
 
-            model_eval_artifact = model_eval.initiate_model_evaluation()
             return model_eval_artifact
         
         except  Exception as e:
             raise  CustomException(e,sys)
 
-    def start_model_pusher(self,model_eval_artifact:ModelEvaluationArtifact):
+    def start_prediction_table(self,model_eval_artifact:ModelEvaluationArtifact)->PredictionTableArtifact:
+        try:
+            prediction_table_config = PredictionTableConfig(training_pipeline_config=self.training_pipeline_config)
+
+            prediction_table_builder = PredictionTableBuilder(prediction_table_config, model_eval_artifact,
+                                                              self.artifact_store)
+
+            prediction_table_artifact = self._run_stage(
+                "prediction_table", PredictionTableBuilder,
+                lambda: {"model_trainer": self.stage_keys.get("model_trainer")},
+                prediction_table_builder.initiate_prediction_table)
+
+            return prediction_table_artifact
+
+        except  Exception as e:
+            raise  CustomException(e,sys)
+
+    def start_model_pusher(self,model_eval_artifact:ModelEvaluationArtifact,
+                           prediction_table_artifact:PredictionTableArtifact=None,
+                           data_drift_artifact:DataDriftArtifact=None):
         try:
             model_pusher_config = ModelPusherConfig(training_pipeline_config=self.training_pipeline_config)
 
-            model_pusher = ModelPusher(model_pusher_config, model_eval_artifact)
+            # the pusher copies files, so every pending artifact has to be on disk first
+            self.artifact_store.flush()
+
+            model_pusher = ModelPusher(model_pusher_config, model_eval_artifact, prediction_table_artifact,
+                                       data_drift_artifact)
             
             model_pusher_artifact = model_pusher.initiate_model_pusher()
 
@@ -118,28 +260,59 @@ class TrainPipeline:
             raise  CustomException(e,sys)
 
 
+    def pipeline_nodes(self):
+        """
+        The pipeline as a DAG: each start_* method is a node that receives the
+        artifacts of its inputs. Drift detection only needs the ingested split, so
+        it runs alongside validation, transformation and training.
+        """
+        return [
+            StageNode("data_ingestion", self.start_data_ingestion),
+            StageNode("data_validation", self.start_data_validaton, inputs=("data_ingestion",)),
+            StageNode("data_drift", self.start_data_drift, inputs=("data_ingestion",)),
+            StageNode("data_transformation", self.start_data_transformation, inputs=("data_validation",)),
+            StageNode("model_trainer", self.start_model_trainer, inputs=("data_transformation",)),
+            StageNode("model_evaluation", self.start_model_evaluation, inputs=("data_validation", "model_trainer")),
+            StageNode("prediction_table", self.start_prediction_table, inputs=("model_evaluation",)),
+            StageNode("model_pusher", self.start_model_pusher,
+                      inputs=("model_evaluation", "prediction_table", "data_drift")),
+        ]
+
+
     def run_pipeline(self):
+        succeeded = False
+        self.run_state.start(self.training_pipeline_config.timestamp, self._resume_stages)
+        scheduler = DagScheduler(max_workers=self.max_workers)
         try:
             # TrainPipeline.is_pipeline_running = True
-            data_ingestion_artifact:DataIngestionArtifact = self.start_data_ingestion()
-
-             
-            data_validation_artifact = self.start_data_validaton(
-                data_ingestion_artifact = data_ingestion_artifact)
-            
-            data_transformation_artifact = self.start_data_transformation(
-                data_validation_artifact=data_validation_artifact)
-            
-            model_trainer_artifact = self.start_model_trainer(data_transformation_artifact)
-
-            model_eval_artifact = self.start_model_evaluation(data_validation_artifact, model_trainer_artifact) 
-            
-            if not model_eval_artifact.is_model_accepted:
-                raise Exception("Trained model is not better than the best model")  
-            
-            model_pusher_artifact = self.start_model_pusher(model_eval_artifact) 
+            self.artifacts = scheduler.run(self.pipeline_nodes())
+            succeeded = True
             # # TrainPipeline.is_pipeline_running = False
 
         except Exception as e :
             # TrainPipeline.is_pipeline_running = False
             raise  CustomException(e,sys)
+        finally:
+            # persist whatever the run produced so a later run can resume from disk
+            self.artifact_store.close()
+            for stage_name, key, artifact in self._pending_cache_records:
+                self.stage_cache.put(stage_name, key, artifact)
+            self._pending_cache_records = []
+            self.run_state.finish(succeeded)
+
+            stage_report = scheduler.report()
+            write_yaml_file(os.path.join(self.training_pipeline_config.artifact_dir, PIPELINE_REPORT_FILE_NAME),
+                            {"max_workers": self.max_workers, "stages": stage_report})
+            logging.info(f"Pipeline stage report: {stage_report}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the diabetes training pipeline")
+    parser.add_argument("--resume", action="store_true",
+                        help="continue the last failed run after its last successful stage")
+    parser.add_argument("--no-cache", action="store_true", help="recompute every stage")
+    parser.add_argument("--max-workers", type=int, default=PIPELINE_MAX_WORKERS,
+                        help="how many independent stages may run at once")
+    args = parser.parse_args()
+
+    TrainPipeline(resume=args.resume, use_cache=STAGE_CACHE_ENABLED and not args.no_cache,
+                  max_workers=args.max_workers).run_pipeline()
@@ -0,0 +1,173 @@
+import asyncio
+import logging
+import time
+from collections import Counter
+from typing import Any, Callable, Dict, Hashable, List, Optional, Sequence
+
+import numpy as np
+
+from diabetes.serving.executor import ExecutorPool
+
+logger = logging.getLogger(__name__)
+
+
+class MicroBatcher:
+    """
+    Coalesces concurrent single-row prediction requests into one vectorized call.
+
+    Callers submit one feature row with a key and await a future. A background task
+    drains the queue whenever `max_batch_size` rows are waiting or `max_wait_ms` has
+    elapsed since the first row of the batch arrived, stacks the rows of each key into
+    one matrix, runs `predict_fn(key, rows)` once per key and resolves every caller's
+    future with its own result. Keying rows by the model that should score them keeps
+    a batch collected across a hot swap from scoring rows with a version other than
+    the one their request started on.
+    When an `executor` is given, `predict_fn` runs on its thread pool so the event
+    loop keeps accepting requests while a batch is scored.
+    """
+
+    def __init__(self, predict_fn: Callable[[Any, np.ndarray], np.ndarray],
+                 max_batch_size: int = 64, max_wait_ms: float = 5.0,
+                 executor: Optional[ExecutorPool] = None):
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size must be at least 1")
+        self.predict_fn = predict_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.executor = executor
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+
+        # Metrics
+        self.batch_count = 0
+        self.item_count = 0
+        self.max_observed_batch_size = 0
+        self.last_batch_size = 0
+        self.total_inference_seconds = 0.0
+        self.batch_size_histogram = Counter()
+
+    @property
+    def is_running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    @property
+    def queue_depth(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+    def start(self) -> None:
+        if self.is_running:
+            return
+        self._queue = asyncio.Queue()
+        self._task = asyncio.get_running_loop().create_task(self._run())
+        logger.info(f"Micro-batcher started (max_batch_size={self.max_batch_size}, "
+                    f"max_wait_ms={self.max_wait * 1000:.1f}).")
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        # Before Python 3.12 wait_for drops a cancel that lands just as the queue get it wraps
+        # completes, so keep cancelling until the batching task has left
+        while not self._task.done():
+            self._task.cancel()
+            await asyncio.wait({self._task}, timeout=0.1)
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+        # Fail whatever is still queued so no caller waits forever
+        while self._queue is not None and not self._queue.empty():
+            _, _, future = self._queue.get_nowait()
+            if not future.done():
+                future.set_exception(RuntimeError("Micro-batcher stopped."))
+        logger.info("Micro-batcher stopped.")
+
+    async def submit(self, row: Sequence[float], key: Hashable = None) -> float:
+        """Queue one feature row to be scored with `predict_fn(key, rows)` and wait for its prediction."""
+        if not self.is_running:
+            raise RuntimeError("Micro-batcher is not running.")
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((key, row, future))
+        return await future
+
+    @staticmethod
+    def _fail(batch: List[tuple], error: BaseException) -> None:
+        for _, _, future in batch:
+            if not future.done():
+                future.set_exception(error)
+
+    async def _collect_batch(self) -> List[tuple]:
+        batch = [await self._queue.get()]
+        deadline = time.monotonic() + self.max_wait
+        try:
+            while len(batch) < self.max_batch_size:
+                # Take whatever is already waiting without yielding to the loop
+                while len(batch) < self.max_batch_size and not self._queue.empty():
+                    batch.append(self._queue.get_nowait())
+                if len(batch) >= self.max_batch_size:
+                    break
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+        except asyncio.CancelledError:
+            # These rows have left the queue, so stop() would never fail their futures
+            self._fail(batch, RuntimeError("Micro-batcher stopped."))
+            raise
+        return batch
+
+    async def _run_batch(self, batch: List[tuple]) -> None:
+        groups: Dict[Hashable, List[tuple]] = {}
+        for item in batch:
+            groups.setdefault(item[0], []).append(item)
+        for key, group in groups.items():
+            rows = np.asarray([row for _, row, _ in group], dtype=np.float64)
+            start = time.perf_counter()
+            if self.executor is not None:
+                results = await self.executor.run_in_thread(self.predict_fn, key, rows)
+            else:
+                results = self.predict_fn(key, rows)
+            self.total_inference_seconds += time.perf_counter() - start
+            for (_, _, future), result in zip(group, results):
+                if not future.done():
+                    future.set_result(float(result))
+
+    def _record(self, size: int) -> None:
+        self.batch_count += 1
+        self.item_count += size
+        self.last_batch_size = size
+        self.max_observed_batch_size = max(self.max_observed_batch_size, size)
+        self.batch_size_histogram[size] += 1
+
+    async def _run(self) -> None:
+        while True:
+            batch = await self._collect_batch()
+            self._record(len(batch))
+            try:
+                await self._run_batch(batch)
+            except asyncio.CancelledError:
+                self._fail(batch, RuntimeError("Micro-batcher stopped."))
+                raise
+            except Exception as e:
+                logger.error(f"Micro-batch inference failed for {len(batch)} rows: {e}")
+                self._fail(batch, e)
+
+    def metrics(self) -> dict:
+        return {
+            "running": self.is_running,
+            "queue_depth": self.queue_depth,
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000,
+            "batch_count": self.batch_count,
+            "item_count": self.item_count,
+            "mean_batch_size": self.item_count / self.batch_count if self.batch_count else 0.0,
+            "max_observed_batch_size": self.max_observed_batch_size,
+            "last_batch_size": self.last_batch_size,
+            "mean_inference_ms": (self.total_inference_seconds / self.batch_count * 1000
+                                  if self.batch_count else 0.0),
+            "batch_size_histogram": dict(sorted(self.batch_size_histogram.items())),
+        }
@@ -0,0 +1,208 @@
+import logging
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+N_FLAGS = 15
+
+
+def pack_features(features: np.ndarray) -> np.ndarray:
+    """
+    Pack each (age, 15 binary flags) row into one integer: age << 15 | flag bitmask.
+    Rows are assumed to be validated forms (integer age, 0/1 flags).
+    """
+    features = np.asarray(features)
+    ages = features[:, 0].astype(np.int64)
+    masks = features[:, 1:].astype(np.int64) @ (1 << np.arange(N_FLAGS, dtype=np.int64))
+    return (ages << N_FLAGS) | masks
+
+
+class InMemoryCacheBackend:
+    """Process-local stand-in for a shared cache backend, for development and offline tests."""
+
+    def __init__(self, ttl_seconds: float = 0):
+        self.ttl_seconds = ttl_seconds
+        self._store: Dict[str, tuple] = {}
+
+    async def setup(self) -> None:
+        pass
+
+    async def get_many(self, keys: List[str]) -> Dict[str, float]:
+        now = time.time()
+        found = {}
+        for key in keys:
+            entry = self._store.get(key)
+            if entry is not None and (entry[1] is None or entry[1] > now):
+                found[key] = entry[0]
+        return found
+
+    async def set_many(self, values: Dict[str, float]) -> None:
+        expires_at = time.time() + self.ttl_seconds if self.ttl_seconds else None
+        for key, value in values.items():
+            self._store[key] = (value, expires_at)
+
+
+class MongoCacheBackend:
+    """
+    Shared cache in a MongoDB collection, so every uvicorn worker sees the same entries.
+    Expiry is handled by a TTL index on `expires_at`.
+    """
+
+    def __init__(self, collection, ttl_seconds: float = 0):
+        self.collection = collection
+        self.ttl_seconds = ttl_seconds
+
+    async def setup(self) -> None:
+        await self.collection.create_index("expires_at", expireAfterSeconds=0)
+
+    async def get_many(self, keys: List[str]) -> Dict[str, float]:
+        query = {"_id": {"$in": keys}}
+        if self.ttl_seconds:
+            # The TTL monitor only runs once a minute
+            query["expires_at"] = {"$gt": datetime.now(timezone.utc)}
+        cursor = self.collection.find(query, {"probability": 1})
+        return {doc["_id"]: doc["probability"] async for doc in cursor}
+
+    async def set_many(self, values: Dict[str, float]) -> None:
+        from pymongo import UpdateOne
+
+        expires_at = (datetime.now(timezone.utc) + timedelta(seconds=self.ttl_seconds)
+                      if self.ttl_seconds else None)
+        operations = [
+            UpdateOne({"_id": key}, {"$set": {"probability": value, "expires_at": expires_at}}, upsert=True)
+            for key, value in values.items()
+        ]
+        if operations:
+            await self.collection.bulk_write(operations, ordered=False)
+
+
+class PredictionCache:
+    """
+    LRU cache of predicted probabilities keyed by (model version, packed features),
+    with an optional TTL and an optional shared backend behind it.
+
+    Local and shared entries both carry the version in their key, so an entry is only
+    ever read back for the version that computed it. Requests still finishing on the
+    previous version right after a hot swap therefore neither read nor clear the new
+    version's entries. When a version that is neither the current nor the previous one
+    shows up, the local entries of every other version are dropped; shared entries of
+    an old version are never read again and simply expire.
+    """
+
+    def __init__(self, max_size: int = 100000, ttl_seconds: float = 0, backend=None):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.backend = backend
+        self.model_version: Optional[str] = None
+        self.previous_version: Optional[str] = None
+        self._store: "OrderedDict[Tuple[str, int], tuple]" = OrderedDict()
+
+        self.hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self.backend_errors = 0
+
+    def _check_version(self, model_version: str) -> None:
+        if model_version in (self.model_version, self.previous_version):
+            return
+        if self.model_version is not None:
+            self.invalidations += 1
+            logger.info(f"Prediction cache invalidated: model version {self.model_version} -> {model_version}.")
+        self.previous_version, self.model_version = self.model_version, model_version
+        for stale in [key for key in self._store if key[0] not in (self.model_version, self.previous_version)]:
+            del self._store[stale]
+
+    def _get_local(self, key: Tuple[str, int], now: float) -> Optional[float]:
+        entry = self._store.get(key)
+        if entry is None:
+            return None
+        value, expires_at = entry
+        if expires_at is not None and expires_at <= now:
+            del self._store[key]
+            return None
+        self._store.move_to_end(key)
+        return value
+
+    def _set_local(self, key: Tuple[str, int], value: float, now: float) -> None:
+        self._store[key] = (value, now + self.ttl_seconds if self.ttl_seconds else None)
+        self._store.move_to_end(key)
+        while len(self._store) > self.max_size:
+            self._store.popitem(last=False)
+            self.evictions += 1
+
+    @staticmethod
+    def _shared_key(model_version: str, key: int) -> str:
+        return f"{model_version}:{key}"
+
+    async def get_many(self, model_version: str, keys: Iterable[int]) -> Dict[int, float]:
+        """Return the cached probabilities found for `keys`."""
+        self._check_version(model_version)
+        now = time.time()
+        found, missing = {}, []
+        for key in keys:
+            value = self._get_local((model_version, key), now)
+            if value is None:
+                missing.append(key)
+            else:
+                found[key] = value
+        self.hits += len(found)
+
+        shared_found = 0
+        if missing and self.backend is not None:
+            try:
+                shared = await self.backend.get_many([self._shared_key(model_version, key) for key in missing])
+            except Exception as e:
+                self.backend_errors += 1
+                logger.warning(f"Shared prediction cache lookup failed: {e}")
+                shared = {}
+            for key in missing:
+                value = shared.get(self._shared_key(model_version, key))
+                if value is not None:
+                    found[key] = value
+                    self._set_local((model_version, key), value, now)
+                    shared_found += 1
+
+        self.shared_hits += shared_found
+        self.misses += len(missing) - shared_found
+        return found
+
+    async def set_many(self, model_version: str, values: Dict[int, float]) -> None:
+        self._check_version(model_version)
+        now = time.time()
+        for key, value in values.items():
+            self._set_local((model_version, key), value, now)
+
+        if values and self.backend is not None:
+            try:
+                await self.backend.set_many(
+                    {self._shared_key(model_version, key): value for key, value in values.items()})
+            except Exception as e:
+                self.backend_errors += 1
+                logger.warning(f"Shared prediction cache update failed: {e}")
+
+    def clear(self) -> None:
+        self._store.clear()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.shared_hits + self.misses
+        return {
+            "model_version": self.model_version,
+            "size": len(self._store),
+            "max_size": self.max_size,
+            "ttl_seconds": self.ttl_seconds,
+            "backend": type(self.backend).__name__ if self.backend is not None else None,
+            "hits": self.hits,
+            "shared_hits": self.shared_hits,
+            "misses": self.misses,
+            "hit_rate": (self.hits + self.shared_hits) / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+            "backend_errors": self.backend_errors,
+        }
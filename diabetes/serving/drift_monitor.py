@@ -0,0 +1,243 @@
+import asyncio
+import logging
+import os
+import threading
+import time
+from collections import deque
+from typing import Deque, Dict, Optional, Sequence, Tuple
+
+import numpy as np
+
+from diabetes.constant.Training_pipeline import DRIFT_BASELINE_SKETCH_FILE_NAME, SAVED_MODEL_DIR
+from diabetes.ml.metrics.drift_metric import CATEGORICAL, BaselineSketch, drift_report
+
+logger = logging.getLogger(__name__)
+
+
+class DriftMonitor:
+    """
+    Compares live /predict traffic with the training data of the serving model.
+
+    The request path only appends the feature matrix to a deque. A background
+    task folds the pending rows every `flush_interval_ms` with one vectorized
+    bincount into the bucket layout of the version's baseline sketch (the
+    baseline_sketch.json pushed with the model). Counts live in a ring of
+    `n_slots` time slots covering `window_seconds`, so memory is constant
+    however much traffic arrives; old slots are zeroed as the window slides.
+
+    Features are the form values: column i of the matrix is `feature_columns[i]`
+    of the sketch, and a categorical code k stands for `form_categories[column][k]`
+    (the k-th sorted category when a column is not listed there). Values the
+    baseline never saw are counted as out of baseline.
+    Switching to a version resets the window.
+    """
+
+    def __init__(self, feature_columns: Sequence[str], form_categories: Optional[Dict[str, Sequence[str]]] = None,
+                 model_dir: str = SAVED_MODEL_DIR,
+                 window_seconds: float = 3600.0, n_slots: int = 12, threshold: float = 0.05,
+                 flush_interval_ms: float = 1000.0, max_pending_rows: int = 100000):
+        if n_slots < 1:
+            raise ValueError("n_slots must be at least 1")
+        self.feature_columns = list(feature_columns)
+        self.form_categories = form_categories or {}
+        self.model_dir = model_dir
+        self.window_seconds = window_seconds
+        self.n_slots = n_slots
+        self.slot_seconds = window_seconds / n_slots
+        self.threshold = threshold
+        self.flush_interval = flush_interval_ms / 1000.0
+        self.max_pending_rows = max_pending_rows
+
+        self.version: Optional[str] = None
+        self.baseline: Optional[BaselineSketch] = None
+        self._offsets = np.zeros(0, dtype=np.int64)
+        self._n_buckets = 0
+        # categorical feature index -> baseline bucket of every form code
+        self._code_buckets: Dict[int, np.ndarray] = {}
+        self._slots = np.zeros((n_slots, 0), dtype=np.int64)
+        self._slot_ids = np.full(n_slots, -1, dtype=np.int64)
+
+        self._pending: Deque[Tuple[str, np.ndarray]] = deque()
+        self._pending_rows = 0
+        self._lock = threading.Lock()
+        self._task: Optional[asyncio.Task] = None
+
+        # Metrics
+        self.recorded_rows = 0
+        self.folded_rows = 0
+        self.unmonitored_rows = 0
+        self.dropped_rows = 0
+        self.folds = 0
+        self.last_fold_ms = 0.0
+
+    @property
+    def is_running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def record(self, features: np.ndarray, version: str) -> None:
+        """Queue a feature matrix scored by `version`; the only work done on the request path."""
+        if self._pending_rows >= self.max_pending_rows:
+            self.dropped_rows += len(features)
+            return
+        self._pending.append((version, features))
+        self._pending_rows += len(features)
+        self.recorded_rows += len(features)
+
+    def _set_version(self, version: str) -> None:
+        sketch_path = os.path.join(self.model_dir, version, DRIFT_BASELINE_SKETCH_FILE_NAME)
+        baseline = None
+        if os.path.exists(sketch_path):
+            try:
+                sketch = BaselineSketch.load(sketch_path)
+                baseline = BaselineSketch({column: sketch.columns[column] for column in self.feature_columns},
+                                          sketch.n_rows)
+            except Exception as e:
+                logger.warning(f"Drift baseline of model version {version} could not be loaded: {e}")
+        else:
+            logger.info(f"Model version {version} has no drift baseline; live traffic is not monitored.")
+
+        self.version, self.baseline = version, baseline
+        if baseline is not None:
+            sizes = np.array([baseline.n_buckets(column) for column in self.feature_columns])
+            self._offsets = np.concatenate([[0], np.cumsum(sizes)[:-1]]).astype(np.int64)
+            self._n_buckets = int(sizes.sum())
+            self._code_buckets = {}
+            for i, column in enumerate(self.feature_columns):
+                spec = baseline.columns[column]
+                if spec["kind"] == CATEGORICAL:
+                    categories = spec["categories"]
+                    labels = self.form_categories.get(column, categories)
+                    self._code_buckets[i] = np.array(
+                        [categories.index(label) if label in categories else len(categories) for label in labels],
+                        dtype=np.int64)
+        else:
+            self._offsets, self._n_buckets, self._code_buckets = np.zeros(0, dtype=np.int64), 0, {}
+        self._slots = np.zeros((self.n_slots, self._n_buckets), dtype=np.int64)
+        self._slot_ids[:] = -1
+
+    def _bucket_ids(self, features: np.ndarray) -> np.ndarray:
+        columns = []
+        for i, column in enumerate(self.feature_columns):
+            spec = self.baseline.columns[column]
+            values = features[:, i]
+            if spec["kind"] == CATEGORICAL:
+                code_buckets = self._code_buckets[i]
+                known = (values == np.round(values)) & (values >= 0) & (values < len(code_buckets))
+                buckets = np.where(known, code_buckets[np.where(known, values, 0).astype(np.int64)],
+                                   len(spec["categories"]))
+            else:
+                buckets = self.baseline.bucket_index(column, values)
+            columns.append(buckets + self._offsets[i])
+        return np.concatenate(columns)
+
+    def _current_slot(self, now: float) -> int:
+        slot_id = int(now // self.slot_seconds)
+        position = slot_id % self.n_slots
+        if self._slot_ids[position] != slot_id:
+            self._slots[position] = 0
+            self._slot_ids[position] = slot_id
+        return position
+
+    def fold(self) -> None:
+        """Aggregate every pending row into the current time slot."""
+        with self._lock:
+            if not self._pending:
+                return
+            start = time.perf_counter()
+            batches = []
+            while self._pending:
+                version, features = self._pending.popleft()
+                self._pending_rows -= len(features)
+                if version != self.version:
+                    self._fold_batches(batches)
+                    batches = []
+                    self._set_version(version)
+                batches.append(features)
+            self._fold_batches(batches)
+            self.folds += 1
+            self.last_fold_ms = (time.perf_counter() - start) * 1000
+
+    def _fold_batches(self, batches) -> None:
+        if not batches:
+            return
+        features = np.concatenate(batches)
+        if self.baseline is None:
+            self.unmonitored_rows += len(features)
+            return
+        counts = np.bincount(self._bucket_ids(np.asarray(features, dtype=np.float64)), minlength=self._n_buckets)
+        self._slots[self._current_slot(time.time())] += counts
+        self.folded_rows += len(features)
+
+    def window_counts(self) -> Dict[str, np.ndarray]:
+        """Bucket counts of every feature over the current window."""
+        self.fold()
+        with self._lock:
+            if self.baseline is None:
+                return {}
+            oldest_slot_id = int(time.time() // self.slot_seconds) - self.n_slots + 1
+            counts = self._slots[self._slot_ids >= oldest_slot_id].sum(axis=0)
+            return dict(zip(self.feature_columns, np.split(counts, self._offsets[1:])))
+
+    def report(self) -> dict:
+        """Per-feature drift scores of the current window against the serving version's baseline."""
+        counts = self.window_counts()
+        window_rows = int(counts[self.feature_columns[0]].sum()) if counts else 0
+        result = {
+            "version": self.version,
+            "baseline": self.baseline is not None,
+            "window_seconds": self.window_seconds,
+            "window_rows": window_rows,
+            "threshold": self.threshold,
+            "features": {},
+        }
+        if not counts or window_rows == 0:
+            return result
+
+        features = drift_report(self.baseline, counts, threshold=self.threshold)
+        for column, column_counts in counts.items():
+            spec = self.baseline.columns[column]
+            # unseen category bucket, or the underflow and overflow buckets of a histogram
+            outside = column_counts[-1] if spec["kind"] == CATEGORICAL else column_counts[0] + column_counts[-1]
+            features[column]["out_of_baseline_rows"] = int(outside)
+        result["features"] = features
+        result["drifted_features"] = sorted(column for column, entry in features.items() if entry["drift_status"])
+        return result
+
+    def start(self) -> None:
+        if self.is_running:
+            return
+        self._task = asyncio.get_running_loop().create_task(self._run())
+        logger.info(f"Drift monitor started (window_seconds={self.window_seconds}, n_slots={self.n_slots}).")
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        self.fold()
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                self.fold()
+            except Exception as e:
+                logger.error(f"Drift monitor fold failed: {e}")
+
+    def metrics(self) -> dict:
+        return {
+            "running": self.is_running,
+            "version": self.version,
+            "baseline": self.baseline is not None,
+            "pending_rows": self._pending_rows,
+            "recorded_rows": self.recorded_rows,
+            "folded_rows": self.folded_rows,
+            "unmonitored_rows": self.unmonitored_rows,
+            "dropped_rows": self.dropped_rows,
+            "folds": self.folds,
+            "last_fold_ms": self.last_fold_ms,
+        }
@@ -0,0 +1,60 @@
+import asyncio
+import functools
+import logging
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class ExecutorPool:
+    """
+    Runs blocking work off the asyncio event loop.
+
+    The thread pool is meant for calls that release the GIL while they work (numpy,
+    XGBoost inference, bcrypt). The process pool is for pure Python CPU work that
+    would otherwise hold the GIL; functions sent to it must be picklable. With
+    `process_workers=0` process work falls back to the thread pool.
+    """
+
+    def __init__(self, thread_workers: int = 4, process_workers: int = 0):
+        self.thread_workers = thread_workers
+        self.process_workers = process_workers
+        self._thread_pool: Optional[ThreadPoolExecutor] = None
+        self._process_pool: Optional[ProcessPoolExecutor] = None
+
+    def start(self) -> None:
+        if self._thread_pool is None:
+            self._thread_pool = ThreadPoolExecutor(max_workers=self.thread_workers,
+                                                   thread_name_prefix="diabetes-worker")
+        if self._process_pool is None and self.process_workers > 0:
+            self._process_pool = ProcessPoolExecutor(max_workers=self.process_workers)
+        logger.info(f"Executor pool started (threads={self.thread_workers}, "
+                    f"processes={self.process_workers}).")
+
+    def shutdown(self) -> None:
+        if self._thread_pool is not None:
+            self._thread_pool.shutdown(wait=True)
+            self._thread_pool = None
+        if self._process_pool is not None:
+            self._process_pool.shutdown(wait=True)
+            self._process_pool = None
+        logger.info("Executor pool stopped.")
+
+    async def run_in_thread(self, fn: Callable, *args: Any, **kwargs: Any) -> Any:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._thread_pool, functools.partial(fn, *args, **kwargs))
+
+    async def run_in_process(self, fn: Callable, *args: Any, **kwargs: Any) -> Any:
+        if self._process_pool is None:
+            return await self.run_in_thread(fn, *args, **kwargs)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._process_pool, functools.partial(fn, *args, **kwargs))
+
+    async def run(self, kind: str, fn: Callable, *args: Any, **kwargs: Any) -> Any:
+        """Dispatch to the pool named by `kind` ("thread" or "process")."""
+        if kind == "process":
+            return await self.run_in_process(fn, *args, **kwargs)
+        if kind == "thread":
+            return await self.run_in_thread(fn, *args, **kwargs)
+        raise ValueError(f"Unknown executor kind: {kind}")
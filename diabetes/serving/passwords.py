@@ -0,0 +1,10 @@
+import bcrypt
+
+
+def hash_password(password: str, rounds: int = 12) -> bytes:
+    """Hash a password with bcrypt using the given cost factor."""
+    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt(rounds=rounds))
+
+
+def check_password(password: str, hashed_password: bytes) -> bool:
+    return bcrypt.checkpw(password.encode('utf-8'), hashed_password)
@@ -0,0 +1,384 @@
+import asyncio
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Sequence
+
+import joblib
+import numpy as np
+
+from diabetes.constant.Training_pipeline import MODEL_FILE_NAME, PREPROCSSING_OBJECT_FILE_NAME, SAVED_MODEL_DIR
+from diabetes.ml.model.artifact import is_native_model, load_native_model
+from diabetes.ml.model.encoder import CategoricalEncoder, find_encoder
+from diabetes.ml.model.fast_scorer import FastScorer, check_parity, random_form_batch, scaler_arrays
+from diabetes.ml.model.inference import InferencePipeline, extract_fields
+from diabetes.ml.model.prediction_table import PredictionTable
+
+try:
+    from watchfiles import awatch
+except ImportError:  # pragma: no cover - watchfiles ships with uvicorn[standard]
+    awatch = None
+
+logger = logging.getLogger(__name__)
+
+N_FEATURES = 16
+
+
+class ModelVersion:
+    """
+    A loaded, warmed model version from `saved_models/<version>/`.
+
+    Rows covered by an attached PredictionTable are answered by lookup. Otherwise,
+    when a FastScorer is attached, batches of up to `scorer_max_rows` rows are scored
+    with it; larger batches go through the model, where XGBoost's own multithreaded
+    predictor is faster.
+
+    Form codes are first mapped onto the codes of the model's fitted
+    CategoricalEncoder (bind_form), so every path above scores in the encoding
+    the model was trained with. An InferencePipeline brings its own request fields
+    and code lookups; older models use the layout the server passes in.
+    """
+
+    def __init__(self, version: str, model, preprocessing=None):
+        self.version = version
+        self.model = model
+        self.preprocessing = preprocessing
+        self.loaded_at = time.time()
+        self.scorer: Optional[FastScorer] = None
+        self.scorer_max_rows = 0
+        self.table: Optional[PredictionTable] = None
+        self.feature_fields: List[str] = []
+        # feature index -> encoder code of every form code, only for columns whose layouts differ
+        self.form_lookups: Dict[int, np.ndarray] = {}
+
+    @property
+    def encoder(self) -> Optional[CategoricalEncoder]:
+        if isinstance(self.model, InferencePipeline):
+            return self.model.encoder
+        return find_encoder(getattr(self.model, "preprocessor", None))
+
+    @property
+    def pipeline_fields(self) -> bool:
+        return isinstance(self.model, InferencePipeline) and self.model.fields is not None
+
+    def bind_form(self, feature_fields: Sequence[str], feature_columns: Sequence[str],
+                  form_categories: Dict[str, Sequence[str]]) -> None:
+        """
+        Check the form layout against the model and keep a code lookup for every
+        column where they differ. A pipeline's own fields must be the form fields;
+        otherwise the form columns and labels are checked against the model's encoder.
+        Either way, a field, column or label the model was not trained with fails
+        the load. Models without an encoder keep the form codes.
+        """
+        self.feature_fields = list(feature_fields)
+        if self.pipeline_fields:
+            if feature_fields and self.model.field_names != list(feature_fields):
+                raise ValueError(f"Model fields {self.model.field_names} do not match the form "
+                                 f"fields {list(feature_fields)}")
+            self.form_lookups = dict(self.model.form_lookups)
+            return
+
+        encoder = self.encoder
+        if encoder is None or not form_categories:
+            return
+        if list(encoder.feature_names_in_) != list(feature_columns):
+            raise ValueError(f"Model features {list(encoder.feature_names_in_)} do not match the form "
+                             f"features {list(feature_columns)}")
+        lookups = {}
+        for i, column in enumerate(feature_columns):
+            if column in form_categories:
+                lookup = encoder.code_lookup(column, form_categories[column])
+                if not np.array_equal(lookup, np.arange(len(lookup))):
+                    lookups[i] = lookup
+        self.form_lookups = lookups
+
+    def extract(self, forms: Sequence) -> np.ndarray:
+        """Stack the forms into one contiguous (n_forms, n_features) float matrix of form codes."""
+        if self.pipeline_fields:
+            return self.model.extract(forms)
+        return extract_fields(forms, self.feature_fields)
+
+    def encode_form(self, features: np.ndarray) -> np.ndarray:
+        if self.pipeline_fields:
+            return self.model.encode_fields(features)
+        if not self.form_lookups:
+            return features
+        features = np.array(features, dtype=np.float64)
+        for i, lookup in self.form_lookups.items():
+            features[:, i] = lookup[features[:, i].astype(np.int64)]
+        return features
+
+    def model_predict_proba(self, features: np.ndarray) -> np.ndarray:
+        if self.preprocessing is not None:
+            features = self.preprocessing.transform(features)
+        return self.model.predict_proba(features)
+
+    def predict_proba(self, features: np.ndarray) -> np.ndarray:
+        """Return the positive class probability for every row of `features`."""
+        features = self.encode_form(features)
+        if self.table is not None:
+            probabilities, valid = self.table.lookup(features)
+            if not valid.all():
+                probabilities[~valid] = self._score(features[~valid])
+            return probabilities
+        return self._score(features)
+
+    def _score(self, features: np.ndarray) -> np.ndarray:
+        if self.scorer is not None and len(features) <= self.scorer_max_rows:
+            return self.scorer.predict_positive(features)
+        return np.asarray(self.model_predict_proba(features)[:, 1], dtype=np.float64)
+
+    def attach_fast_scorer(self, max_rows: int) -> None:
+        """Build a FastScorer for this version and keep it only if it matches the model."""
+        scalers = []
+        if self.preprocessing is not None:
+            scalers.append(scaler_arrays(self.preprocessing))
+        if isinstance(self.model, InferencePipeline):
+            scalers.append((self.model.mean, self.model.scale))
+            estimator = self.model.model
+        elif hasattr(self.model, "preprocessor"):
+            scalers.append(scaler_arrays(self.model.preprocessor))
+            estimator = self.model.model
+        else:
+            estimator = self.model
+
+        scorer = FastScorer.from_model(estimator, scalers=scalers)
+        check_parity(scorer, self.model_predict_proba, random_form_batch(2048))
+        self.scorer = scorer
+        self.scorer_max_rows = max_rows
+
+    def attach_prediction_table(self, table: PredictionTable) -> None:
+        """Keep the table only if it agrees with the model on a sample of forms."""
+        table.check_consistency(self.model_predict_proba, sample_size=512)
+        self.table = table
+
+    def warm_up(self, batch_size: int = 16) -> None:
+        dummy = np.zeros((batch_size, N_FEATURES), dtype=np.float64)
+        dummy[:, 0] = 40
+        self.predict_proba(dummy)
+
+    def to_dict(self) -> dict:
+        return {
+            "version": self.version,
+            "model_type": type(self.model).__name__,
+            "fast_scorer": self.scorer is not None,
+            "prediction_table": self.table is not None,
+            "categorical_encoder": self.encoder is not None,
+            "pipeline_fields": self.pipeline_fields,
+            "remapped_form_features": sorted(self.form_lookups),
+            "loaded_at": self.loaded_at,
+        }
+
+
+class ModelRegistry:
+    """
+    Serves the latest saved model and hot-swaps in new versions published by ModelPusher.
+
+    Versions are the timestamp directories under `model_dir`. A background watcher
+    (watchfiles/inotify when available, polling otherwise) loads new versions off the
+    event loop, warms them with a dummy batch and swaps them in with a single reference
+    assignment. The swap does not reach requests already being served only if they read
+    `active` once and extract and score through that ModelVersion.
+    A pinned version is never replaced by the watcher; pinning and refreshing hold the
+    same lock, so a refresh cannot swap out a version the operator just pinned.
+    """
+
+    def __init__(self, model_dir: str = SAVED_MODEL_DIR, poll_interval: float = 10.0,
+                 keep_loaded: int = 2, prefer_native: bool = True, verify_checksums: bool = True,
+                 fast_scorer_max_rows: int = 0, use_prediction_table: bool = True,
+                 feature_fields: Sequence[str] = (), feature_columns: Sequence[str] = (),
+                 form_categories: Optional[Dict[str, Sequence[str]]] = None):
+        self.model_dir = model_dir
+        self.poll_interval = poll_interval
+        self.prefer_native = prefer_native
+        self.verify_checksums = verify_checksums
+        self.fast_scorer_max_rows = fast_scorer_max_rows
+        self.use_prediction_table = use_prediction_table
+        self.feature_fields = list(feature_fields)
+        self.feature_columns = list(feature_columns)
+        self.form_categories = form_categories or {}
+        self.keep_loaded = keep_loaded
+        self.active: Optional[ModelVersion] = None
+        self.pinned: Optional[str] = None
+        # loaded versions, least recently activated first
+        self._loaded: "OrderedDict[str, ModelVersion]" = OrderedDict()
+        self._failed: Dict[str, float] = {}
+        self._lock = threading.RLock()
+        self._task: Optional[asyncio.Task] = None
+        self._stop_event: Optional[asyncio.Event] = None
+
+    def list_versions(self) -> List[str]:
+        """Available versions, oldest first."""
+        if not os.path.isdir(self.model_dir):
+            return []
+        versions = [
+            name for name in os.listdir(self.model_dir)
+            if name.isdigit() and os.path.exists(os.path.join(self.model_dir, name, MODEL_FILE_NAME))
+        ]
+        return sorted(versions, key=int)
+
+    def load_version(self, version: str) -> ModelVersion:
+        version_dir = os.path.join(self.model_dir, version)
+        if self.prefer_native and is_native_model(version_dir):
+            model_version = ModelVersion(
+                version=version, model=load_native_model(version_dir, verify=self.verify_checksums))
+        else:
+            model = joblib.load(os.path.join(version_dir, MODEL_FILE_NAME))
+
+            # InferencePipeline and diabetesModel already apply their own preprocessing; a separate
+            # preprocessing.pkl is only for a bare estimator, applying it again would scale twice
+            preprocessing = None
+            preprocessing_path = os.path.join(version_dir, PREPROCSSING_OBJECT_FILE_NAME)
+            if not isinstance(model, InferencePipeline) and not hasattr(model, "preprocessor") \
+                    and os.path.exists(preprocessing_path):
+                preprocessing = joblib.load(preprocessing_path)
+            model_version = ModelVersion(version=version, model=model, preprocessing=preprocessing)
+
+        model_version.bind_form(self.feature_fields, self.feature_columns, self.form_categories)
+
+        if self.fast_scorer_max_rows > 0:
+            try:
+                model_version.attach_fast_scorer(self.fast_scorer_max_rows)
+            except Exception as e:
+                logger.warning(f"Fast scorer disabled for model version {version}: {e}")
+
+        if self.use_prediction_table and PredictionTable.exists(version_dir):
+            try:
+                model_version.attach_prediction_table(PredictionTable.load(version_dir))
+            except Exception as e:
+                logger.warning(f"Prediction table disabled for model version {version}: {e}")
+
+        model_version.warm_up()
+        return model_version
+
+    def activate(self, version: str) -> ModelVersion:
+        """Load (if needed), warm and atomically swap in `version`."""
+        with self._lock:
+            model_version = self._loaded.get(version)
+            if model_version is None:
+                model_version = self.load_version(version)
+                self._loaded[version] = model_version
+            self._loaded.move_to_end(version)
+            previous = self.active
+            self.active = model_version
+
+            # Keep the active version and the most recently activated others for fast rollback;
+            # a pinned version is never evicted
+            evictable = [loaded for loaded in self._loaded if loaded not in (version, self.pinned)]
+            for stale in evictable[:max(len(self._loaded) - max(self.keep_loaded, 1), 0)]:
+                del self._loaded[stale]
+
+        logger.info(f"Serving model version {version} "
+                    f"(previous: {previous.version if previous else None}).")
+        return model_version
+
+    def load_latest(self) -> Optional[ModelVersion]:
+        versions = self.list_versions()
+        if not versions:
+            raise FileNotFoundError(f"No saved model versions found in {self.model_dir}")
+        return self.activate(versions[-1])
+
+    def refresh(self) -> Optional[ModelVersion]:
+        """Swap in the newest version unless a version is pinned."""
+        with self._lock:
+            if self.pinned is not None:
+                return None
+            versions = self.list_versions()
+            if not versions:
+                return None
+            latest = versions[-1]
+            if self.active is not None and self.active.version == latest:
+                return None
+
+            # Do not retry a broken version until its files change
+            mtime = None
+            try:
+                mtime = os.path.getmtime(os.path.join(self.model_dir, latest, MODEL_FILE_NAME))
+                if self._failed.get(latest) == mtime:
+                    return None
+                return self.activate(latest)
+            except Exception as e:
+                self._failed[latest] = mtime
+                logger.error(f"Failed to load model version {latest}: {e}")
+                return None
+
+    def pin(self, version: str) -> ModelVersion:
+        if version not in self.list_versions():
+            raise KeyError(version)
+        with self._lock:
+            previous_pin = self.pinned
+            self.pinned = version
+            try:
+                return self.activate(version)
+            except Exception:
+                self.pinned = previous_pin
+                raise
+
+    def unpin(self) -> Optional[ModelVersion]:
+        with self._lock:
+            self.pinned = None
+            return self.refresh()
+
+    def rollback(self) -> ModelVersion:
+        """Pin the version published just before the active one."""
+        versions = self.list_versions()
+        if self.active is None or self.active.version not in versions:
+            raise LookupError("No active version to roll back from.")
+        index = versions.index(self.active.version)
+        if index == 0:
+            raise LookupError("Active version is the oldest available version.")
+        return self.pin(versions[index - 1])
+
+    def status(self) -> dict:
+        return {
+            "model_dir": self.model_dir,
+            "active": self.active.to_dict() if self.active else None,
+            "pinned": self.pinned,
+            "versions": self.list_versions(),
+            "loaded": sorted(self._loaded, key=int),
+            "watcher": "watchfiles" if awatch is not None else "polling",
+        }
+
+    def start(self) -> None:
+        if self._task is not None:
+            return
+        self._stop_event = asyncio.Event()
+        self._task = asyncio.get_running_loop().create_task(self._watch())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        # Let the watcher leave on its own so the watchfiles thread is joined
+        # before interpreter shutdown; wait_for cancels it if it does not
+        self._stop_event.set()
+        try:
+            await asyncio.wait_for(self._task, timeout=5)
+        except (asyncio.TimeoutError, asyncio.CancelledError):
+            pass
+        self._task = None
+
+    async def _refresh_safely(self) -> None:
+        # A version still being written can fail in unexpected ways; log it and keep watching
+        try:
+            await asyncio.to_thread(self.refresh)
+        except Exception:
+            logger.exception(f"Model registry refresh of {self.model_dir} failed.")
+
+    async def _watch(self) -> None:
+        if awatch is not None and os.path.isdir(self.model_dir):
+            logger.info(f"Watching {self.model_dir} for new model versions.")
+            try:
+                async for _ in awatch(self.model_dir, stop_event=self._stop_event):
+                    await self._refresh_safely()
+                return
+            except Exception:
+                logger.exception(f"Watching {self.model_dir} failed, falling back to polling.")
+
+        logger.info(f"Polling {self.model_dir} every {self.poll_interval}s for new model versions.")
+        while not self._stop_event.is_set():
+            try:
+                await asyncio.wait_for(self._stop_event.wait(), timeout=self.poll_interval)
+            except asyncio.TimeoutError:
+                await self._refresh_safely()
@@ -0,0 +1,178 @@
+import asyncio
+import logging
+import time
+from typing import List, Optional
+
+from pymongo.errors import BulkWriteError
+
+logger = logging.getLogger(__name__)
+
+OVERFLOW_POLICIES = ("block", "drop_newest", "drop_oldest")
+
+
+class WriteBehindBuffer:
+    """
+    Buffers documents in a bounded in-memory queue and writes them to a MongoDB
+    collection in the background with `insert_many(ordered=False)`.
+
+    A flush happens when `flush_batch_size` documents are waiting or `flush_interval_ms`
+    after the first one arrived. When the queue is full the overflow policy decides:
+    "block" waits for space (backpressure on the request, up to `block_timeout` seconds
+    for the whole `submit()` call, after which its remaining documents are dropped), "drop_newest" discards the incoming document and "drop_oldest" discards
+    the oldest queued one. Everything still queued is flushed on `stop()`.
+    """
+
+    def __init__(self, collection, max_queue_size: int = 10000, flush_batch_size: int = 500,
+                 flush_interval_ms: float = 200, overflow_policy: str = "block",
+                 block_timeout: float = 1.0):
+        if overflow_policy not in OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown overflow policy: {overflow_policy}")
+        self.collection = collection
+        self.max_queue_size = max_queue_size
+        self.flush_batch_size = flush_batch_size
+        self.flush_interval = flush_interval_ms / 1000.0
+        self.overflow_policy = overflow_policy
+        self.block_timeout = block_timeout
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        # Documents taken off the queue but not yet handed to a flush
+        self._pending: List[dict] = []
+        self._inflight: Optional[asyncio.Future] = None
+
+        # Metrics
+        self.enqueued = 0
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+        self.flushes = 0
+        self.last_flush_ms = 0.0
+
+    @property
+    def is_running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    @property
+    def queue_depth(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+    def start(self) -> None:
+        if self.is_running:
+            return
+        self._queue = asyncio.Queue(maxsize=self.max_queue_size)
+        self._task = asyncio.get_running_loop().create_task(self._run())
+        logger.info(f"Write-behind buffer started (max_queue_size={self.max_queue_size}, "
+                    f"flush_batch_size={self.flush_batch_size}, policy={self.overflow_policy}).")
+
+    async def stop(self) -> None:
+        """Stop the flusher and write everything still queued."""
+        if self._task is None:
+            return
+        # Before Python 3.12 wait_for drops a cancel that lands just as the queue get it wraps
+        # completes, so keep cancelling until the flusher has left
+        while not self._task.done():
+            self._task.cancel()
+            await asyncio.wait({self._task}, timeout=0.1)
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        if self._inflight is not None:
+            await self._inflight
+            self._inflight = None
+
+        remaining, self._pending = self._pending, []
+        while not self._queue.empty():
+            remaining.append(self._queue.get_nowait())
+        for start in range(0, len(remaining), self.flush_batch_size):
+            await self._flush(remaining[start:start + self.flush_batch_size])
+        logger.info(f"Write-behind buffer stopped ({self.written} written, {self.dropped} dropped, "
+                    f"{self.failed} failed).")
+
+    async def submit(self, documents: List[dict]) -> None:
+        """Queue documents for writing, applying the overflow policy when the queue is full."""
+        if not self.is_running:
+            raise RuntimeError("Write-behind buffer is not running.")
+        # One deadline for the whole call, so a large batch waits at most block_timeout in total
+        deadline = time.monotonic() + self.block_timeout
+        for index, document in enumerate(documents):
+            if self._queue.full():
+                if self.overflow_policy == "drop_newest":
+                    self.dropped += 1
+                    continue
+                if self.overflow_policy == "drop_oldest":
+                    self._queue.get_nowait()
+                    self.dropped += 1
+                else:
+                    try:
+                        await asyncio.wait_for(self._queue.put(document), max(deadline - time.monotonic(), 0))
+                        self.enqueued += 1
+                    except asyncio.TimeoutError:
+                        self.dropped += len(documents) - index
+                        logger.warning(f"Write-behind queue full for {self.block_timeout}s, dropped "
+                                       f"{len(documents) - index} of {len(documents)} documents.")
+                        return
+                    continue
+            self._queue.put_nowait(document)
+            self.enqueued += 1
+
+    async def _collect_batch(self) -> List[dict]:
+        batch = self._pending
+        batch.append(await self._queue.get())
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.flush_batch_size:
+            while len(batch) < self.flush_batch_size and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+            if len(batch) >= self.flush_batch_size:
+                break
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        self._pending = []
+        return batch
+
+    async def _flush(self, batch: List[dict]) -> None:
+        if not batch:
+            return
+        start = time.perf_counter()
+        try:
+            result = await self.collection.insert_many(batch, ordered=False)
+            self.written += len(result.inserted_ids)
+        except BulkWriteError as e:
+            # With ordered=False the documents that did not fail are still written
+            inserted = e.details.get("nInserted", 0)
+            self.written += inserted
+            self.failed += len(batch) - inserted
+            logger.error(f"Write-behind flush wrote {inserted} of {len(batch)} documents: {e}")
+        except Exception as e:
+            self.failed += len(batch)
+            logger.error(f"Write-behind flush of {len(batch)} documents failed: {e}")
+        self.flushes += 1
+        self.last_flush_ms = (time.perf_counter() - start) * 1000
+
+    async def _run(self) -> None:
+        while True:
+            batch = await self._collect_batch()
+            # Shield the write so a shutdown during a flush does not lose the batch;
+            # stop() waits for it to finish
+            self._inflight = asyncio.ensure_future(self._flush(batch))
+            await asyncio.shield(self._inflight)
+            self._inflight = None
+
+    def metrics(self) -> dict:
+        return {
+            "running": self.is_running,
+            "queue_depth": self.queue_depth,
+            "max_queue_size": self.max_queue_size,
+            "overflow_policy": self.overflow_policy,
+            "enqueued": self.enqueued,
+            "written": self.written,
+            "dropped": self.dropped,
+            "failed": self.failed,
+            "flushes": self.flushes,
+            "last_flush_ms": self.last_flush_ms,
+        }
@@ -0,0 +1,121 @@
+import sys
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+from diabetes.data_access.storage import read_table, write_table
+from diabetes.exception import CustomException
+from diabetes.logger import logging
+from diabetes.utils.main_utils import load_numpy_array_data, load_object, save_numpy_array_data, save_object
+
+PERSIST_SYNC, PERSIST_ASYNC, PERSIST_LAZY = "sync", "async", "lazy"
+
+
+class ArtifactStore:
+    """
+    Hands stage outputs to the next TrainPipeline stage as live objects.
+
+    Every artifact is keyed by the file path it is persisted to, so the *Artifact
+    dataclasses keep passing paths. put_* keeps the object in memory and writes it
+    to that path synchronously, on a background thread ("async") or only on
+    flush() ("lazy"). get_* returns the in-memory object when this run produced it
+    and otherwise loads it from disk, e.g. when resuming from an earlier run.
+
+    Objects are shared rather than serialized: tables are returned as shallow copies and
+    arrays are made read-only so a downstream stage cannot change what an
+    in-flight write or a later stage sees.
+    """
+
+    def __init__(self, keep_in_memory: bool = True, persist: str = PERSIST_ASYNC, max_workers: int = 2):
+        if persist not in (PERSIST_SYNC, PERSIST_ASYNC, PERSIST_LAZY):
+            raise ValueError(f"Unknown persist mode '{persist}'")
+        self.keep_in_memory = keep_in_memory
+        # without the in-memory copy a later get must find the file, so write it now
+        self.persist = persist if keep_in_memory else PERSIST_SYNC
+        self._objects: Dict[str, object] = {}
+        self._pending: Dict[str, Callable[[], None]] = {}
+        self._futures: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="artifact-store") \
+            if self.persist == PERSIST_ASYNC else None
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def disk_only(cls) -> "ArtifactStore":
+        """Store that behaves like plain save/load calls; the default for components run on their own."""
+        return cls(keep_in_memory=False, persist=PERSIST_SYNC)
+
+    def _put(self, file_path: str, obj, saver: Callable[[str, object], None]) -> None:
+        try:
+            write = lambda: saver(file_path, obj)
+            with self._lock:
+                if self.keep_in_memory:
+                    self._objects[file_path] = obj
+                if self.persist == PERSIST_ASYNC:
+                    self._futures[file_path] = self._executor.submit(write)
+                elif self.persist == PERSIST_LAZY:
+                    self._pending[file_path] = write
+            if self.persist == PERSIST_SYNC:
+                write()
+        except Exception as e:
+            raise CustomException(e, sys)
+
+    def _get(self, file_path: str, loader: Callable[[str], object]):
+        try:
+            with self._lock:
+                obj = self._objects.get(file_path)
+            if obj is not None:
+                self.hits += 1
+                return obj
+            self.misses += 1
+            # a write of this path may still be in flight
+            self.wait(file_path)
+            return loader(file_path)
+        except Exception as e:
+            raise CustomException(e, sys)
+
+    def put_table(self, file_path: str, dataframe: pd.DataFrame) -> None:
+        self._put(file_path, dataframe, lambda path, obj: write_table(obj, path))
+
+    def get_table(self, file_path: str) -> pd.DataFrame:
+        return self._get(file_path, read_table).copy(deep=False)
+
+    def put_array(self, file_path: str, array: np.ndarray) -> None:
+        array.setflags(write=False)
+        self._put(file_path, array, save_numpy_array_data)
+
+    def get_array(self, file_path: str) -> np.ndarray:
+        return self._get(file_path, load_numpy_array_data)
+
+    def put_object(self, file_path: str, obj: object) -> None:
+        self._put(file_path, obj, save_object)
+
+    def get_object(self, file_path: str) -> object:
+        return self._get(file_path, load_object)
+
+    def wait(self, file_path: Optional[str] = None) -> None:
+        """Block until file_path (or every artifact) is on disk; re-raises a failed write."""
+        with self._lock:
+            paths = [file_path] if file_path is not None else list(set(self._futures) | set(self._pending))
+            futures = [self._futures.pop(path) for path in paths if path in self._futures]
+            pending = [self._pending.pop(path) for path in paths if path in self._pending]
+        for write in pending:
+            write()
+        for future in futures:
+            future.result()
+
+    def flush(self) -> None:
+        self.wait()
+        logging.info(f"Artifact store flushed ({self.hits} in-memory hits, {self.misses} disk loads)")
+
+    def close(self) -> None:
+        """Flush and drop the in-memory objects; the store stays usable for another run."""
+        try:
+            self.flush()
+        finally:
+            with self._lock:
+                self._objects.clear()
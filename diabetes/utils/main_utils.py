@@ -39,22 +39,39 @@ def save_numpy_array_data(file_path:str, array:np.array):
         dir_path = os.path.dirname(file_path)
         os.makedirs(dir_path, exist_ok=True)
         with open(file_path, "wb") as file_obj:
-            np.save(file_obj, array)
+            np.save(file_obj, array, allow_pickle=False)
     
     except Exception as e:
         raise CustomException(e, sys)
     
 
-def load_numpy_array_data(file_path:str)->np.array:
+def list_numpy_array_shards(dir_path: str, prefix: str) -> list:
+    """
+    Shard files of an array written in chunks (out-of-core DataTransformation), in order
+    dir_path: str directory holding the shards
+    prefix: str file name prefix of the array's shards, e.g. "features-"
+    """
+    try:
+        return sorted(os.path.join(dir_path, name) for name in os.listdir(dir_path)
+                      if name.startswith(prefix) and name.endswith(".npy"))
+
+    except Exception as e:
+        raise CustomException(e, sys)
+
+
+def load_numpy_array_data(file_path:str, mmap_mode: str = "r")->np.array:
     """
     load numpy array data from file
     file_path: str location of the file to load
+    mmap_mode: str memory map the file ("r" read-only, the default) so slices are zero-copy
+        views on the page cache; None reads it fully into memory
     returns: np.array date loaded 
 
+    Object arrays are refused (allow_pickle=False): the files only hold numeric data
+    and unpickling one could run arbitrary code.
     """
     try:
-        with open(file_path, "rb") as file_obj:
-            return np.load(file_obj,allow_pickle= True)
+        return np.load(file_path, mmap_mode=mmap_mode, allow_pickle=False)
     
     except Exception as e:
         raise CustomException(e, sys)
@@ -0,0 +1,104 @@
+import asyncio
+import time
+
+import numpy as np
+import pytest
+
+from diabetes.serving.batcher import MicroBatcher
+
+
+class RecordingPredictor:
+    """predict_fn returning each row's first value plus its key, recording every call"""
+
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, key, rows: np.ndarray) -> np.ndarray:
+        self.calls.append((key, len(rows)))
+        return rows[:, 0] + (key or 0)
+
+
+def test_concurrent_rows_are_scored_in_one_batch():
+    predict = RecordingPredictor()
+    batcher = MicroBatcher(predict, max_batch_size=64, max_wait_ms=50)
+
+    async def scenario():
+        batcher.start()
+        results = await asyncio.gather(*(batcher.submit([float(i), 0.0]) for i in range(10)))
+        await batcher.stop()
+        return results
+
+    assert asyncio.run(scenario()) == [float(i) for i in range(10)]
+    assert predict.calls == [(None, 10)]
+    assert batcher.metrics()["batch_count"] == 1
+
+
+def test_a_full_batch_does_not_wait_for_max_wait():
+    predict = RecordingPredictor()
+    batcher = MicroBatcher(predict, max_batch_size=4, max_wait_ms=60000)
+
+    async def scenario():
+        batcher.start()
+        start = time.monotonic()
+        await asyncio.gather(*(batcher.submit([float(i)]) for i in range(8)))
+        elapsed = time.monotonic() - start
+        await batcher.stop()
+        return elapsed
+
+    assert asyncio.run(scenario()) < 1
+    assert predict.calls == [(None, 4), (None, 4)]
+
+
+def test_rows_are_scored_with_the_key_they_were_submitted_with():
+    predict = RecordingPredictor()
+    batcher = MicroBatcher(predict, max_batch_size=64, max_wait_ms=50)
+
+    async def scenario():
+        batcher.start()
+        results = await asyncio.gather(batcher.submit([1.0], key=100), batcher.submit([2.0], key=200),
+                                       batcher.submit([3.0], key=100))
+        await batcher.stop()
+        return results
+
+    assert asyncio.run(scenario()) == [101.0, 202.0, 103.0]
+    assert sorted(predict.calls) == [(100, 2), (200, 1)]
+
+
+def test_a_failing_batch_fails_its_callers_and_the_batcher_keeps_running():
+    def predict(key, rows):
+        if rows[0, 0] < 0:
+            raise ValueError("bad row")
+        return rows[:, 0]
+
+    batcher = MicroBatcher(predict, max_batch_size=1, max_wait_ms=0)
+
+    async def scenario():
+        batcher.start()
+        with pytest.raises(ValueError):
+            await batcher.submit([-1.0])
+        result = await batcher.submit([2.0])
+        await batcher.stop()
+        return result
+
+    assert asyncio.run(scenario()) == 2.0
+
+
+def test_stop_fails_rows_still_waiting_for_their_batch():
+    predict = RecordingPredictor()
+    batcher = MicroBatcher(predict, max_batch_size=64, max_wait_ms=60000)
+
+    async def scenario():
+        batcher.start()
+        pending = [asyncio.ensure_future(batcher.submit([float(i)])) for i in range(3)]
+        await asyncio.sleep(0.01)
+        # this row reaches the queue just as stop() cancels the batching task
+        pending.append(asyncio.ensure_future(batcher.submit([9.0])))
+        await asyncio.sleep(0)
+        start = time.monotonic()
+        await batcher.stop()
+        return time.monotonic() - start, await asyncio.gather(*pending, return_exceptions=True)
+
+    elapsed, results = asyncio.run(asyncio.wait_for(scenario(), timeout=5))
+    assert elapsed < 1
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert predict.calls == []
@@ -0,0 +1,84 @@
+import asyncio
+
+import numpy as np
+
+from diabetes.serving import cache as cache_module
+from diabetes.serving.cache import InMemoryCacheBackend, PredictionCache, pack_features
+
+
+class FakeClock:
+    def __init__(self, now: float = 1000.0):
+        self.now = now
+
+    def time(self) -> float:
+        return self.now
+
+
+def test_pack_features_gives_distinct_keys_to_distinct_forms():
+    features = np.zeros((3, 16))
+    features[:, 0] = [40, 40, 41]
+    features[1, 5] = 1
+    keys = pack_features(features)
+    assert len(set(keys.tolist())) == 3
+
+
+def test_entries_expire_after_the_ttl(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(cache_module, "time", clock)
+    cache = PredictionCache(ttl_seconds=10)
+
+    async def scenario():
+        await cache.set_many("1", {7: 0.25})
+        clock.now += 5
+        assert await cache.get_many("1", [7]) == {7: 0.25}
+        clock.now += 10
+        assert await cache.get_many("1", [7]) == {}
+
+    asyncio.run(scenario())
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 1
+
+
+def test_lru_evicts_the_least_recently_read_entry():
+    cache = PredictionCache(max_size=2)
+
+    async def scenario():
+        await cache.set_many("1", {1: 0.1, 2: 0.2})
+        await cache.get_many("1", [1])
+        await cache.set_many("1", {3: 0.3})
+        return await cache.get_many("1", [1, 2, 3])
+
+    assert asyncio.run(scenario()) == {1: 0.1, 3: 0.3}
+    assert cache.evictions == 1
+
+
+def test_entries_are_only_read_back_for_their_model_version():
+    cache = PredictionCache()
+
+    async def scenario():
+        await cache.set_many("1", {7: 0.25})
+        # a request still finishing on version 1 after the swap to 2 keeps its entries
+        assert await cache.get_many("2", [7]) == {}
+        assert await cache.get_many("1", [7]) == {7: 0.25}
+        # a third version drops every other version's local entries
+        await cache.get_many("3", [7])
+        return await cache.get_many("1", [7])
+
+    assert asyncio.run(scenario()) == {}
+    assert cache.invalidations == 3
+
+
+def test_shared_backend_fills_the_local_cache_and_respects_its_ttl(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(cache_module, "time", clock)
+    backend = InMemoryCacheBackend(ttl_seconds=10)
+    writer, reader = PredictionCache(backend=backend), PredictionCache(backend=backend)
+
+    async def scenario():
+        await writer.set_many("1", {7: 0.25})
+        assert await reader.get_many("1", [7]) == {7: 0.25}
+        assert await reader.get_many("2", [7]) == {}
+        clock.now += 11
+        return await PredictionCache(backend=backend).get_many("1", [7])
+
+    assert asyncio.run(scenario()) == {}
+    assert reader.shared_hits == 1
@@ -0,0 +1,57 @@
+import numpy as np
+import pytest
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.preprocessing import StandardScaler
+from xgboost import XGBClassifier
+
+from diabetes.ml.model.fast_scorer import FastScorer, random_form_batch, scaler_arrays
+
+
+def training_data(n_rows: int = 600, seed: int = 0):
+    """Forms in the serving layout with a label that depends on age and a few flags"""
+    x = random_form_batch(n_rows, seed=seed)
+    rng = np.random.default_rng(seed)
+    y = ((x[:, 0] > 40).astype(int) + x[:, 1] + x[:, 2] + rng.integers(0, 2, size=n_rows) >= 2).astype(int)
+    return x, y
+
+
+def with_missing(x: np.ndarray, seed: int = 1, fraction: float = 0.2) -> np.ndarray:
+    x = x.copy()
+    x[np.random.default_rng(seed).random(x.shape) < fraction] = np.nan
+    return x
+
+
+def reference_predict_proba(scaler: StandardScaler, model):
+    return lambda x: model.predict_proba(scaler.transform(x))
+
+
+MODELS = {
+    "xgboost": lambda: XGBClassifier(n_estimators=30, max_depth=4, random_state=0),
+    "random_forest": lambda: RandomForestClassifier(n_estimators=20, max_depth=6, random_state=0),
+}
+
+
+@pytest.mark.parametrize("name", sorted(MODELS))
+@pytest.mark.parametrize("missing_in_training", [False, True], ids=["dense_fit", "missing_fit"])
+def test_predict_positive_matches_predict_proba(name, missing_in_training):
+    x, y = training_data()
+    if missing_in_training:
+        x = with_missing(x, seed=2, fraction=0.1)
+    scaler = StandardScaler().fit(x)
+    model = MODELS[name]().fit(scaler.transform(x), y)
+    scorer = FastScorer.from_model(model, scalers=[scaler_arrays(scaler)])
+    reference = reference_predict_proba(scaler, model)
+
+    # Dense rows, then rows with NaNs that follow each node's default (missing value) branch
+    for batch in (random_form_batch(2000, seed=3), with_missing(random_form_batch(2000, seed=4))):
+        np.testing.assert_allclose(scorer.predict_positive(batch), reference(batch)[:, 1], atol=1e-5)
+
+
+@pytest.mark.parametrize("name", sorted(MODELS))
+def test_training_rows_on_split_thresholds(name):
+    # Training values sit exactly on the split thresholds, where the folded scaler must not round
+    x, y = training_data(seed=5)
+    scaler = StandardScaler().fit(x)
+    model = MODELS[name]().fit(scaler.transform(x), y)
+    scorer = FastScorer.from_model(model, scalers=[scaler_arrays(scaler)])
+    np.testing.assert_allclose(scorer.predict_positive(x), model.predict_proba(scaler.transform(x))[:, 1], atol=1e-5)
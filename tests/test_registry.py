@@ -0,0 +1,111 @@
+import os
+
+import pytest
+
+from diabetes.constant.Training_pipeline import MODEL_FILE_NAME
+from diabetes.serving.registry import ModelRegistry, ModelVersion
+
+
+def make_registry(tmp_path, versions, keep_loaded: int = 2) -> ModelRegistry:
+    """Registry over empty version directories; loading a version only records it"""
+    for version in versions:
+        os.makedirs(tmp_path / version)
+        (tmp_path / version / MODEL_FILE_NAME).touch()
+    registry = ModelRegistry(model_dir=str(tmp_path), keep_loaded=keep_loaded)
+    registry.loads = []
+
+    def load_version(version: str) -> ModelVersion:
+        registry.loads.append(version)
+        return ModelVersion(version=version, model=None)
+
+    registry.load_version = load_version
+    return registry
+
+
+def test_eviction_keeps_the_most_recently_activated_versions(tmp_path):
+    registry = make_registry(tmp_path, ["100", "200", "300"])
+    for version in ("100", "200", "300", "100"):
+        registry.activate(version)
+    # 200 is the least recently used, not 100, the lowest version
+    assert sorted(registry._loaded) == ["100", "300"]
+    assert registry.active.version == "100"
+
+
+def test_switching_between_two_versions_does_not_reload_them(tmp_path):
+    registry = make_registry(tmp_path, ["100", "200", "300"])
+    registry.load_latest()
+    registry.rollback()
+    for _ in range(3):
+        registry.activate("300")
+        registry.activate("200")
+    assert registry.loads == ["300", "200"]
+
+
+def test_pinned_version_is_never_evicted(tmp_path):
+    registry = make_registry(tmp_path, ["100", "200", "300"], keep_loaded=1)
+    registry.pin("100")
+    registry.activate("300")
+    assert "100" in registry._loaded
+    assert registry.active.version == "300"
+
+
+def test_pin_of_an_unknown_version_raises(tmp_path):
+    registry = make_registry(tmp_path, ["100"])
+    with pytest.raises(KeyError):
+        registry.pin("999")
+
+
+def test_refresh_swaps_in_a_newly_pushed_version(tmp_path):
+    registry = make_registry(tmp_path, ["100", "200"])
+    assert registry.load_latest().version == "200"
+    assert registry.refresh() is None
+
+    os.makedirs(tmp_path / "300")
+    (tmp_path / "300" / MODEL_FILE_NAME).touch()
+    # a staging directory of a push in progress is not a version
+    os.makedirs(tmp_path / ".400.tmp")
+    assert registry.refresh().version == "300"
+    assert registry.active.version == "300"
+
+
+def test_rollback_pins_the_previous_version_until_unpinned(tmp_path):
+    registry = make_registry(tmp_path, ["100", "200", "300"])
+    registry.load_latest()
+
+    assert registry.rollback().version == "200"
+    assert registry.pinned == "200"
+    os.makedirs(tmp_path / "400")
+    (tmp_path / "400" / MODEL_FILE_NAME).touch()
+    assert registry.refresh() is None
+    assert registry.active.version == "200"
+
+    assert registry.unpin().version == "400"
+    assert registry.pinned is None
+
+
+def test_rollback_from_the_oldest_version_raises(tmp_path):
+    registry = make_registry(tmp_path, ["100"])
+    registry.load_latest()
+    with pytest.raises(LookupError):
+        registry.rollback()
+
+
+def test_a_version_that_fails_to_load_is_not_retried_until_it_changes(tmp_path):
+    registry = make_registry(tmp_path, ["100", "200"])
+    registry.activate("100")
+    attempts = []
+
+    def broken_load(version: str) -> ModelVersion:
+        attempts.append(version)
+        raise ValueError("truncated model file")
+
+    registry.load_version = broken_load
+    assert registry.refresh() is None
+    assert registry.refresh() is None
+    assert attempts == ["200"]
+    assert registry.active.version == "100"
+
+    model_path = tmp_path / "200" / MODEL_FILE_NAME
+    os.utime(model_path, (os.path.getmtime(model_path) + 10,) * 2)
+    registry.refresh()
+    assert attempts == ["200", "200"]
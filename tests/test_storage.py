@@ -0,0 +1,50 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from diabetes.data_access.storage import TableWriter, iter_table, read_table
+
+SCHEMA_CONFIG = {"numerical_columns": ["Age"], "categorical_columns": ["Gender", "Polyuria", "class"]}
+
+
+def chunks_with_drifting_dtypes():
+    """Chunks whose inferred dtypes differ: all-null then strings, int then float with NaN, new categories"""
+    return [
+        pd.DataFrame({"Age": [40, 58], "Gender": [None, None], "Polyuria": ["No", "No"], "class": ["Negative"] * 2}),
+        pd.DataFrame({"Age": [41.5, np.nan], "Gender": ["Male", "Female"], "Polyuria": ["Yes", None],
+                      "class": ["Positive", "Negative"]}),
+        pd.DataFrame({"Age": [30, 62], "Gender": pd.Categorical(["Female", "Male"]), "Polyuria": ["Yes", "No"],
+                      "class": pd.Categorical(["Positive", "Positive"])}),
+    ]
+
+
+@pytest.mark.parametrize("suffix", ["parquet", "arrow", "csv"])
+def test_table_writer_keeps_every_chunk_when_dtypes_drift(tmp_path, suffix):
+    chunks = chunks_with_drifting_dtypes()
+    file_path = str(tmp_path / f"feature_store.{suffix}")
+    with TableWriter(file_path, SCHEMA_CONFIG) as writer:
+        for chunk in chunks:
+            writer.write(chunk)
+
+    expected = pd.concat(chunks, ignore_index=True).astype(object)
+    table = read_table(file_path)
+    assert writer.rows == len(expected) == len(table)
+    assert table["Age"].dtype == np.float64
+    np.testing.assert_array_equal(table["Age"].to_numpy(), expected["Age"].to_numpy(dtype=np.float64))
+    for column in SCHEMA_CONFIG["categorical_columns"]:
+        assert table[column].astype(object).where(table[column].notna(), None).tolist() == \
+            expected[column].where(expected[column].notna(), None).tolist()
+    assert sum(len(chunk) for chunk in iter_table(file_path, chunk_rows=4)) == len(expected)
+
+
+@pytest.mark.parametrize("suffix", ["parquet", "arrow"])
+def test_table_writer_reads_categorical_columns_back_as_categoricals(tmp_path, suffix):
+    file_path = str(tmp_path / f"feature_store.{suffix}")
+    with TableWriter(file_path, SCHEMA_CONFIG) as writer:
+        for chunk in chunks_with_drifting_dtypes():
+            writer.write(chunk)
+
+    table = read_table(file_path)
+    for column in SCHEMA_CONFIG["categorical_columns"]:
+        assert isinstance(table[column].dtype, pd.CategoricalDtype)
+    assert sorted(table["Gender"].cat.categories) == ["Female", "Male"]
@@ -0,0 +1,119 @@
+import asyncio
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from diabetes.serving.write_behind import WriteBehindBuffer
+
+
+class InMemoryCollection:
+    """Collection with the async insert_many of the Motor/PyMongo async clients, keeping documents in a list"""
+
+    def __init__(self):
+        self.documents = []
+        self.batches = []
+        # when set, inserts wait for this event
+        self.release = None
+
+    async def insert_many(self, documents, ordered=True):
+        if self.release is not None:
+            await self.release.wait()
+        self.batches.append(len(documents))
+        self.documents.extend(documents)
+        return SimpleNamespace(inserted_ids=list(range(len(documents))))
+
+
+def test_stop_flushes_everything_still_queued():
+    collection = InMemoryCollection()
+    buffer = WriteBehindBuffer(collection, flush_batch_size=100, flush_interval_ms=60000)
+
+    async def scenario():
+        buffer.start()
+        await buffer.submit([{"n": i} for i in range(250)])
+        await buffer.stop()
+
+    asyncio.run(scenario())
+    assert [document["n"] for document in collection.documents] == list(range(250))
+    assert buffer.written == 250 and buffer.dropped == 0
+    assert max(collection.batches) <= 100
+
+
+def test_flushes_a_full_batch_without_waiting_for_the_interval():
+    collection = InMemoryCollection()
+    buffer = WriteBehindBuffer(collection, flush_batch_size=10, flush_interval_ms=60000)
+
+    async def scenario():
+        buffer.start()
+        await buffer.submit([{"n": i} for i in range(10)])
+        for _ in range(100):
+            if collection.documents:
+                break
+            await asyncio.sleep(0.01)
+        written = len(collection.documents)
+        await buffer.stop()
+        return written
+
+    assert asyncio.run(scenario()) == 10
+
+
+@pytest.mark.parametrize("policy, kept", [("drop_oldest", [2, 3, 4]), ("drop_newest", [0, 1, 2])])
+def test_overflow_policies_drop_the_expected_documents(policy, kept):
+    collection = InMemoryCollection()
+    buffer = WriteBehindBuffer(collection, max_queue_size=3, flush_batch_size=100, flush_interval_ms=60000,
+                               overflow_policy=policy)
+
+    async def scenario():
+        buffer.start()
+        # submit does not yield to the flusher while the queue has room or drops, so the
+        # queue only ever holds the three documents the policy keeps
+        await buffer.submit([{"n": i} for i in range(5)])
+        await buffer.stop()
+
+    asyncio.run(scenario())
+    assert [document["n"] for document in collection.documents] == kept
+    assert buffer.dropped == 2
+
+
+def test_block_policy_drops_the_rest_of_a_submit_after_its_timeout():
+    collection = InMemoryCollection()
+    buffer = WriteBehindBuffer(collection, max_queue_size=2, flush_batch_size=1, flush_interval_ms=0,
+                               overflow_policy="block", block_timeout=0.05)
+
+    async def scenario():
+        collection.release = asyncio.Event()
+        buffer.start()
+        # the first flush waits on the collection, so the queue fills up behind it
+        await buffer.submit([{"n": i} for i in range(10)])
+        dropped = buffer.dropped
+        collection.release.set()
+        await buffer.stop()
+        return dropped
+
+    dropped = asyncio.run(scenario())
+    assert dropped == 7
+    assert [document["n"] for document in collection.documents] == [0, 1, 2]
+
+
+def test_stop_returns_when_a_document_arrives_as_it_cancels_the_flusher():
+    collection = InMemoryCollection()
+    buffer = WriteBehindBuffer(collection, max_queue_size=2, flush_batch_size=100, flush_interval_ms=60000,
+                               block_timeout=0.05)
+
+    async def scenario():
+        buffer.start()
+        # the flusher's queue get completes just as stop() cancels it
+        await buffer.submit([{"n": i} for i in range(10)])
+        start = time.monotonic()
+        await buffer.stop()
+        return time.monotonic() - start
+
+    # the outer timeout only keeps a regression from hanging the suite
+    assert asyncio.run(asyncio.wait_for(scenario(), timeout=5)) < 1
+    assert buffer.written == 10
+
+
+def test_submit_requires_a_running_buffer():
+    buffer = WriteBehindBuffer(InMemoryCollection())
+    with pytest.raises(RuntimeError):
+        asyncio.run(buffer.submit([{"n": 0}]))